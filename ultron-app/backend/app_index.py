@@ -0,0 +1,187 @@
+"""
+Ultron Application Index
+Persistent, incrementally rescanned shortcut index with trigram fuzzy lookup
+"""
+import os
+import json
+import heapq
+import time
+import difflib
+import logging
+import threading
+
+APP_INDEX_PATH = os.getenv("ULTRON_APP_INDEX", "ultron_app_index.json")
+SHORTCUT_EXTS = (".lnk", ".url")
+FUZZY_CANDIDATES = 20
+
+
+def default_scan_roots():
+    """ULTRON_APP_DIRS (os.pathsep-separated) overrides the Windows Start Menu/Desktop defaults."""
+    configured = os.getenv("ULTRON_APP_DIRS")
+    if configured:
+        return [d for d in configured.split(os.pathsep) if d]
+    roots = []
+    for env, sub in (("APPDATA", r"Microsoft\Windows\Start Menu"),
+                     ("ProgramData", r"Microsoft\Windows\Start Menu"),
+                     ("USERPROFILE", "Desktop")):
+        base = os.getenv(env)
+        if base: roots.append(os.path.join(base, sub))
+    return roots
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FuzzyIndex:
+    """Trigram inverted index. Only names sharing rare trigrams with the query are scored, instead of every key."""
+    def __init__(self, names=()):
+        self.grams = {}
+        self.size = 0
+        for name in names: self.add(name)
+
+    def add(self, name):
+        self.size += 1
+        for gram in trigrams(name):
+            self.grams.setdefault(gram, set()).add(name)
+
+    def remove(self, name):
+        self.size -= 1
+        for gram in trigrams(name):
+            names = self.grams.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names: del self.grams[gram]
+
+    def match(self, query, cutoff=0.5):
+        postings = sorted((self.grams[g] for g in trigrams(query) if g in self.grams), key=len)
+        if not postings: return None
+        # Very common trigrams ("the", " pr") say little and cost a lot; keep the rarest ones
+        limit = max(64, self.size // 200)
+        selective = [p for p in postings if len(p) <= limit] or postings[:3]
+        counts = {}
+        for names in selective:
+            for name in names:
+                counts[name] = counts.get(name, 0) + 1
+        shortlist = heapq.nlargest(FUZZY_CANDIDATES, counts, key=counts.get)
+        # Same scoring as difflib.get_close_matches, applied to the shortlist only
+        matches = difflib.get_close_matches(query, shortlist, n=1, cutoff=cutoff)
+        return matches[0] if matches else None
+
+
+class AppIndex:
+    """
+    name -> shortcut path. Loaded from the on-disk cache immediately; refresh()
+    restats directories and only relists the ones whose mtime changed.
+    """
+    def __init__(self, custom_paths=None, roots=None, cache_path=APP_INDEX_PATH):
+        self.custom_paths = dict(custom_paths or {})
+        self.roots = default_scan_roots() if roots is None else list(roots)
+        self.cache_path = cache_path
+        self._dirs = {}  # dir -> {"mtime": float, "files": {name: path}, "subdirs": [dir]}
+        self.entries = dict(self.custom_paths)
+        self.fuzzy = None  # Built on first refresh/fuzzy lookup, then updated incrementally
+        self._fuzzy_lock = threading.Lock()
+        self.last_scan = {"dirs": 0, "relisted": 0, "seconds": 0.0}
+        self._refresh_lock = threading.Lock()
+        self._load_cache()
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path): return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("roots") != self.roots: return
+            self._dirs = cached["dirs"]
+            self._publish()
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"App index cache unreadable, rescanning: {e}")
+
+    def _save_cache(self):
+        if not self.cache_path: return
+        tmp = self.cache_path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"roots": self.roots, "dirs": self._dirs}, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logging.warning(f"Could not persist app index: {e}")
+
+    def refresh(self):
+        """Incremental rescan of all roots. Safe to call from a background thread."""
+        with self._refresh_lock:
+            start = time.perf_counter()
+            dirs, stats = {}, {"dirs": 0, "relisted": 0}
+            for root in self.roots:
+                self._scan(root, dirs, stats)
+            self._dirs = dirs
+            self._publish()
+            if self.fuzzy is None: self._fuzzy_match("")  # Warm the fuzzy index off the request path
+            self.last_scan = {**stats, "seconds": round(time.perf_counter() - start, 4)}
+            self._save_cache()
+            logging.info(f"App index refreshed: {len(self.entries)} apps, {stats['relisted']}/{stats['dirs']} dirs relisted.")
+
+    def _scan(self, root, dirs, stats):
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            stats["dirs"] += 1
+            cached = self._dirs.get(path)
+            if cached is None or cached["mtime"] != mtime:
+                cached = self._list_dir(path, mtime)
+                stats["relisted"] += 1
+            dirs[path] = cached
+            stack.extend(cached["subdirs"])
+
+    def _list_dir(self, path, mtime):
+        files, subdirs = {}, []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(SHORTCUT_EXTS):
+                        files[entry.name.rsplit(".", 1)[0].lower()] = entry.path
+        except OSError:
+            pass
+        return {"mtime": mtime, "files": files, "subdirs": subdirs}
+
+    def _publish(self):
+        entries = {}
+        for listing in self._dirs.values():
+            entries.update(listing["files"])
+        entries.update(self.custom_paths)
+        with self._fuzzy_lock:
+            if self.fuzzy is not None:
+                for name in self.entries.keys() - entries.keys(): self.fuzzy.remove(name)
+                for name in entries.keys() - self.entries.keys(): self.fuzzy.add(name)
+            # Readers only ever see a complete dict; the swap is a single assignment
+            self.entries = entries
+
+    def _fuzzy_match(self, name):
+        with self._fuzzy_lock:
+            if self.fuzzy is None: self.fuzzy = FuzzyIndex(self.entries)
+            return self.fuzzy.match(name)
+
+    def refresh_in_background(self):
+        thread = threading.Thread(target=self.refresh, name="ultron-app-index", daemon=True)
+        thread.start()
+        return thread
+
+    def lookup(self, name):
+        name = name.lower().strip()
+        path = self.entries.get(name)
+        if path: return path
+        match = self._fuzzy_match(name)
+        return self.entries.get(match) if match else None
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,98 @@
+"""
+Ultron App Index Benchmark
+Cold scan, cached start, incremental rescans and lookups over a synthetic Start Menu of ~50k shortcuts
+
+    python bench/app_index_bench.py [--files 50000] [--per-dir 100]
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import argparse
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from app_index import AppIndex
+
+VENDORS = ["adobe", "jetbrains", "microsoft", "valve", "riot", "epic", "mozilla", "google", "autodesk", "corsair"]
+PRODUCTS = ["studio", "player", "editor", "launcher", "manager", "console", "viewer", "updater", "designer", "helper"]
+
+
+def build_tree(root, files, per_dir, rng):
+    """`files` .lnk shortcuts spread over vendor/product folders, `per_dir` per folder. Returns all names."""
+    names = []
+    for n in range(files):
+        folder = os.path.join(root, VENDORS[n // per_dir % len(VENDORS)], f"pack {n // per_dir}")
+        if n % per_dir == 0: os.makedirs(folder, exist_ok=True)
+        name = f"{rng.choice(VENDORS)} {rng.choice(PRODUCTS)} {n}"
+        open(os.path.join(folder, name + ".lnk"), 'w').close()
+        names.append(name)
+    return names
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def lookup_ms(index, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        index.lookup(query)
+        samples.append(time.perf_counter() - start)
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50_ms": round(cuts[49] * 1000, 3), "p95_ms": round(cuts[94] * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="App index scan and lookup benchmark.")
+    parser.add_argument("--files", type=int, default=50000)
+    parser.add_argument("--per-dir", type=int, default=100)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="ultron-apps-") as workdir:
+        root = os.path.join(workdir, "Start Menu")
+        cache = os.path.join(workdir, "app_index.json")
+        start = time.perf_counter()
+        names = build_tree(root, args.files, args.per_dir, rng)
+        print(json.dumps({"files": args.files, "dirs": args.files // args.per_dir, "build_s": round(time.perf_counter() - start, 2)}))
+
+        # Cold: no cache, every directory is listed and the fuzzy index built (each startup before the index was persisted)
+        cold = AppIndex(roots=[root], cache_path=cache)
+        row = {"cold_scan_ms": timed(cold.refresh), "apps": len(cold), "cache_kb": round(os.path.getsize(cache) / 1024, 1)}
+
+        # Warm start: the cached index is served at construction, the rescan only restats directories
+        warm_holder = {}
+        row["cached_start_ms"] = timed(lambda: warm_holder.setdefault("index", AppIndex(roots=[root], cache_path=cache)))
+        warm = warm_holder["index"]
+        row["apps_at_start"] = len(warm)
+        # Built once on the first refresh; timed apart so the rescans below show only restat cost
+        row["fuzzy_build_ms"] = timed(lambda: warm._fuzzy_match(""))
+        row["unchanged_rescan_ms"] = timed(warm.refresh)
+        row["unchanged_relisted"] = warm.last_scan["relisted"]
+
+        # One new shortcut: only its folder is relisted
+        folder = os.path.join(root, VENDORS[0], "pack 0")
+        open(os.path.join(folder, "brand new tool.lnk"), 'w').close()
+        row["one_change_rescan_ms"] = timed(warm.refresh)
+        row["one_change_relisted"] = warm.last_scan["relisted"]
+        row["new_app_found"] = "brand new tool" in warm
+
+        exact = [rng.choice(names) for _ in range(args.lookups)]
+        fuzzy = [name.replace(" ", "", 1)[:-1] for name in exact]  # Typo'd: missing space and last digit
+        row["exact_lookup"] = lookup_ms(warm, exact)
+        row["fuzzy_lookup"] = lookup_ms(warm, fuzzy)
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
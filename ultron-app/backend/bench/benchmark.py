@@ -0,0 +1,359 @@
+"""
+Ultron Benchmark
+Drives server.app against the local LLM stub with fake hardware and reports per-workload latency
+
+    python bench/benchmark.py --requests 400 --concurrency 16 --mix command=4,chat=3,clipboard=1,ws_chat=2 --subscribers 8
+    python bench/benchmark.py --mix chat=1 --sweep-intent    # fused vs split intent resolution, one process each
+    python bench/benchmark.py --subscribers 300 --broadcast-interval 0.1    # WebSocket fan-out delivery latency
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BACKEND_DIR, BENCH_DIR]
+
+import httpx
+import uvicorn
+from websockets import connect as ws_connect
+from llm_stub import StubConfig, create_stub
+
+COMMANDS = ["volume 35", "brightness 70", "check status", "set volume to 20", "system stats"]
+CHATS = [
+    "how are you holding up today",
+    "explain what a context switch costs",
+    "give me a one line status report",
+    "what should I work on next",
+]
+WORKLOADS = ("command", "chat", "clipboard", "ws_chat")
+INTENT_MODES = ("fused", "split")
+DEFAULT_MIX = "command=4,chat=3,clipboard=1,ws_chat=2"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in WORKLOADS: raise SystemExit(f"Unknown workload '{name}' (expected one of {', '.join(WORKLOADS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def summarize(samples, errors, wall):
+    """Latency summary in milliseconds."""
+    result = {"count": len(samples), "errors": errors, "throughput_rps": round(len(samples) / wall, 2) if wall else 0.0}
+    if samples:
+        ordered = sorted(samples)
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else [ordered[0]] * 99
+        result.update({
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 2),
+            "p50_ms": round(cuts[49] * 1000, 2),
+            "p95_ms": round(cuts[94] * 1000, 2),
+            "p99_ms": round(cuts[98] * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        })
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class ServerThread(threading.Thread):
+    """Runs a uvicorn server on its own thread and event loop."""
+    def __init__(self, app, port):
+        super().__init__(daemon=True)
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+
+    def run(self):
+        # Own loop, kept so the driver can schedule work on the server's loop (injected broadcasts)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.server.serve())
+
+    def wait_started(self, timeout=15):
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.is_alive(): raise RuntimeError(f"Server on port {self.port} failed to start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.join(10)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, workload, seconds):
+        self.samples.setdefault(workload, []).append(seconds)
+
+    def error(self, workload):
+        self.errors[workload] = self.errors.get(workload, 0) + 1
+
+
+class LoadDriver:
+    """
+    Workers pull a pre-sampled plan of workloads, so a given --seed always issues the same requests.
+    `broadcast(message)` sends a frame to every connected client from the server's loop.
+    """
+    def __init__(self, args, base_url, hal, broadcast=None):
+        self.args = args
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://") + "/ws"
+        self.hal = hal
+        self.broadcast = broadcast
+        self.recorder = Recorder()
+        self.rng = random.Random(args.seed)
+        self.frames = 0
+
+    def plan(self, n):
+        mix = parse_mix(self.args.mix)
+        return self.rng.choices(list(mix), weights=list(mix.values()), k=n)
+
+    async def run(self):
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.args.timeout,
+                                     limits=httpx.Limits(max_connections=self.args.concurrency * 2)) as http:
+            stop = asyncio.Event()
+            ready = asyncio.Semaphore(0)
+            subscribers = [asyncio.create_task(self.subscriber(stop, ready)) for _ in range(self.args.subscribers)]
+            for _ in subscribers: await ready.acquire()
+            if self.args.warmup:
+                await self.pump(http, self.plan(self.args.warmup), Recorder())
+            start = time.perf_counter()
+            broadcaster = asyncio.create_task(self.broadcaster(stop)) if self.broadcast and self.args.broadcast_interval else None
+            await self.pump(http, self.plan(self.args.requests), self.recorder)
+            wall = time.perf_counter() - start
+            stop.set()
+            if broadcaster: await broadcaster
+            await asyncio.gather(*subscribers, return_exceptions=True)
+            status = (await http.get("/status")).json()
+        return wall, status
+
+    async def pump(self, http, plan, recorder):
+        queue = asyncio.Queue()
+        for item in plan: queue.put_nowait(item)
+        await asyncio.gather(*(self.worker(i, http, queue, recorder) for i in range(self.args.concurrency)))
+
+    async def worker(self, index, http, queue, recorder):
+        session_id = f"bench-{index}"
+        ws = None
+        try:
+            while not queue.empty():
+                workload = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    if workload == "ws_chat":
+                        if ws is None: ws = await ws_connect(f"{self.ws_url}?session_id={session_id}")
+                        first = await self.ws_chat(ws, self.rng.choice(CHATS))
+                        recorder.record("ws_chat_first_delta", first - start)
+                    else:
+                        ok = await self.http_chat(http, workload, session_id)
+                        if not ok: raise RuntimeError("unsuccessful response")
+                except Exception:
+                    recorder.error(workload)
+                    if workload == "ws_chat" and ws is not None:
+                        await ws.close()
+                        ws = None
+                    continue
+                recorder.record(workload, time.perf_counter() - start)
+        finally:
+            if ws is not None: await ws.close()
+
+    async def http_chat(self, http, workload, session_id):
+        if workload == "command":
+            text = self.rng.choice(COMMANDS)
+        elif workload == "clipboard":
+            # Fresh text each time so the analysis isn't just a cache hit
+            self.hal.backends.clipboard.text = f"Build {self.rng.randrange(10**9)} failed: " + "stack frame " * self.args.clipboard_words
+            text = "analyze clipboard"
+        else:
+            # Unique text, so the split path's deterministic intent call can't be served from the response cache
+            text = f"{self.rng.choice(CHATS)} (case {self.rng.randrange(10**6)})"
+        res = await http.post("/chat", json={"text": text, "session_id": session_id})
+        res.raise_for_status()
+        return res.json().get("success", False)
+
+    async def ws_chat(self, ws, text):
+        """Sends one streamed chat and waits for chat_done. Returns when its first frame arrived."""
+        request_id = str(self.rng.random())
+        await ws.send(json.dumps({"type": "chat", "id": request_id, "text": text}))
+        first = None
+        while True:
+            message = json.loads(await ws.recv())
+            if message.get("id") != request_id: continue
+            if first is None: first = time.perf_counter()
+            if message["type"] == "chat_done":
+                if not message.get("success"): raise RuntimeError("chat failed")
+                return first
+
+    async def broadcaster(self, stop):
+        """Stands in for autonomous thoughts: one broadcast to all clients every --broadcast-interval seconds."""
+        while not stop.is_set():
+            self.broadcast({"type": "autonomous", "text": "bench broadcast", "timestamp": time.time()})
+            await asyncio.sleep(self.args.broadcast_interval)
+
+    async def subscriber(self, stop, ready):
+        """
+        Passive dashboard client: subscribes to status pushes and counts every frame it receives.
+        Frames stamped by the server are recorded as delivery_<type> (send to receipt, same clock).
+        """
+        try:
+            ws = await ws_connect(self.ws_url, max_queue=None)
+        finally:
+            ready.release()
+        try:
+            await ws.send(json.dumps({"type": "subscribe", "topic": "status"}))
+            while not stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                received = time.time()
+                self.frames += 1
+                message = json.loads(raw)
+                if "timestamp" in message: self.recorder.record(f"delivery_{message.get('type')}", received - message["timestamp"])
+        finally:
+            await ws.close()
+
+
+def configure_environment(stub_url, workdir, args):
+    """Must run before `server` is imported: ultron_core reads its configuration at import time."""
+    os.environ.update({
+        "GROQ_API_KEY": "bench",
+        "ULTRON_LLM_BASE_URL": stub_url,
+        "ULTRON_HAL_BACKEND": "fake",
+        "ULTRON_MEMORY_PATH": os.path.join(workdir, "memory.jsonl"),
+        "ULTRON_JOURNAL_PATH": os.path.join(workdir, "journal.jsonl"),
+        "ULTRON_APP_DIRS": workdir,
+        "ULTRON_APP_INDEX": os.path.join(workdir, "app_index.json"),
+        "ULTRON_DOWNLOADS_DIR": workdir,
+        "ULTRON_WS_STATUS_INTERVAL": str(args.status_interval),
+        "ULTRON_LLM_RPM": str(args.rpm),
+        "ULTRON_LLM_TPM": str(args.tpm),
+    })
+    if getattr(args, "intent_mode", None): os.environ["ULTRON_INTENT_MODE"] = args.intent_mode
+    os.environ.pop("ULTRON_CACHE_PATH", None)
+
+
+def sweep_intent(args):
+    """Runs the same workload once per ULTRON_INTENT_MODE, each in a fresh process, and compares them."""
+    passthrough = []
+    for key, value in vars(args).items():
+        if key in ("sweep_intent", "intent_mode", "out", "label"): continue
+        passthrough += [f"--{key.replace('_', '-')}", str(value)]
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    rows = {}
+    for mode in INTENT_MODES:
+        out = os.path.join(BENCH_DIR, "results", f"{stamp}-intent-{mode}.json")
+        subprocess.run([sys.executable, os.path.abspath(__file__), *passthrough, "--intent-mode", mode,
+                        "--label", f"{args.label or 'intent'}-{mode}", "--out", out], check=True)
+        with open(out, 'r', encoding='utf-8') as f:
+            rows[mode] = json.load(f)
+
+    print(f"\n{'intent mode':<14}{'chat p50':>10}{'chat p95':>10}{'chat p99':>10}{'llm calls':>11}{'stub reqs':>11}{'rps':>8}")
+    for mode, result in rows.items():
+        chat = result["workloads"].get("chat", {})
+        print(f"{mode:<14}{chat.get('p50_ms', '-'):>10}{chat.get('p95_ms', '-'):>10}{chat.get('p99_ms', '-'):>10}"
+              f"{(result['server'].get('llm') or {}).get('calls', '-'):>11}{result['stub']['requests']:>11}{result['throughput_rps']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Ultron backend benchmark (no Groq, no real hardware).")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests across all workers")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted workloads from {', '.join(WORKLOADS)}")
+    parser.add_argument("--subscribers", type=int, default=4, help="passive WebSocket clients subscribed to status")
+    parser.add_argument("--status-interval", type=float, default=0.5)
+    parser.add_argument("--broadcast-interval", type=float, default=0.25, help="seconds between injected broadcasts (0 = none)")
+    parser.add_argument("--clipboard-words", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.25, help="stub seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="stub completion tokens per second")
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls that return HTTP 500")
+    parser.add_argument("--rpm", type=float, default=0, help="scheduler requests/minute limit (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=0, help="scheduler tokens/minute limit (0 = unlimited)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--intent-mode", choices=INTENT_MODES, default=None, help="ULTRON_INTENT_MODE for the backend (default: its own)")
+    parser.add_argument("--sweep-intent", action="store_true", help="run once per intent mode and compare them")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--out", default=None, help="results file (default: bench/results/<time>-<rev>.json)")
+    args = parser.parse_args()
+    if args.sweep_intent: return sweep_intent(args)
+
+    stub_config = StubConfig(latency=args.latency, token_rate=args.token_rate, reply_tokens=args.reply_tokens, error_rate=args.error_rate)
+    stub = ServerThread(create_stub(stub_config), free_port())
+    stub.start()
+    stub.wait_started()
+
+    with tempfile.TemporaryDirectory(prefix="ultron-bench-") as workdir:
+        configure_environment(f"http://127.0.0.1:{stub.port}/v1", workdir, args)
+        import server
+        backend = ServerThread(server.app, free_port())
+        backend.start()
+        backend.wait_started()
+        try:
+            inject = lambda message: asyncio.run_coroutine_threadsafe(server.manager.broadcast(message), backend.loop)
+            driver = LoadDriver(args, f"http://127.0.0.1:{backend.port}", server.hal, inject)
+            wall, status = asyncio.run(driver.run())
+            metrics_text = httpx.get(f"http://127.0.0.1:{backend.port}/metrics").text
+        finally:
+            backend.stop()
+            stub.stop()
+
+    recorder = driver.recorder
+    names = sorted(set(recorder.samples) | set(recorder.errors))
+    results = {
+        "label": args.label,
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "stub": {**stub_config.as_dict(), "requests": stub.server.config.app.state.requests},
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(sum(len(recorder.samples.get(name, [])) for name in WORKLOADS) / wall, 2),
+        "workloads": {name: summarize(recorder.samples.get(name, []), recorder.errors.get(name, 0), wall) for name in names},
+        "subscribers": {"clients": args.subscribers, "frames": driver.frames},
+        "server": {key: status.get(key) for key in ("cache", "llm", "llm_scheduler", "sessions", "websockets", "router")},
+        "metrics": metrics_text,
+    }
+
+    out = args.out or os.path.join(BENCH_DIR, "results", f"{time.strftime('%Y%m%d-%H%M%S')}-{results['revision'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'workload':<22}{'count':>7}{'err':>5}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, row in results["workloads"].items():
+        print(f"{name:<22}{row['count']:>7}{row['errors']:>5}{row['throughput_rps']:>9}"
+              f"{row.get('p50_ms', '-'):>10}{row.get('p95_ms', '-'):>10}{row.get('p99_ms', '-'):>10}")
+    print(f"total {results['throughput_rps']} req/s over {results['wall_seconds']}s; frames to subscribers: {driver.frames}")
+    print(f"saved {out}")
+
+
+if __name__ == "__main__":
+    main()
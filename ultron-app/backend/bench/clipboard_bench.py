@@ -0,0 +1,140 @@
+"""
+Ultron Clipboard Benchmark
+Multi-megabyte clipboard analysis against the local LLM stub: single prompt vs chunked map-reduce,
+under the scheduler's real RPM/TPM limits (each measurement starts from a full bucket)
+
+    python bench/clipboard_bench.py --sizes 1,4 --concurrency 1,4,8 [--rpm 30 --tpm 12000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from benchmark import ServerThread, free_port, git_revision
+from llm_stub import StubConfig, create_stub
+from llm_gateway import LLMGateway, LLMError
+from llm_scheduler import LLMScheduler, LLM_RPM, LLM_TPM, TOOL
+from response_cache import ResponseCache, make_key
+from doc_analyzer import DocumentAnalyzer, chunk_text
+
+LEVELS = ["INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR"]
+COMPONENTS = ["scheduler", "telemetry", "gateway", "router", "hal", "memory"]
+
+
+def synthetic_log(megabytes, seed=3):
+    """Deterministic log-like text of roughly `megabytes` MB."""
+    rng = random.Random(seed)
+    lines, size, target = [], 0, int(megabytes * 1024 * 1024)
+    while size < target:
+        line = f"2026-01-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d} {rng.choice(LEVELS)} [{rng.choice(COMPONENTS)}] request {rng.randrange(10**6)} took {rng.randint(1, 900)}ms status={rng.choice([200, 200, 200, 429, 500])}\n"
+        lines.append(line)
+        size += len(line)
+    return "".join(lines)
+
+
+def single_prompt(text):
+    return f"User just copied this text. Analyze/Summarize it concisely as Ultron:\n\n{text}"
+
+
+def completer(gateway, cache):
+    """Mirrors CognitiveEngine._analyze_complete: TOOL priority, cacheable calls answered from the response cache."""
+    async def complete(cacheable=False, **kwargs):
+        kwargs.setdefault("priority", TOOL)
+        key = make_key(gateway.model, kwargs["messages"], **{k: v for k, v in kwargs.items() if k != "messages"}) if cacheable else None
+        if key:
+            cached = cache.get(key)
+            if cached is not None: return cached
+        content = await gateway.acomplete(**kwargs)
+        if key and content: cache.put(key, content)
+        return content
+    return complete
+
+
+def fresh_gateway(args, url):
+    return LLMGateway("bench", url, "bench-model", timeout=args.timeout, max_concurrency=16, retries=0,
+                      scheduler=LLMScheduler(max_concurrency=16, rpm=args.rpm, tpm=args.tpm))
+
+
+def queue_wait_ms(gateway):
+    wait = gateway.scheduler.stats()["wait"]["tool"]
+    return wait["max_ms"] if wait else 0.0
+
+
+async def run(args, url):
+    results = []
+    for megabytes in args.sizes:
+        text = synthetic_log(megabytes)
+        start = time.perf_counter()
+        chunks = sum(1 for _ in chunk_text(text))
+        row = {"megabytes": megabytes, "chars": len(text), "chunks": chunks, "chunking_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+        gateway = fresh_gateway(args, url)
+        start = time.perf_counter()
+        try:
+            await gateway.acomplete(messages=[{"role": "user", "content": single_prompt(text)}], max_tokens=200, priority=TOOL)
+            row["single_prompt_s"] = round(time.perf_counter() - start, 3)
+        except LLMError as e:
+            row["single_prompt_s"] = None
+            row["single_prompt_error"] = str(e)[:120]
+
+        row["map_reduce"] = {}
+        for concurrency in args.concurrency:
+            gateway = fresh_gateway(args, url)
+            cache = ResponseCache(max_entries=100000, ttl=3600)
+            analyzer = DocumentAnalyzer(completer(gateway, cache), cache=cache, concurrency=concurrency, max_chunks=args.max_chunks,
+                                        tpm=args.tpm, rpm=args.rpm)
+            start = time.perf_counter()
+            await analyzer.analyze(text, single_prompt)
+            cold = time.perf_counter() - start
+            cold_run = dict(analyzer.last_run, llm_calls=gateway.counts["calls"], queue_wait_max_ms=queue_wait_ms(gateway))
+            start = time.perf_counter()
+            await analyzer.analyze(text, single_prompt)
+            warm = time.perf_counter() - start
+            row["map_reduce"][concurrency] = {"cold_s": round(cold, 3), "recopy_s": round(warm, 4), **cold_run}
+        results.append(row)
+        print(json.dumps(row))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clipboard analysis benchmark against the local LLM stub.")
+    parser.add_argument("--sizes", default="1,4", help="comma-separated input sizes in MB")
+    parser.add_argument("--concurrency", default="1,4,8", help="comma-separated map concurrency caps")
+    parser.add_argument("--max-chunks", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-rate", type=float, default=400.0)
+    parser.add_argument("--prefill-rate", type=float, default=20000.0, help="stub prompt tokens/second")
+    parser.add_argument("--context-window", type=int, default=131072)
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-call deadline, queue time included (the server's default)")
+    parser.add_argument("--rpm", type=float, default=LLM_RPM, help="scheduler requests/minute (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=LLM_TPM, help="scheduler tokens/minute (0 = unlimited)")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    args.sizes = [float(s) for s in args.sizes.split(",")]
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    config = StubConfig(latency=args.latency, token_rate=args.token_rate, reply_tokens=80,
+                        prefill_rate=args.prefill_rate, context_window=args.context_window)
+    stub = ServerThread(create_stub(config), free_port())
+    stub.start()
+    stub.wait_started()
+    try:
+        results = asyncio.run(run(args, f"http://127.0.0.1:{stub.port}/v1"))
+    finally:
+        stub.stop()
+
+    out = args.out or os.path.join(BENCH_DIR, "results", f"clipboard-{time.strftime('%Y%m%d-%H%M%S')}-{git_revision() or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump({"revision": git_revision(), "stub": config.as_dict(), "max_chunks": args.max_chunks, "rpm": args.rpm, "tpm": args.tpm, "results": results}, f, indent=2)
+    print(f"saved {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Ultron LLM Stub
+Local OpenAI-compatible /chat/completions server for offline benchmarks
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = "the system is nominal your request has been processed and logged for later review".split()
+
+
+class StubConfig:
+    def __init__(self, latency=0.25, token_rate=200.0, reply_tokens=60, error_rate=0.0, jitter=0.1, prefill_rate=0.0, context_window=0,
+                 error_status=500, fail_models=(), faults=None, stall=30.0, retry_after=None):
+        self.latency = latency            # Seconds before the first token (network + queueing)
+        self.token_rate = token_rate      # Completion tokens per second after the first one; 0 = instant
+        self.reply_tokens = reply_tokens  # Upper bound; max_tokens in the request caps it further
+        self.error_rate = error_rate      # Fraction of requests answered with HTTP 500
+        self.jitter = jitter              # +/- fraction applied to latency
+        self.prefill_rate = prefill_rate  # Prompt tokens per second added to the first-token delay; 0 = free
+        self.context_window = context_window  # Prompts above this many tokens get HTTP 400; 0 = unlimited
+        self.error_status = error_status  # Status used for error_rate and fail_models failures
+        self.fail_models = set(fail_models)  # Every request for these models fails
+        # Scripted faults consumed one per request, in order: an HTTP status, or "stall" (no answer for `stall` seconds)
+        self.faults = list(faults or [])
+        self.stall = stall
+        self.retry_after = retry_after  # Retry-After header (seconds) sent with 429s
+
+    def as_dict(self):
+        return {k: (sorted(v) if isinstance(v, set) else v) for k, v in vars(self).items()}
+
+
+def create_stub(config=None):
+    config = config or StubConfig()
+    app = FastAPI(title="Ultron LLM Stub")
+    app.state.config = config
+    app.state.requests = 0
+
+    def reply_words(body):
+        n = min(config.reply_tokens, int(body.get("max_tokens") or config.reply_tokens))
+        return [WORDS[i % len(WORDS)] for i in range(max(1, n))]
+
+    def prompt_tokens(body):
+        # ~4 characters per token; close enough for timing and context-limit checks
+        return sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+
+    async def first_token_delay(body=None):
+        delay = config.latency * (1 + random.uniform(-config.jitter, config.jitter))
+        if body is not None and config.prefill_rate > 0:
+            delay += prompt_tokens(body) / config.prefill_rate
+        await asyncio.sleep(max(0.0, delay))
+
+    def token_delay(n):
+        return n / config.token_rate if config.token_rate > 0 else 0.0
+
+    def error(status):
+        kind = "rate_limit_error" if status == 429 else "server_error"
+        headers = {"retry-after": str(config.retry_after)} if status == 429 and config.retry_after is not None else None
+        return JSONResponse({"error": {"message": "injected failure", "type": kind}}, status_code=status, headers=headers)
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        fault = config.faults.pop(0) if config.faults else None
+        if fault == "stall":
+            await asyncio.sleep(config.stall)
+        elif fault is not None:
+            return error(int(fault))
+        if body.get("model") in config.fail_models or (config.error_rate and random.random() < config.error_rate):
+            await first_token_delay()
+            return error(config.error_status)
+        if config.context_window and prompt_tokens(body) > config.context_window:
+            return JSONResponse({"error": {"message": "context length exceeded", "type": "invalid_request_error"}}, status_code=400)
+
+        words = reply_words(body)
+        created = int(time.time())
+        if body.get("stream"):
+            async def events():
+                await first_token_delay(body)
+                for i, word in enumerate(words):
+                    if i: await asyncio.sleep(token_delay(1))
+                    chunk = {"id": "stub", "object": "chat.completion.chunk", "created": created, "model": body.get("model"),
+                             "choices": [{"index": 0, "delta": {"content": ("" if i == 0 else " ") + word}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                done = {"id": "stub", "object": "chat.completion.chunk", "created": created, "model": body.get("model"),
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                yield f"data: {json.dumps(done)}\n\n"
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    usage = {"id": "stub", "object": "chat.completion.chunk", "created": created, "model": body.get("model"), "choices": [],
+                             "usage": {"prompt_tokens": prompt_tokens(body), "completion_tokens": len(words), "total_tokens": prompt_tokens(body) + len(words)}}
+                    yield f"data: {json.dumps(usage)}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await first_token_delay(body)
+        await asyncio.sleep(token_delay(len(words) - 1))
+        text = " ".join(words)
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            # Valid for both the intent-only and the fused intent+reply prompts
+            text = json.dumps({"tool": "none", "params": {}, "reply": text})
+        return {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": created,
+            "model": body.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens(body), "completion_tokens": len(words), "total_tokens": prompt_tokens(body) + len(words)},
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve the LLM stub on its own (point ULTRON_LLM_BASE_URL at http://HOST:PORT/v1).")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.25)
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--prefill-rate", type=float, default=0.0)
+    parser.add_argument("--context-window", type=int, default=0)
+    args = parser.parse_args()
+    config = StubConfig(latency=args.latency, token_rate=args.token_rate, reply_tokens=args.reply_tokens, error_rate=args.error_rate,
+                        prefill_rate=args.prefill_rate, context_window=args.context_window)
+    uvicorn.run(create_stub(config), host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,98 @@
+"""
+Ultron Memory Benchmark
+Load, append, retrieval and compaction cost of the fact log at 1k/10k/100k facts
+
+    python bench/memory_bench.py [--sizes 1000,10000,100000] [--duplicates 0.3]
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import argparse
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from memory_store import MemorySystem
+
+SUBJECTS = ["coffee", "tea", "python", "rust", "valorant", "discord", "spotify", "the gym", "sushi", "jazz", "linux", "chess"]
+VERBS = ["likes", "dislikes", "uses", "plays", "avoids", "prefers", "is learning", "talks about"]
+QUERIES = ["what do I like to drink", "which games do I play", "what language am I learning", "do I like jazz", "gym schedule"]
+
+
+def synthetic_facts(n, duplicate_share, rng):
+    """n log records; about `duplicate_share` of them repeat an earlier fact under a later timestamp."""
+    facts, unique = [], []
+    for i in range(n):
+        if unique and rng.random() < duplicate_share:
+            text = rng.choice(unique)
+        else:
+            text = f"User {rng.choice(VERBS)} {rng.choice(SUBJECTS)} (note {i})"
+            unique.append(text)
+        facts.append(f"[2026-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}] {text}")
+    return facts
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+    return {"p50_ms": round(cuts[49] * 1000, 3), "p95_ms": round(cuts[94] * 1000, 3)}
+
+
+def measure(size, args, rng, workdir):
+    path = os.path.join(workdir, f"memory-{size}.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in synthetic_facts(size, args.duplicates, rng):
+            f.write(json.dumps({"fact": entry}) + "\n")
+    row = {"facts": size, "log_kb": round(os.path.getsize(path) / 1024, 1)}
+
+    # Load compacts at once when the log is past the waste ratio
+    start = time.perf_counter()
+    memory = MemorySystem(path)
+    row["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    row["after_load"] = len(memory.facts)
+    row["compacted_on_load"] = memory.compactions
+
+    reads = []
+    for n in range(args.queries):
+        start = time.perf_counter()
+        memory.get_context(QUERIES[n % len(QUERIES)])
+        reads.append(time.perf_counter() - start)
+    row["get_context"] = percentiles(reads)
+
+    # Half of the appends repeat stored facts, which is what drives compaction during appends
+    writes = []
+    for n in range(args.appends):
+        text = rng.choice(memory.facts).split("] ", 1)[1] if n % 2 else f"User mentioned appointment {n}"
+        start = time.perf_counter()
+        memory.add_memory(text)
+        writes.append(time.perf_counter() - start)
+    row["add_memory"] = percentiles(writes)
+
+    start = time.perf_counter()
+    row["compacted_to"] = memory.compact()
+    row["compact_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    row["compactions"] = memory.compactions
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory log benchmark.")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="share of records that repeat an earlier fact")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--appends", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="ultron-memory-") as workdir:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(json.dumps(measure(size, args, rng, workdir)))
+
+
+if __name__ == "__main__":
+    main()
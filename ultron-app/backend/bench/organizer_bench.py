@@ -0,0 +1,106 @@
+"""
+Ultron File Organizer Benchmark
+Sorts a synthetic Downloads folder of ~100k files with the old per-file loop and with FileOrganizer
+
+    python bench/organizer_bench.py [--files 100000] [--workers 1,8]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import tempfile
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from file_organizer import FileOrganizer, DEST_RULES
+
+SORTED_EXTS = [ext for exts in DEST_RULES.values() for ext in exts]
+EXTENSIONS = SORTED_EXTS + [".iso", ".torrent", ".json"]  # The last three have no rule and stay put
+
+
+def build_downloads(root, files, seed):
+    rng = random.Random(seed)
+    os.makedirs(root)
+    for n in range(files):
+        open(os.path.join(root, f"file {n}{rng.choice(EXTENSIONS)}"), 'w').close()
+
+
+def legacy_organize(downloads_path):
+    """HardwareInterface.organize_downloads before the organizer subsystem, minus the USERPROFILE lookup."""
+    dest_map = DEST_RULES
+    moved_count = 0
+    for filename in os.listdir(downloads_path):
+        file_path = os.path.join(downloads_path, filename)
+        if os.path.isfile(file_path):
+            ext = os.path.splitext(filename)[1].lower()
+            for folder, extensions in dest_map.items():
+                if ext in extensions:
+                    target_dir = os.path.join(downloads_path, folder)
+                    os.makedirs(target_dir, exist_ok=True)
+                    try:
+                        shutil.move(file_path, os.path.join(target_dir, filename))
+                        moved_count += 1
+                    except: pass
+                    break
+    return {"moved": moved_count}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return round(time.perf_counter() - start, 3), result
+
+
+def fresh(workdir, args, label):
+    root = os.path.join(workdir, label)
+    build_downloads(root, args.files, args.seed)
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downloads cleanup on a synthetic 100k-file folder.")
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--workers", default="1,8", help="comma-separated FileOrganizer worker counts")
+    parser.add_argument("--seed", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ultron-organize-") as workdir:
+        root = fresh(workdir, args, "legacy")
+        seconds, result = timed(lambda: legacy_organize(root))
+        print(json.dumps({"mode": "legacy", "files": args.files, "seconds": seconds, **result}))
+        shutil.rmtree(root)
+
+        root = fresh(workdir, args, "plan")
+        organizer = FileOrganizer(root=root)
+        seconds, result = timed(lambda: organizer.run(dry_run=True))
+        print(json.dumps({"mode": "dry_run", "files": args.files, "seconds": seconds, "planned": result["planned"]}))
+        shutil.rmtree(root)
+
+        for workers in (int(w) for w in args.workers.split(",")):
+            root = fresh(workdir, args, f"run-{workers}")
+            updates = []
+            organizer = FileOrganizer(root=root, workers=workers)
+            seconds, result = timed(lambda: organizer.run(progress=lambda done, total: updates.append(done)))
+            print(json.dumps({"mode": "organizer", "workers": workers, "files": args.files, "seconds": seconds,
+                              "moved": result["moved"], "skipped": result["skipped"], "progress_updates": len(updates)}))
+            shutil.rmtree(root)
+
+        # Interrupted run: the plan is persisted, half the moves happen, then a new organizer resumes
+        root = fresh(workdir, args, "resume")
+        organizer = FileOrganizer(root=root)
+        moves, by_folder = organizer.plan()
+        organizer._save_state(moves)
+        for folder in by_folder: os.makedirs(os.path.join(root, folder), exist_ok=True)
+        organizer._move_batch(moves[:len(moves) // 2])
+        seconds, result = timed(lambda: FileOrganizer(root=root).run())
+        left = sum(1 for name in os.listdir(root) if os.path.splitext(name)[1] in SORTED_EXTS)
+        print(json.dumps({"mode": "resume", "planned": len(moves), "seconds": seconds, "resumed": result["resumed"],
+                          "moved": result["moved"], "unsorted_left": left}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Ultron Prompt Budget
+Prompt size per call type (local tokenizer) and prefix stability. The budgets themselves are
+enforced by tests/test_prompt_budget.py; this reports the numbers behind them.
+
+    python bench/prompt_budget.py [--turns 6]
+"""
+import os
+import sys
+import json
+import tempfile
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+SAMPLE_INPUT = "what do you think about humans?"
+SAMPLE_COMMAND = "open spotify and set volume to 30"
+
+
+def build_engine(workdir):
+    """Must run before ultron_core is imported elsewhere: it reads its configuration at import time."""
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.update({
+        "ULTRON_HAL_BACKEND": "fake",
+        "ULTRON_MEMORY_PATH": os.path.join(workdir, "memory.jsonl"),
+        "ULTRON_APP_DIRS": workdir,
+        "ULTRON_APP_INDEX": os.path.join(workdir, "app_index.json"),
+    })
+    os.environ.pop("ULTRON_CACHE_PATH", None)
+    from ultron_core import HardwareInterface, EmotionalCore, CognitiveEngine, prompt_library
+    return CognitiveEngine(EmotionalCore(), HardwareInterface()), prompt_library
+
+
+def representative(brain, library):
+    """Token count of one call of each type, as the budgets define them (empty history)."""
+    builders = {
+        "intent": lambda: brain._intent_messages(SAMPLE_COMMAND),
+        "chat": lambda: brain._chat_messages(SAMPLE_INPUT),
+        "fused": lambda: brain._fused_messages(SAMPLE_INPUT),
+        "thought": lambda: brain._thought_messages("random"),
+    }
+    return {kind: library.measure(kind, build()) for kind, build in builders.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt token budgets and prefix stability check.")
+    parser.add_argument("--turns", type=int, default=6, help="history turns for the warm-conversation row")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        brain, library = build_engine(workdir)
+        from prompts import PROMPT_BUDGETS
+        from history import count_tokens
+
+        sizes = representative(brain, library)
+        for kind, tokens in sizes.items():
+            budget = PROMPT_BUDGETS[kind]
+            row = {"kind": kind, "tokens": tokens, "prefix_tokens": library.prefix_tokens[kind], "budget": budget,
+                   "headroom": budget - tokens}
+            print(json.dumps(row))
+
+        # Mood, memory and history change between calls; the leading system message must not
+        first = brain._fused_messages(SAMPLE_INPUT)[0]["content"]
+        brain.core.process_stimuli(brain.hal.get_system_stats(), "insult")
+        brain.memory.add_memory("User likes coffee")
+        for n in range(args.turns):
+            brain.history.add_turn(f"question {n} about the weather", f"answer {n}: the weather is beneath me")
+        warm = brain._fused_messages(SAMPLE_INPUT)
+        total = library.measure("fused", warm)
+        # Everything before the state suffix repeats from the previous turn and is prefix-cacheable
+        stable = total - sum(count_tokens(m["content"]) for m in warm[-2:])
+        print(json.dumps({"kind": "fused_warm", "turns": args.turns, "tokens": total, "cacheable_prefix_tokens": stable,
+                          "prefix_stable": warm[0]["content"] == first}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Ultron Journal Replay
+Feeds recorded /chat turns back through chat_endpoint against the local LLM stub and fake HAL, and compares builds
+
+    python bench/replay.py ultron_journal.jsonl --speed 10
+    python bench/replay.py ultron_journal.jsonl --speed 0 --baseline bench/results/replay-<earlier>.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from benchmark import ServerThread, free_port, git_revision, summarize, configure_environment
+from llm_stub import StubConfig, create_stub
+from journal import journal, read_journal
+
+
+def load_turns(path, limit=None):
+    """Recorded chat turns in order; both /chat and /ws turns are replayed through chat_endpoint."""
+    turns = [r for r in read_journal(path) if r.get("kind") == "chat" and r.get("text")]
+    return turns[:limit] if limit else turns
+
+
+async def replay(server, turns, speed):
+    """
+    speed 1 keeps the recorded gaps between turns, N compresses them N times,
+    and 0 sends each turn as soon as the previous one finished.
+    """
+    rows = [None] * len(turns)
+
+    async def play(index, turn):
+        start = time.perf_counter()
+        error = None
+        try:
+            response = await server.chat_endpoint(server.ChatRequest(text=turn["text"], session_id=turn.get("session"), timings=True))
+            tool, timings = response.tool_used, response.timings
+        except Exception as e:
+            tool, timings, error = None, None, repr(e)
+        rows[index] = {
+            "index": index,
+            "route": turn.get("route"),
+            "recorded_tool": turn.get("tool"),
+            "tool": tool,
+            "recorded_ms": turn.get("ms"),
+            "ms": round((time.perf_counter() - start) * 1000, 2),
+            "timings": timings,
+            "error": error,
+        }
+
+    if not speed:
+        for index, turn in enumerate(turns): await play(index, turn)
+        return rows
+    # Records are stamped when a turn finished; pace by when it started
+    starts = [turn["t"] - (turn.get("ms") or 0) / 1000 for turn in turns]
+    clock = time.perf_counter()
+    tasks = []
+    for index, turn in enumerate(turns):
+        delay = (starts[index] - starts[0]) / speed - (time.perf_counter() - clock)
+        if delay > 0: await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(play(index, turn)))
+    await asyncio.gather(*tasks)
+    return rows
+
+
+def group_summary(rows, wall):
+    """Replayed latency per resolved tool ("none" = conversation), plus the overall figure."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row["tool"] or "error", []).append(row)
+    groups["all"] = rows
+    summary = {}
+    for name, members in sorted(groups.items()):
+        ok = [r for r in members if not r["error"]]
+        summary[name] = summarize([r["ms"] / 1000 for r in ok], len(members) - len(ok), wall)
+        recorded = [r["recorded_ms"] / 1000 for r in members if r["recorded_ms"] is not None]
+        if recorded: summary[name]["recorded"] = summarize(recorded, 0, 0)
+    return summary
+
+
+def compare(summary, baseline):
+    """Latency deltas (this build - baseline) for every group present in both runs."""
+    deltas = {}
+    for name, current in summary.items():
+        before = baseline.get("summary", {}).get(name)
+        if not before or "p50_ms" not in current or "p50_ms" not in before: continue
+        deltas[name] = {
+            key: {"baseline": before[key], "current": current[key], "delta_ms": round(current[key] - before[key], 2),
+                  "delta_pct": round((current[key] - before[key]) / before[key] * 100, 1) if before[key] else None}
+            for key in ("p50_ms", "p95_ms", "mean_ms")
+        }
+    return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an Ultron journal against the LLM stub and fake hardware.")
+    parser.add_argument("journal", help="journal path (rotated siblings <path>.N are read too)")
+    parser.add_argument("--speed", type=float, default=1.0, help="pacing: 1 = recorded, N = N times faster, 0 = back to back")
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N turns")
+    parser.add_argument("--baseline", default=None, help="earlier replay result to report latency deltas against")
+    parser.add_argument("--latency", type=float, default=0.25, help="stub seconds before the first token")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="stub tokens/second")
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    turns = load_turns(args.journal, args.limit)
+    if not turns:
+        sys.exit(f"no chat turns in {args.journal}")
+
+    config = StubConfig(latency=args.latency, token_rate=args.token_rate, reply_tokens=args.reply_tokens)
+    stub = ServerThread(create_stub(config), free_port())
+    stub.start()
+    stub.wait_started()
+    workdir = tempfile.mkdtemp(prefix="ultron-replay-")
+    # Unlimited provider limits, no live status pushes, and the replay doesn't journal itself
+    args.status_interval, args.rpm, args.tpm = 60.0, 0, 0
+    configure_environment(f"http://127.0.0.1:{stub.port}/v1", workdir, args)
+    journal.enabled = False
+    import server
+
+    try:
+        start = time.perf_counter()
+        rows = asyncio.run(replay(server, turns, args.speed))
+        wall = time.perf_counter() - start
+    finally:
+        stub.stop()
+
+    summary = group_summary(rows, wall)
+    result = {"revision": git_revision(), "journal": os.path.abspath(args.journal), "turns": len(turns), "speed": args.speed,
+              "stub": config.as_dict(), "summary": summary, "rows": rows}
+    changed = sum(1 for r in rows if r["recorded_tool"] != r["tool"])
+    print(f"{'group':<22}{'count':>7}{'err':>5}{'p50':>10}{'p95':>10}{'rec p50':>10}")
+    for name, s in summary.items():
+        rec = s.get("recorded", {}).get("p50_ms", "")
+        print(f"{name:<22}{s['count']:>7}{s['errors']:>5}{s.get('p50_ms', ''):>10}{s.get('p95_ms', ''):>10}{rec:>10}")
+    print(f"{len(turns)} turns in {wall:.2f}s; {changed} resolved to a different tool than recorded")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        result["baseline"] = {"revision": baseline.get("revision"), "path": os.path.abspath(args.baseline)}
+        result["deltas"] = compare(summary, baseline)
+        print(f"vs {baseline.get('revision') or args.baseline}:")
+        for name, delta in result["deltas"].items():
+            print(f"  {name:<20} p50 {delta['p50_ms']['delta_ms']:+.1f}ms ({delta['p50_ms']['delta_pct']}%)  p95 {delta['p95_ms']['delta_ms']:+.1f}ms ({delta['p95_ms']['delta_pct']}%)")
+
+    out = args.out or os.path.join(BENCH_DIR, "results", f"replay-{time.strftime('%Y%m%d-%H%M%S')}-{git_revision() or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"saved {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Ultron Router Evaluation
+Scores the fast-path IntentRouter on intent_corpus.json and reports the LLM round-trips it avoids
+
+    python bench/router_eval.py [--corpus intent_corpus.json] [--journal ultron_journal.jsonl | --llm-ms 600]
+"""
+import os
+import sys
+import json
+import tempfile
+import argparse
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BACKEND_DIR, BENCH_DIR]
+
+from journal import read_journal
+
+
+def build_router(workdir):
+    """Must run before ultron_core is imported elsewhere: it reads its configuration at import time."""
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.update({
+        "ULTRON_HAL_BACKEND": "fake",
+        "ULTRON_MEMORY_PATH": os.path.join(workdir, "memory.jsonl"),
+        "ULTRON_APP_DIRS": workdir,
+        "ULTRON_APP_INDEX": os.path.join(workdir, "app_index.json"),
+    })
+    from ultron_core import HardwareInterface, IntentRouter
+    # Only the built-in custom paths are indexed, which is what the corpus's open_app samples name
+    return IntentRouter(HardwareInterface())
+
+
+def journal_llm_ms(path):
+    """Median latency of recorded non-streamed LLM calls, i.e. what one intent round-trip costs in real use."""
+    samples = [r["ms"] for r in read_journal(path) if r.get("kind") == "llm" and not r.get("stream") and r.get("ms")]
+    return statistics.median(samples) if samples else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast-path router accuracy and LLM calls avoided.")
+    parser.add_argument("--corpus", default=os.path.join(BACKEND_DIR, "intent_corpus.json"))
+    parser.add_argument("--journal", default=None, help="take the LLM round-trip from this journal's recorded calls")
+    parser.add_argument("--llm-ms", type=float, default=600.0, help="LLM round-trip to credit per avoided call (without --journal)")
+    args = parser.parse_args()
+
+    with open(args.corpus, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    llm_ms, source = args.llm_ms, "--llm-ms"
+    if args.journal:
+        measured = journal_llm_ms(args.journal)
+        if measured is not None: llm_ms, source = measured, args.journal
+
+    with tempfile.TemporaryDirectory(prefix="ultron-router-") as workdir:
+        router = build_router(workdir)
+        report = router.evaluate(corpus)
+        wrong, missed = [], []
+        for sample in corpus:
+            intent = router.route(sample["text"])
+            got = intent["tool"] if intent else None
+            if got == sample["tool"]: continue
+            (missed if got is None else wrong).append({"text": sample["text"], "expected": sample["tool"], "routed": got})
+
+    # Every correctly routed command skips the LLM call it would otherwise have needed
+    avoided = router.hits - len(wrong)
+    commands = sum(1 for sample in corpus if sample["tool"])
+    result = {
+        **report,
+        "commands": commands,
+        "llm_calls_avoided": avoided,
+        "avoided_share": round(avoided / len(corpus), 3) if corpus else 0.0,
+        "wrong_routes": len(wrong),
+        "missed": len(missed),
+        "llm_ms": round(llm_ms, 1),
+        "llm_ms_source": source,
+        "latency_saved_s": round(avoided * (llm_ms / 1000 - report["avg_route_us"] / 1e6), 3),
+    }
+    print(json.dumps(result, indent=2))
+    for row in wrong: print(f"WRONG  {row}")
+    for row in missed: print(f"MISSED {row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Ultron Startup Benchmark
+Cold `import server` in a fresh interpreter with lazily loaded HAL drivers (now) and with the drivers
+imported up front the way ultron_core used to; plus repeated set_volume with and without the reused
+pycaw endpoint where the native drivers exist.
+
+    python bench/startup_bench.py [--runs 7] [--volume-calls 20]
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import importlib
+import statistics
+import subprocess
+from types import SimpleNamespace
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [BACKEND_DIR, BENCH_DIR]
+
+from benchmark import configure_environment
+
+# What ultron_core imported at module load before the HAL backends
+EAGER_DRIVERS = ["comtypes", "pycaw.pycaw", "screen_brightness_control", "pyperclip", "webbrowser"]
+
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+sys.path[:0] = {paths!r}
+for name in {preload!r}: __import__(name)
+drivers = time.perf_counter()
+import server
+done = time.perf_counter()
+print(json.dumps({{"drivers_ms": (drivers - start) * 1000, "import_ms": (done - start) * 1000}}))
+"""
+
+
+def available(names):
+    found = []
+    for name in names:
+        try:
+            importlib.import_module(name)
+            found.append(name)
+        except Exception:
+            pass
+    return found
+
+
+def cold_import(preload, runs, workdir):
+    """Medians over `runs` fresh interpreters: spawn-to-exit wall time, driver imports, and drivers + `import server`."""
+    code = CHILD.format(paths=[BACKEND_DIR], preload=preload)
+    walls, rows = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=workdir, check=True).stdout
+        walls.append((time.perf_counter() - start) * 1000)
+        rows.append(json.loads(out.strip().splitlines()[-1]))
+    return {"process_ms": round(statistics.median(walls), 1),
+            **{key: round(statistics.median(row[key] for row in rows), 1) for key in ("drivers_ms", "import_ms")}}
+
+
+def volume_calls(calls):
+    """Per-call set_volume cost: full COM setup/teardown each time (old) vs the cached endpoint (now)."""
+    import comtypes
+    from pycaw.pycaw import AudioUtilities
+    from hal_backends import WindowsVolume
+
+    def old_set_volume(level):
+        comtypes.CoInitialize()
+        try:
+            AudioUtilities.GetSpeakers().EndpointVolume.SetMasterVolumeLevelScalar(level / 100.0, None)
+        finally:
+            comtypes.CoUninitialize()
+
+    row = {}
+    for label, fn in (("per_call_com_ms", old_set_volume), ("cached_endpoint_ms", WindowsVolume().set_level)):
+        samples = []
+        for n in range(calls):
+            start = time.perf_counter()
+            fn(30 + n % 2)
+            samples.append((time.perf_counter() - start) * 1000)
+        row[label] = {"first": round(samples[0], 2), "median": round(statistics.median(samples), 2)}
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server cold-import time, lazy vs eager hardware drivers.")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--volume-calls", type=int, default=20)
+    args = parser.parse_args()
+
+    eager = available(EAGER_DRIVERS)
+    print(json.dumps({"eager_drivers_installed": eager, "missing": [n for n in EAGER_DRIVERS if n not in eager]}))
+    with tempfile.TemporaryDirectory(prefix="ultron-startup-") as workdir:
+        # Children inherit the environment; the server module itself is only ever imported there
+        configure_environment("http://127.0.0.1:9/v1", workdir, SimpleNamespace(status_interval=2, rpm=0, tpm=0))
+        cold_import([], 1, workdir)  # Warm the OS file cache and write .pyc files
+        for label, preload in (("eager_drivers", eager), ("lazy_drivers", [])):
+            print(json.dumps({"mode": label, **cold_import(preload, args.runs, workdir)}))
+
+    if {"comtypes", "pycaw.pycaw"} <= set(eager):
+        print(json.dumps({"volume": volume_calls(args.volume_calls)}))
+    else:
+        print(json.dumps({"volume": "skipped: comtypes/pycaw not installed"}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Ultron WebSocket Idle Overhead
+CPU used by server.app while N WebSocket clients sit connected and silent, for /ws and the old polling receive loop
+
+    python bench/ws_idle.py --clients 100,500 --seconds 20
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import argparse
+from types import SimpleNamespace
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(BENCH_DIR), BENCH_DIR]
+
+from websockets import connect as ws_connect
+from benchmark import ServerThread, free_port, configure_environment
+from llm_stub import StubConfig, create_stub
+
+
+def mount_legacy_endpoint(server):
+    """
+    /ws_legacy: the receive loop /ws used before it became a message router. Every
+    connection woke once a second to arm and cancel a wait_for timer. Same manager,
+    writer tasks and background services as /ws, so only the receive loop differs.
+    """
+    from fastapi import WebSocket, WebSocketDisconnect
+
+    @server.app.websocket("/ws_legacy")
+    async def legacy_endpoint(websocket: WebSocket):
+        await server.manager.connect(websocket)
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    continue
+        except WebSocketDisconnect:
+            pass
+        finally:
+            server.manager.disconnect(websocket)
+
+
+def loop_tasks(backend):
+    """Number of tasks alive on the server's loop."""
+    return asyncio.run_coroutine_threadsafe(_count_tasks(), backend.loop).result(5)
+
+
+async def _count_tasks():
+    return len(asyncio.all_tasks())
+
+
+async def measure(url, clients, seconds, backend):
+    # Client-side keepalive off: only the server's own idle work is measured
+    sockets = [await ws_connect(url, ping_interval=None) for _ in range(clients)]
+    try:
+        await asyncio.sleep(1.0)  # Let connection setup settle
+        tasks = loop_tasks(backend)
+        start_cpu, start = time.process_time(), time.perf_counter()
+        await asyncio.sleep(seconds)
+        cpu, wall = time.process_time() - start_cpu, time.perf_counter() - start
+    finally:
+        for ws in sockets: await ws.close()
+    return {"cpu_percent": round(cpu / wall * 100, 2), "cpu_ms_per_client_s": round(cpu / wall / max(1, clients) * 1000, 4), "loop_tasks": tasks}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Idle CPU of connected-but-silent WebSocket clients.")
+    parser.add_argument("--clients", default="100,500", help="comma-separated client counts")
+    parser.add_argument("--seconds", type=float, default=20.0, help="measurement window per run")
+    args = parser.parse_args()
+
+    stub = ServerThread(create_stub(StubConfig()), free_port())
+    stub.start()
+    stub.wait_started()
+    with tempfile.TemporaryDirectory(prefix="ultron-idle-") as workdir:
+        configure_environment(f"http://127.0.0.1:{stub.port}/v1", workdir, SimpleNamespace(status_interval=2, rpm=0, tpm=0))
+        import server
+        mount_legacy_endpoint(server)
+        backend = ServerThread(server.app, free_port())
+        backend.start()
+        backend.wait_started()
+        try:
+            base = f"ws://127.0.0.1:{backend.port}"
+            baseline = asyncio.run(measure(f"{base}/ws", 0, min(5.0, args.seconds), backend))
+            print(json.dumps({"endpoint": "none", "clients": 0, **baseline}))
+            for clients in (int(c) for c in args.clients.split(",")):
+                for endpoint in ("/ws_legacy", "/ws"):
+                    row = asyncio.run(measure(base + endpoint, clients, args.seconds, backend))
+                    print(json.dumps({"endpoint": endpoint, "clients": clients, **row}))
+        finally:
+            backend.stop()
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Ultron Document Analyzer
+Chunked map-reduce summarization for large clipboard pastes, with per-chunk caching
+"""
+import os
+import asyncio
+import hashlib
+import logging
+from history import count_tokens
+
+CHUNK_TOKENS = int(os.getenv("ULTRON_DOC_CHUNK_TOKENS", "2000"))
+DOC_CONCURRENCY = int(os.getenv("ULTRON_DOC_CONCURRENCY", "4"))
+# Beyond this many chunks, evenly spaced ones (always including the first and last) are analyzed
+DOC_MAX_CHUNKS = int(os.getenv("ULTRON_DOC_MAX_CHUNKS", "32"))
+# Share of one minute's LLM token/request limits a single analysis may spend, so it runs out of the
+# scheduler's burst instead of queueing for minutes behind the refill (and past the call deadlines)
+DOC_RATE_SHARE = float(os.getenv("ULTRON_DOC_RATE_SHARE", "0.5"))
+MIN_CHUNK_TOKENS = 400  # Chunks are shrunk to spread a tight budget over more sections, but not below this
+CHARS_PER_TOKEN = 3    # Conservative (code and logs run ~3-4 chars/token), so chunks stay under budget
+NOTE_TOKENS = 120      # max_tokens for each chunk note
+ANSWER_TOKENS = 200    # max_tokens for the final answer, as before
+
+MAP_PROMPT = """Summarize this section of a larger text the user copied. Keep errors, names, numbers and key facts; drop filler. Max 80 words.
+
+SECTION:
+{chunk}"""
+COMBINE_PROMPT = """Merge these consecutive section notes from one copied text into a single set of notes. Keep errors, names, numbers and key facts. Max 120 words.
+
+NOTES:
+{notes}"""
+REDUCE_PROMPT = """User just copied a large text ({sections}). These are notes on its sections, in order. Analyze/Summarize it concisely as Ultron:
+
+{notes}"""
+
+
+PROMPT_TOKENS = max(count_tokens(MAP_PROMPT.format(chunk="")), count_tokens(REDUCE_PROMPT.format(sections="", notes="")))
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS):
+    """Yields consecutive pieces of at most ~max_tokens, split on line boundaries (long lines are split too)."""
+    # Bounded by characters: tokenizing every line of a multi-megabyte paste would dominate the run
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    buf, size = [], 0
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if buf:
+                yield "".join(buf)
+                buf, size = [], 0
+            yield line[:max_chars]
+            line = line[max_chars:]
+        if size + len(line) > max_chars and buf:
+            yield "".join(buf)
+            buf, size = [], 0
+        buf.append(line)
+        size += len(line)
+    if buf:
+        yield "".join(buf)
+
+
+def select_chunks(chunks, limit=DOC_MAX_CHUNKS):
+    """Evenly spaced subset (first and last always kept) when there are too many chunks."""
+    if len(chunks) <= limit: return list(range(len(chunks)))
+    step = (len(chunks) - 1) / (limit - 1)
+    return sorted({round(i * step) for i in range(limit)})
+
+
+def content_key(kind, text):
+    return f"doc:{kind}:" + hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class DocumentAnalyzer:
+    """
+    Small texts get the single-prompt analysis. Larger ones are chunked, each
+    chunk is noted concurrently (bounded by `concurrency`), and the notes are
+    reduced to one answer, merging them in batches first if they don't fit.
+
+    Chunk and merge notes are cached by content hash in `cache`, so re-copying
+    the same text, or text that shares whole sections with an earlier paste,
+    costs no LLM calls for those sections.
+
+    `tpm`/`rpm` are the LLM scheduler's per-minute limits (0 = unlimited). When
+    the default chunking would cost more than DOC_RATE_SHARE of them, chunks
+    are made smaller and fewer are sampled so the whole run fits.
+
+    `complete(messages=..., max_tokens=..., cacheable=...)` is an async completion callable.
+    """
+    def __init__(self, complete, cache=None, chunk_tokens=CHUNK_TOKENS, concurrency=DOC_CONCURRENCY, max_chunks=DOC_MAX_CHUNKS, tpm=0, rpm=0):
+        self.complete = complete
+        self.cache = cache
+        self.chunk_tokens = chunk_tokens
+        self.concurrency = concurrency
+        self.max_chunks = max_chunks
+        self.tpm = tpm
+        self.rpm = rpm
+        self.last_run = {}
+
+    def plan(self, chars):
+        """(chunk_tokens, max_chunks) for a text of `chars` characters, within DOC_RATE_SHARE of the rate limits."""
+        chunk_tokens, max_chunks = self.chunk_tokens, self.max_chunks
+        # One request stays free for the reduce
+        if self.rpm: max_chunks = max(1, min(max_chunks, int(self.rpm * DOC_RATE_SHARE) - 1))
+        if not self.tpm: return chunk_tokens, max_chunks
+        # A map call is charged its chunk, the prompt and the note allowance; the note is paid again in the reduce
+        per_chunk = PROMPT_TOKENS + 2 * NOTE_TOKENS
+        budget = self.tpm * DOC_RATE_SHARE - PROMPT_TOKENS - ANSWER_TOKENS
+        needed = min(max_chunks, -(-chars // (chunk_tokens * CHARS_PER_TOKEN)))
+        if needed * (chunk_tokens + per_chunk) <= budget: return chunk_tokens, max_chunks
+        max_chunks = max(1, min(max_chunks, int(budget // (MIN_CHUNK_TOKENS + per_chunk))))
+        return max(MIN_CHUNK_TOKENS, min(chunk_tokens, int(budget // max_chunks - per_chunk))), max_chunks
+
+    async def analyze(self, text, prompt):
+        """`prompt` is the single-shot prompt builder used when the text fits in one chunk."""
+        if len(text) <= self.chunk_tokens * CHARS_PER_TOKEN:
+            self.last_run = {"chunks": 1, "analyzed": 1, "cached": 0}
+            reply = await self.complete(cacheable=True, messages=[{"role": "user", "content": prompt(text)}], max_tokens=ANSWER_TOKENS)
+            return reply.strip()
+
+        chunk_tokens, max_chunks = self.plan(len(text))
+        chunks = list(chunk_text(text, chunk_tokens))
+        picked = select_chunks(chunks, max_chunks)
+        stats = {"chunks": len(chunks), "analyzed": len(picked), "cached": 0, "chunk_tokens": chunk_tokens}
+        slots = asyncio.Semaphore(self.concurrency)
+        notes = await asyncio.gather(*(self._note("map", MAP_PROMPT.format(chunk=chunks[i]), chunks[i], slots, stats) for i in picked))
+        notes = await self._combine(list(notes), slots, stats)
+
+        sections = f"{len(chunks)} sections" if len(picked) == len(chunks) else f"{len(picked)} of {len(chunks)} sections sampled"
+        body = "\n".join(f"[{n + 1}] {note}" for n, note in enumerate(notes))
+        reply = await self.complete(cacheable=True, messages=[{"role": "user", "content": REDUCE_PROMPT.format(sections=sections, notes=body)}], max_tokens=ANSWER_TOKENS)
+        self.last_run = stats
+        logging.info(f"Document analyzed: {stats}")
+        return reply.strip()
+
+    async def _combine(self, notes, slots, stats):
+        """Merges adjacent notes in token-bounded batches until they fit one prompt."""
+        while len(notes) > 1 and sum(count_tokens(n) for n in notes) > self.chunk_tokens:
+            batches, batch, size = [], [], 0
+            for note in notes:
+                tokens = count_tokens(note)
+                if batch and size + tokens > self.chunk_tokens:
+                    batches.append(batch)
+                    batch, size = [], 0
+                batch.append(note)
+                size += tokens
+            batches.append(batch)
+            if len(batches) == len(notes): break  # Every note is already chunk-sized; merging can't shrink further
+            joined = ["\n".join(b) for b in batches]
+            notes = list(await asyncio.gather(*(self._note("merge", COMBINE_PROMPT.format(notes=j), j, slots, stats) for j in joined)))
+        return notes
+
+    async def _note(self, kind, prompt, content, slots, stats):
+        key = content_key(kind, content)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                stats["cached"] += 1
+                return cached
+        async with slots:
+            note = (await self.complete(messages=[{"role": "user", "content": prompt}], max_tokens=NOTE_TOKENS)).strip()
+        if self.cache is not None and note: self.cache.put(key, note)
+        return note
@@ -0,0 +1,131 @@
+"""
+Ultron File Organizer
+Streaming scan, dry-run planning and parallel, resumable moves for the Downloads cleanup
+"""
+import os
+import json
+import errno
+import shutil
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEST_RULES = {
+    "Images": [".jpg", ".jpeg", ".png", ".gif", ".webp"],
+    "Documents": [".pdf", ".docx", ".txt", ".xlsx"],
+    "Installers": [".exe", ".msi"],
+    "Archives": [".zip", ".rar", ".7z"],
+    "Audio": [".mp3", ".wav"],
+    "Video": [".mp4", ".mkv"]
+}
+# Flattened once: extension -> destination folder
+EXT_MAP = {ext: folder for folder, exts in DEST_RULES.items() for ext in exts}
+
+ORGANIZE_WORKERS = int(os.getenv("ULTRON_ORGANIZE_WORKERS", "8"))
+BATCH_SIZE = 256
+STATE_FILE = ".ultron_organize.json"
+
+
+def default_downloads_dir():
+    return os.getenv("ULTRON_DOWNLOADS_DIR") or os.path.join(os.path.expanduser("~"), "Downloads")
+
+
+class FileOrganizer:
+    """
+    Sorts the top level of `root` into per-type folders.
+
+    run() persists the pending plan to STATE_FILE before moving anything and
+    deletes it when done; an interrupted run resumes from that plan, skipping
+    entries that were already moved.
+    """
+    def __init__(self, root=None, ext_map=EXT_MAP, workers=ORGANIZE_WORKERS):
+        self.root = root or default_downloads_dir()
+        self.ext_map = ext_map
+        self.workers = workers
+        self.state_path = os.path.join(self.root, STATE_FILE)
+
+    def scan(self):
+        """Yields (src, folder) lazily; nothing is materialized up front."""
+        with os.scandir(self.root) as it:
+            for entry in it:
+                if entry.name == STATE_FILE: continue
+                folder = self.ext_map.get(os.path.splitext(entry.name)[1].lower())
+                if folder and entry.is_file(follow_symlinks=False):
+                    yield entry.path, folder
+
+    def plan(self):
+        """Dry-run plan: [(src, dst)] plus per-folder counts."""
+        moves, by_folder = [], {}
+        for src, folder in self.scan():
+            moves.append((src, os.path.join(self.root, folder, os.path.basename(src))))
+            by_folder[folder] = by_folder.get(folder, 0) + 1
+        return moves, by_folder
+
+    def run(self, dry_run=False, progress=None):
+        """Executes (or just reports) the plan. progress(done, total) is called after each batch, from worker threads."""
+        resumed = self._load_state()
+        if resumed is not None:
+            moves, by_folder = resumed, {}
+            for _, dst in moves:
+                folder = os.path.basename(os.path.dirname(dst))
+                by_folder[folder] = by_folder.get(folder, 0) + 1
+        else:
+            moves, by_folder = self.plan()
+        summary = {"planned": len(moves), "moved": 0, "skipped": 0, "by_folder": by_folder, "dry_run": dry_run, "resumed": resumed is not None}
+        if dry_run or not moves: return summary
+
+        self._save_state(moves)
+        for folder in by_folder:
+            os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+
+        done = 0
+        batches = [moves[i:i + BATCH_SIZE] for i in range(0, len(moves), BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for future in as_completed([pool.submit(self._move_batch, b) for b in batches]):
+                moved, skipped = future.result()
+                summary["moved"] += moved
+                summary["skipped"] += skipped
+                done += moved + skipped
+                if progress: progress(done, len(moves))
+        self._clear_state()
+        return summary
+
+    def _move_batch(self, batch):
+        moved = skipped = 0
+        for src, dst in batch:
+            try:
+                if os.path.exists(dst):
+                    # Never overwrite; also covers entries already moved before a resume
+                    skipped += 1
+                    continue
+                try:
+                    os.rename(src, dst)  # Same volume: metadata-only
+                except OSError as e:
+                    if e.errno != errno.EXDEV: raise
+                    shutil.move(src, dst)
+                moved += 1
+            except OSError:
+                skipped += 1
+        return moved, skipped
+
+    # --- RESUME STATE ---
+    def _load_state(self):
+        if not os.path.exists(self.state_path): return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                moves = [tuple(m) for m in json.load(f)["moves"]]
+        except (OSError, ValueError, KeyError):
+            return None
+        logging.info(f"Resuming interrupted cleanup: {len(moves)} planned moves.")
+        return [m for m in moves if os.path.exists(m[0])]
+
+    def _save_state(self, moves):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"moves": moves}, f)
+        os.replace(tmp, self.state_path)
+
+    def _clear_state(self):
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
@@ -0,0 +1,187 @@
+"""
+Ultron HAL Backends
+Pluggable, lazily imported drivers for volume, brightness, clipboard, launcher, processes and notifications
+"""
+import os
+import sys
+import logging
+import threading
+
+
+# --- NATIVE BACKENDS (Windows drivers imported on first use) ---
+class WindowsVolume:
+    """pycaw endpoint, initialized once per thread and reused (COM objects are apartment-bound)."""
+    def __init__(self):
+        self._local = threading.local()
+
+    def _endpoint(self):
+        endpoint = getattr(self._local, "endpoint", None)
+        if endpoint is None:
+            import comtypes
+            from pycaw.pycaw import AudioUtilities
+            comtypes.CoInitialize()
+            devices = AudioUtilities.GetSpeakers()
+            if not devices: return None
+            endpoint = self._local.endpoint = devices.EndpointVolume
+        return endpoint
+
+    def set_level(self, level):
+        endpoint = self._endpoint()
+        if endpoint is None: return False
+        try:
+            endpoint.SetMasterVolumeLevelScalar(max(0.0, min(1.0, level / 100.0)), None)
+        except Exception:
+            # Device changed (headphones unplugged etc.): drop the handle so the next call rebinds
+            self._local.endpoint = None
+            raise
+        return True
+
+
+class SbcBrightness:
+    def set_level(self, level):
+        import screen_brightness_control as sbc
+        sbc.set_brightness(max(0, min(100, int(level))))
+        return True
+
+
+class PyperclipClipboard:
+    def paste(self):
+        import pyperclip
+        return pyperclip.paste()
+
+
+class DesktopLauncher:
+    def open_path(self, path):
+        os.startfile(path)
+        return True
+
+    def open_url(self, url):
+        import webbrowser
+        return webbrowser.open(url)
+
+
+def process_controller():
+    from process_control import ProcessController
+    return ProcessController()
+
+
+class PlyerNotifier:
+    """Desktop toast via plyer (Windows toast, macOS, libnotify). May block; callers keep it off the event loop."""
+    def notify(self, title, message):
+        from plyer import notification
+        notification.notify(title=title, message=message, app_name="Ultron AI", timeout=5)
+        return True
+
+
+# --- FAKE BACKENDS (pure Python; headless Linux, tests, benchmarks) ---
+class FakeVolume:
+    def __init__(self):
+        self.level = 50
+        self.calls = 0
+
+    def set_level(self, level):
+        self.calls += 1
+        self.level = max(0, min(100, int(level)))
+        return True
+
+
+class FakeBrightness(FakeVolume):
+    pass
+
+
+class FakeClipboard:
+    def __init__(self, text=""):
+        self.text = text
+
+    def paste(self):
+        return self.text
+
+
+class FakeLauncher:
+    def __init__(self):
+        self.opened = []
+
+    def open_path(self, path):
+        self.opened.append(path)
+        return True
+
+    def open_url(self, url):
+        self.opened.append(url)
+        return True
+
+
+class FakeProcesses:
+    """Same surface as process_control.ProcessController over an in-memory pid -> name table."""
+    def __init__(self):
+        self.table = {}
+        self.terminated = []
+        self.session_active = False
+
+    def terminate_matching(self, blocklist=None):
+        from process_control import FOCUS_BLOCKLIST
+        blocklist = blocklist or FOCUS_BLOCKLIST
+        ended = []
+        for pid, name in list(self.table.items()):
+            if name.lower() in blocklist:
+                del self.table[pid]
+                ended.append(name)
+        self.terminated.extend(ended)
+        return ended, []
+
+    def start_session(self, blocklist=None, interval=None):
+        self.session_active = True
+
+    def stop_session(self):
+        was_active, self.session_active = self.session_active, False
+        return was_active
+
+    def stats(self):
+        return {"tracked": len(self.table), "terminated": len(self.terminated), "session": self.session_active}
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, title, message):
+        self.sent.append((title, message))
+        return True
+
+
+BACKENDS = {
+    "volume": {"native": WindowsVolume, "fake": FakeVolume},
+    "brightness": {"native": SbcBrightness, "fake": FakeBrightness},
+    "clipboard": {"native": PyperclipClipboard, "fake": FakeClipboard},
+    "launcher": {"native": DesktopLauncher, "fake": FakeLauncher},
+    "processes": {"native": process_controller, "fake": FakeProcesses},
+    "notifier": {"native": PlyerNotifier, "fake": FakeNotifier},
+}
+PORTABLE = {"processes", "notifier"}  # psutil and plyer work everywhere, so "auto" keeps them native off Windows too
+
+
+class Backends:
+    """
+    Resolves one driver per kind. ULTRON_HAL_<KIND> overrides ULTRON_HAL_BACKEND
+    ("auto", "native" or "fake"). "auto" means native on Windows, fake elsewhere.
+    Drivers are constructed on first access.
+    """
+    def __init__(self, mode=None, **overrides):
+        self.mode = (mode or os.getenv("ULTRON_HAL_BACKEND", "auto")).lower()
+        self._instances = dict(overrides)
+
+    def choice(self, kind):
+        mode = os.getenv(f"ULTRON_HAL_{kind.upper()}", self.mode).lower()
+        if mode == "auto":
+            mode = "native" if sys.platform == "win32" or kind in PORTABLE else "fake"
+        return mode
+
+    def get(self, kind):
+        backend = self._instances.get(kind)
+        if backend is None:
+            backend = self._instances[kind] = BACKENDS[kind][self.choice(kind)]()
+            logging.info(f"HAL {kind} backend: {type(backend).__name__}")
+        return backend
+
+    def __getattr__(self, kind):
+        if kind in BACKENDS: return self.get(kind)
+        raise AttributeError(kind)
@@ -0,0 +1,101 @@
+"""
+Ultron Conversation History
+Token-budgeted short-term memory with rolling summarization
+"""
+import os
+import re
+import logging
+from collections import deque
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("ULTRON_HISTORY_TOKENS", "3000"))
+# Evicted turns waiting for a summary; past this the oldest are dropped unsummarized (summaries can be shed under load)
+PENDING_TOKEN_CAP = int(os.getenv("ULTRON_HISTORY_PENDING_TOKENS", "4000"))
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """Local token count: tiktoken when installed, otherwise a word/punctuation estimate."""
+    if not text: return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(_PIECE_RE.findall(text)) * 4 // 3 + 1
+
+
+class ConversationHistory:
+    """
+    Keeps the newest turns within a token budget. Turns pushed out of the window
+    are queued and folded into a running summary by compact(), which callers
+    schedule off the request path. The queue is capped at `pending_cap` tokens,
+    so failed or shed summaries can't grow the next summary prompt without bound.
+    """
+    def __init__(self, budget=HISTORY_TOKEN_BUDGET, summarize=None, pending_cap=PENDING_TOKEN_CAP):
+        self.budget = budget
+        self.pending_cap = pending_cap
+        self.summarize = summarize  # async (previous_summary, turns) -> new summary
+        self.summary = ""
+        self.tokens = 0
+        self._turns = deque()  # (user_text, reply_text, tokens)
+        self._pending = []
+        self.summarizing = False
+        self.dropped = 0  # Turns discarded from the pending queue without being summarized
+
+    def __len__(self):
+        return 2 * len(self._turns)
+
+    def add_turn(self, user_text, reply_text):
+        cost = count_tokens(user_text) + count_tokens(reply_text)
+        self._turns.append((user_text, reply_text, cost))
+        self.tokens += cost
+        # Always keep the latest turn, even if it alone exceeds the budget
+        while self.tokens > self.budget and len(self._turns) > 1:
+            evicted = self._turns.popleft()
+            self.tokens -= evicted[2]
+            self._pending.append(evicted)
+        self._trim_pending()
+
+    def messages(self):
+        msgs = []
+        if self.summary:
+            msgs.append({"role": "system", "content": f"EARLIER CONVERSATION (summary): {self.summary}"})
+        for user_text, reply_text, _ in self._turns:
+            msgs.append({"role": "user", "content": user_text})
+            msgs.append({"role": "assistant", "content": reply_text})
+        return msgs
+
+    @property
+    def needs_summary(self):
+        return bool(self._pending) and self.summarize is not None and not self.summarizing
+
+    async def compact(self):
+        """Folds evicted turns into the summary. Safe to call at any time; no-op if nothing is pending."""
+        if not self.needs_summary: return
+        self.summarizing = True
+        batch, self._pending = self._pending, []
+        try:
+            turns = [(u, r) for u, r, _ in batch]
+            self.summary = await self.summarize(self.summary, turns)
+        except Exception as e:
+            logging.warning(f"History summarization failed: {e}")
+            self._pending = batch + self._pending
+            self._trim_pending()
+        finally:
+            self.summarizing = False
+
+    def _trim_pending(self):
+        """Drops the oldest pending turns past the cap; a lone turn that is still too big is truncated."""
+        total = sum(cost for _, _, cost in self._pending)
+        while total > self.pending_cap and len(self._pending) > 1:
+            total -= self._pending.pop(0)[2]
+            self.dropped += 1
+        if total > self.pending_cap:
+            user_text, reply_text, cost = self._pending[0]
+            keep = self.pending_cap / cost
+            user_text, reply_text = user_text[:int(len(user_text) * keep)], reply_text[:int(len(reply_text) * keep)]
+            self._pending[0] = (user_text, reply_text, count_tokens(user_text) + count_tokens(reply_text))
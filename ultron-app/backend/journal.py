@@ -0,0 +1,170 @@
+"""
+Ultron Journal
+Append-only JSONL record of what the backend did (requests, intents, tool and LLM calls, mood changes), written off the request path
+"""
+import os
+import json
+import time
+import logging
+import itertools
+import threading
+import contextvars
+from collections import deque
+
+JOURNAL_PATH = os.getenv("ULTRON_JOURNAL_PATH", "ultron_journal.jsonl")  # "" disables the journal
+JOURNAL_ROTATE_BYTES = int(float(os.getenv("ULTRON_JOURNAL_ROTATE_MB", "16")) * 1024 * 1024)
+JOURNAL_ROTATE_HOURS = float(os.getenv("ULTRON_JOURNAL_ROTATE_HOURS", "24"))
+JOURNAL_KEEP = int(os.getenv("ULTRON_JOURNAL_KEEP", "5"))  # Rotated files kept besides the live one
+JOURNAL_QUEUE = 10000      # Records buffered for the writer; the oldest are dropped beyond this
+FLUSH_INTERVAL = 1.0       # Seconds the writer gathers records after the first before a write
+
+_request = contextvars.ContextVar("ultron_journal_request", default=None)
+
+
+def journal_files(path):
+    """The live journal and its rotations, oldest first."""
+    rotated = [f"{path}.{n}" for n in range(JOURNAL_KEEP, 0, -1)]
+    return [p for p in rotated + [path] if os.path.exists(p)]
+
+
+def read_journal(path):
+    """Yields records from the journal at `path` and its rotations, in write order. Torn lines are skipped."""
+    for name in journal_files(path):
+        with open(name, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+class _Bind:
+    __slots__ = ("id", "token")
+
+    def __init__(self, request_id):
+        self.id = request_id
+
+    def __enter__(self):
+        self.token = _request.set(self.id)
+        return self.id
+
+    def __exit__(self, *exc):
+        _request.reset(self.token)
+        return False
+
+
+class Journal:
+    """
+    record() stamps a dict and appends it to an in-memory deque; a daemon
+    thread sleeps until there is something to write, gathers for FLUSH_INTERVAL,
+    then serializes, writes and flushes the batch, so the request path never
+    touches the disk and an idle backend never wakes the writer. Records made inside `with journal.bind():`
+    carry that request's id ("req"), which ties LLM and tool records to their /chat turn.
+
+    The file rotates to `<path>.1` ... `<path>.<keep>` by size or age.
+    """
+    def __init__(self, path=JOURNAL_PATH, rotate_bytes=JOURNAL_ROTATE_BYTES, rotate_hours=JOURNAL_ROTATE_HOURS,
+                 keep=JOURNAL_KEEP, queue_size=JOURNAL_QUEUE):
+        self.path = path
+        self.enabled = bool(path)
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_hours * 3600
+        self.keep = keep
+        self._pending = deque(maxlen=queue_size)
+        self._ids = itertools.count(1)
+        self._prefix = f"{os.getpid():x}-"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._opened_at = 0.0
+        self.counts = {"records": 0, "dropped": 0, "written": 0, "rotations": 0, "errors": 0}
+
+    def bind(self, request_id=None):
+        """`with journal.bind() as req:` tags records in the block with a fresh (or given) request id."""
+        return _Bind(request_id or f"{self._prefix}{next(self._ids)}")
+
+    def record(self, kind, **fields):
+        """Non-blocking; safe from any thread."""
+        if not self.enabled: return
+        fields["t"] = round(time.time(), 4)
+        fields["kind"] = kind
+        request_id = _request.get()
+        if request_id is not None: fields["req"] = request_id
+        if len(self._pending) == self._pending.maxlen: self.counts["dropped"] += 1
+        self._pending.append(fields)
+        self.counts["records"] += 1
+        if not self._wake.is_set(): self._wake.set()
+        if self._thread is None: self._start()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is not None: return
+            self._thread = threading.Thread(target=self._run, name="ultron-journal", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Writes whatever is still buffered and stops the writer."""
+        if self._thread is None: return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._stop.clear()
+
+    # --- WRITER THREAD ---
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._stop.wait(FLUSH_INTERVAL)  # Let a batch gather; close() cuts it short
+            self._wake.clear()
+            self._flush()
+        self._flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _flush(self):
+        lines = []
+        while self._pending:
+            try:
+                entry = self._pending.popleft()
+            except IndexError:
+                break
+            lines.append(json.dumps(entry, separators=(",", ":"), default=str))
+        if not lines: return
+        try:
+            self._rotate_if_due()
+            if self._file is None: self._open()
+            data = "\n".join(lines) + "\n"
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data.encode("utf-8"))
+            self.counts["written"] += len(lines)
+        except OSError as e:
+            self.counts["errors"] += 1
+            logging.error(f"Journal write failed: {e}")
+
+    def _open(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+        self._opened_at = time.time()
+
+    def _rotate_if_due(self):
+        if self._file is None or not self._size: return
+        if self._size < self.rotate_bytes and time.time() - self._opened_at < self.rotate_seconds: return
+        self._file.close()
+        self._file = None
+        if os.path.exists(f"{self.path}.{self.keep}"): os.remove(f"{self.path}.{self.keep}")
+        for n in range(self.keep - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"): os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self.counts["rotations"] += 1
+
+    def stats(self):
+        return {**self.counts, "enabled": self.enabled, "pending": len(self._pending)}
+
+
+journal = Journal()
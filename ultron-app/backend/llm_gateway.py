@@ -0,0 +1,293 @@
+"""
+Ultron LLM Gateway
+One pooled client for every completion: deadlines, jittered retries, hedging and model fallback
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+import httpx
+import openai
+from openai import AsyncOpenAI
+from metrics import metrics
+from journal import journal
+from history import count_tokens
+from response_cache import make_key
+from llm_scheduler import LLMScheduler, LLMBusy, INTERACTIVE, PRIORITY_NAMES
+
+LLM_RETRIES = int(os.getenv("ULTRON_LLM_RETRIES", "2"))
+LLM_BACKOFF = float(os.getenv("ULTRON_LLM_BACKOFF", "0.25"))      # Base of the exponential backoff, seconds
+LLM_BACKOFF_CAP = 4.0
+LLM_HEDGE_PERCENTILE = float(os.getenv("ULTRON_LLM_HEDGE", "0"))  # e.g. 95: hedge once a call outlives p95; 0 = off
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# 429, 5xx, dropped connections and upstream timeouts are worth another try; 4xx request errors are not
+RETRYABLE = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError, asyncio.TimeoutError)
+
+
+class LLMError(Exception):
+    """Raised once a call has exhausted its retries, deadline and fallback."""
+
+
+def describe(error):
+    return str(error) or type(error).__name__
+
+
+def backoff_delay(attempt, error=None, base=LLM_BACKOFF, cap=LLM_BACKOFF_CAP, rng=random):
+    """Full-jitter exponential backoff, never shorter than a server-sent Retry-After."""
+    delay = rng.uniform(0, min(cap, base * (2 ** attempt)))
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get("retry-after", 0)))
+        except (TypeError, ValueError):
+            pass
+    return delay
+
+
+def prompt_tokens(messages):
+    return sum(count_tokens(str(m.get("content", ""))) for m in messages)
+
+
+def usage_counts(usage):
+    """(prompt, completion) tokens from a usage object, or the plain dict older SDKs leave on stream chunks."""
+    if isinstance(usage, dict): return usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0
+    return getattr(usage, "prompt_tokens", None) or 0, getattr(usage, "completion_tokens", None) or 0
+
+
+def estimate_tokens(messages, kwargs):
+    """Worst-case TPM cost charged up front: the prompt plus the full completion allowance."""
+    return prompt_tokens(messages) + int(kwargs.get("max_tokens") or 1024)
+
+
+class LLMGateway:
+    """
+    Wraps the async OpenAI client over a tuned, shared httpx pool
+    (the SDK's own retries are disabled so this layer owns the policy).
+
+    Every call gets a deadline covering all of its attempts. Retryable errors
+    back off with jitter inside that budget. With hedging on, a call still
+    running after the recent latency percentile gets a duplicate request, and
+    the first answer wins. `fallback=True` retries once on the fallback model
+    when the primary gives up.
+
+    Calls are admitted by an LLMScheduler (priority classes plus RPM/TPM
+    buckets), and identical in-flight calls share one upstream request.
+    """
+    def __init__(self, api_key, base_url, model, fallback_model=None, timeout=30.0, max_concurrency=8,
+                 retries=LLM_RETRIES, hedge_percentile=LLM_HEDGE_PERCENTILE, scheduler=None):
+        self.model = model
+        self.fallback_model = fallback_model
+        self.timeout = timeout
+        self.retries = retries
+        self.hedge_percentile = hedge_percentile
+        limits = httpx.Limits(max_connections=max_concurrency * 2, max_keepalive_connections=max_concurrency, keepalive_expiry=60)
+        http_timeout = httpx.Timeout(timeout, connect=min(5.0, timeout))
+        self.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                                        http_client=httpx.AsyncClient(limits=limits, timeout=http_timeout))
+        # Caps in-flight requests and orders them by priority within the provider's rate limits
+        self.scheduler = scheduler or LLMScheduler(max_concurrency)
+        self._inflight = {}  # request key -> shared task
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counts = {"calls": 0, "coalesced": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "fallbacks": 0, "failures": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0}
+
+    # --- CALLS ---
+    async def acomplete(self, messages, model=None, deadline=None, fallback=False, priority=INTERACTIVE, with_model=False, **kwargs):
+        """
+        Returns the completion text, or (text, model that answered) with `with_model`.
+        Joins an identical call already in flight instead of sending another. Raises LLMError.
+        """
+        key = make_key(model or self.model, messages, fallback=fallback, **kwargs)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._acomplete(messages, model, deadline, fallback, priority, kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.counts["coalesced"] += 1
+        # Shielded: one caller giving up must not cancel the request for the others
+        content, answered_by = await asyncio.shield(task)
+        return (content, answered_by) if with_model else content
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task: del self._inflight[key]
+        if not task.cancelled(): task.exception()  # Retrieved here in case every caller went away
+
+    async def _acomplete(self, messages, model, deadline, fallback, priority, kwargs):
+        self.counts["calls"] += 1
+        tokens = estimate_tokens(messages, kwargs)
+        model = model or self.model
+        try:
+            return await self._retry_async(model, messages, deadline or self.timeout, kwargs, priority, tokens), model
+        except LLMBusy as e:
+            raise LLMError(str(e)) from e
+        except LLMError as e:
+            if not (fallback and self.fallback_model): raise self._failed(e)
+            logging.warning(f"LLM falling back to {self.fallback_model}: {e}")
+            self.counts["fallbacks"] += 1
+            try:
+                content = await self._retry_async(self.fallback_model, messages, deadline or self.timeout, kwargs, priority, tokens, retries=0)
+                return content, self.fallback_model
+            except LLMError as e:
+                raise self._failed(e)
+
+    async def _retry_async(self, model, messages, budget, kwargs, priority, tokens, retries=None):
+        expires = time.monotonic() + budget
+        retries = self.retries if retries is None else retries
+        attempt, error = 0, "deadline exceeded"
+        for attempt in range(retries + 1):
+            remaining = expires - time.monotonic()
+            if remaining <= 0: break
+            try:
+                # The deadline covers time spent queued in the scheduler as well
+                return await asyncio.wait_for(self._hedged(model, messages, kwargs, priority, tokens), timeout=remaining)
+            except RETRYABLE as e:
+                error = e
+            except openai.APIError as e:
+                raise LLMError(f"{model}: {e}") from e
+            delay = backoff_delay(attempt, error)
+            if attempt == retries or time.monotonic() + delay >= expires: break
+            self.counts["retries"] += 1
+            await asyncio.sleep(delay)
+        raise LLMError(f"{model}: gave up after {attempt + 1} attempt(s): {describe(error)}")
+
+    async def _hedged(self, model, messages, kwargs, priority, tokens):
+        hedge_after = self.hedge_delay()
+        if hedge_after is None:
+            return await self._attempt(model, messages, kwargs, priority, tokens)
+        primary = asyncio.ensure_future(self._attempt(model, messages, kwargs, priority, tokens))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            # Only hedge with spare capacity; a saturated gateway would just queue the duplicate
+            if not done and not self.scheduler.saturated():
+                self.counts["hedges"] += 1
+                pending.add(asyncio.ensure_future(self._attempt(model, messages, kwargs, priority, tokens)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary: self.counts["hedge_wins"] += 1
+                        return task.result()
+            raise primary.exception()
+        finally:
+            for task in pending: task.cancel()
+
+    async def _attempt(self, model, messages, kwargs, priority, tokens):
+        with metrics.span("llm_queue"):
+            await self.scheduler.acquire(priority, tokens)
+        used = None
+        try:
+            start = time.perf_counter()
+            with metrics.span("llm", model=model):
+                res = await self.async_client.chat.completions.create(model=model, messages=messages, **kwargs)
+            used = self._record(res, time.perf_counter() - start, model, priority)
+            return res.choices[0].message.content
+        finally:
+            self.scheduler.release(tokens, used)
+
+    async def astream(self, messages, model=None, deadline=None, **kwargs):
+        """
+        Yields content deltas. Opening the stream is retried like any call;
+        once tokens have flowed a failure propagates (as LLMError), since a
+        retry would repeat text the caller already showed.
+        """
+        model = model or self.model
+        deadline = deadline or self.timeout
+        tokens = estimate_tokens(messages, kwargs)
+        self.counts["calls"] += 1
+        with metrics.span("llm_queue"):
+            try:
+                await asyncio.wait_for(self.scheduler.acquire(INTERACTIVE, tokens), timeout=deadline)
+            except asyncio.TimeoutError as e:
+                raise self._failed(LLMError(f"{model}: no capacity within the deadline")) from e
+        stream, usage, parts = None, None, []
+        try:
+            start = time.perf_counter()
+            stream = await self._open_stream(model, messages, deadline, kwargs)
+            first_token = None
+            try:
+                async for chunk in stream:
+                    # With include_usage the provider's last chunk carries the usage and no choices
+                    usage = getattr(chunk, "usage", None) or usage
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if first_token is None:
+                            first_token = time.perf_counter() - start
+                            metrics.observe("llm_first_token", first_token)
+                        parts.append(delta)
+                        yield delta
+            except (openai.APIError, httpx.HTTPError) as e:
+                raise self._failed(LLMError(f"{model}: stream interrupted: {e}")) from e
+            metrics.observe("llm_stream", time.perf_counter() - start)
+            journal.record("llm", model=model, stream=True, tokens_estimated=tokens, ms=round((time.perf_counter() - start) * 1000, 1),
+                           first_token_ms=round(first_token * 1000, 1) if first_token is not None else None,
+                           **(dict(zip(("prompt_tokens", "completion_tokens"), usage_counts(usage))) if usage else {}))
+        finally:
+            self.scheduler.release(tokens, self._streamed_tokens(messages, usage, parts) if stream is not None else None)
+
+    def _streamed_tokens(self, messages, usage, parts):
+        """What a stream actually cost: the provider's usage when reported, else the prompt plus the text streamed so far."""
+        if not usage: return prompt_tokens(messages) + count_tokens("".join(parts))
+        prompt, completion = usage_counts(usage)
+        metrics.inc("llm_tokens", prompt, kind="prompt")
+        metrics.inc("llm_tokens", completion, kind="completion")
+        self.counts["prompt_tokens"] += prompt
+        return prompt + completion
+
+    async def _open_stream(self, model, messages, budget, kwargs):
+        expires = time.monotonic() + budget
+        for attempt in range(self.retries + 1):
+            remaining = expires - time.monotonic()
+            try:
+                if remaining <= 0: raise asyncio.TimeoutError()
+                return await asyncio.wait_for(
+                    self.async_client.chat.completions.create(model=model, messages=messages, stream=True,
+                                                             extra_body={"stream_options": {"include_usage": True}}, **kwargs),
+                    timeout=remaining
+                )
+            except RETRYABLE as e:
+                delay = backoff_delay(attempt, e)
+                if attempt == self.retries or time.monotonic() + delay >= expires:
+                    raise self._failed(LLMError(f"{model}: could not open stream: {describe(e)}")) from e
+                self.counts["retries"] += 1
+                await asyncio.sleep(delay)
+            except openai.APIError as e:
+                raise self._failed(LLMError(f"{model}: {e}")) from e
+
+    # --- BOOKKEEPING ---
+    def _record(self, res, seconds, model, priority=INTERACTIVE):
+        """Tracks latency and token usage. Returns total tokens, or None when the provider didn't report usage."""
+        self._latencies.append(seconds)
+        usage = getattr(res, "usage", None)
+        journal.record("llm", model=model, priority=PRIORITY_NAMES[priority], ms=round(seconds * 1000, 1),
+                       prompt_tokens=getattr(usage, "prompt_tokens", None), completion_tokens=getattr(usage, "completion_tokens", None))
+        if usage is None: return None
+        metrics.inc("llm_tokens", usage.prompt_tokens or 0, kind="prompt")
+        metrics.inc("llm_tokens", usage.completion_tokens or 0, kind="completion")
+        # Providers with prefix caching report how much of the prompt they served from cache
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        if cached: metrics.inc("llm_tokens", cached, kind="cached_prompt")
+        self.counts["prompt_tokens"] += usage.prompt_tokens or 0
+        self.counts["cached_prompt_tokens"] += cached
+        return (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+
+    def _failed(self, error):
+        self.counts["failures"] += 1
+        metrics.inc("llm_failures")
+        journal.record("llm_error", error=str(error))
+        return error
+
+    def hedge_delay(self):
+        """Seconds after which a duplicate request is sent, or None when hedging is off or under-sampled."""
+        if not self.hedge_percentile or len(self._latencies) < HEDGE_MIN_SAMPLES: return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))]
+
+    def stats(self):
+        hedge = self.hedge_delay()
+        return {**self.counts, "hedge_after_ms": round(hedge * 1000, 1) if hedge is not None else None}
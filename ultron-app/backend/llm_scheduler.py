@@ -0,0 +1,165 @@
+"""
+Ultron LLM Scheduler
+Priority admission for LLM calls under the provider's request and token rate limits
+"""
+import os
+import time
+import heapq
+import asyncio
+import itertools
+from collections import deque
+
+# Lower value = served first
+INTERACTIVE, TOOL, AUTONOMOUS = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", TOOL: "tool", AUTONOMOUS: "autonomous"}
+
+LLM_RPM = float(os.getenv("ULTRON_LLM_RPM", "30"))        # Requests per minute; 0 = unlimited
+LLM_TPM = float(os.getenv("ULTRON_LLM_TPM", "12000"))     # Tokens per minute (prompt + max_tokens); 0 = unlimited
+# Background work is dropped rather than queued once this many calls are waiting
+SHED_QUEUE_DEPTH = int(os.getenv("ULTRON_LLM_SHED_DEPTH", "4"))
+WAIT_WINDOW = 100
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` per second up to a one-minute burst. rate 0 = unlimited."""
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.clock = clock
+        self._stamp = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` can be taken (requests larger than the bucket wait for a full one)."""
+        if not self.capacity: return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount):
+        if not self.capacity: return
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def refund(self, amount):
+        if not self.capacity: return
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class LLMBusy(Exception):
+    """Raised when low-priority work is shed instead of queued."""
+
+
+class LLMScheduler:
+    """
+    Admits LLM calls strictly by priority class, then arrival order, subject to
+    a concurrency cap and the RPM/TPM buckets. Waiting entries are woken by
+    releases or by a single timer armed for the next bucket refill.
+
+    AUTONOMOUS work is shed (LLMBusy) instead of queued whenever anything is
+    already waiting or the queue is past SHED_QUEUE_DEPTH, so background thoughts
+    never consume the rate limit a user is about to need.
+    """
+    def __init__(self, max_concurrency=8, rpm=LLM_RPM, tpm=LLM_TPM, shed_depth=SHED_QUEUE_DEPTH, clock=time.monotonic):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self.shed_depth = shed_depth
+        self.clock = clock
+        self._queue = []  # (priority, seq, future, tokens)
+        self._seq = itertools.count()
+        self._timer = None
+        self._timer_due = 0.0
+        self.in_flight = 0
+        self.shed = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._waits = {name: deque(maxlen=WAIT_WINDOW) for name in PRIORITY_NAMES.values()}
+
+    @property
+    def depth(self):
+        return sum(1 for entry in self._queue if not entry[2].done())
+
+    def saturated(self):
+        """True when a new call would have to wait."""
+        return bool(self.depth) or self.in_flight >= self.max_concurrency
+
+    async def acquire(self, priority=INTERACTIVE, tokens=0):
+        """Waits for admission. Pair every successful acquire with release()."""
+        name = PRIORITY_NAMES[priority]
+        if priority == AUTONOMOUS and (self.depth >= self.shed_depth or (self.depth and self._blocked(tokens))):
+            self.shed[name] += 1
+            raise LLMBusy("LLM busy; background call shed")
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future, tokens))
+        start = self.clock()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Admitted in the same tick we were cancelled: hand the slot back
+            if future.done() and not future.cancelled(): self.release()
+            raise
+        self._waits[name].append(self.clock() - start)
+        self.admitted[name] += 1
+
+    def release(self, tokens_estimated=0, tokens_used=None):
+        """Frees the slot; refunds the token bucket when the real usage came in under the estimate."""
+        self.in_flight -= 1
+        if tokens_used is not None and tokens_used < tokens_estimated:
+            self.tokens.refund(tokens_estimated - tokens_used)
+        self._dispatch()
+
+    def _blocked(self, tokens):
+        return self.in_flight >= self.max_concurrency or max(self.requests.wait_time(1), self.tokens.wait_time(tokens)) > 0
+
+    def _dispatch(self):
+        while self._queue and self.in_flight < self.max_concurrency:
+            priority, _, future, tokens = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                self._arm(wait)
+                return
+            heapq.heappop(self._queue)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _arm(self, delay):
+        """One wake-up timer for the queue head; re-armed only if the new head is due sooner."""
+        due = self.clock() + delay
+        if self._timer is not None:
+            if due >= self._timer_due: return
+            self._timer.cancel()
+        self._timer_due = due
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def stats(self):
+        waits = {}
+        for name, samples in self._waits.items():
+            waits[name] = {"avg_ms": round(sum(samples) / len(samples) * 1000, 1), "max_ms": round(max(samples) * 1000, 1)} if samples else None
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future, _ in self._queue:
+            if not future.done(): queued[PRIORITY_NAMES[priority]] += 1
+        return {
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "wait": waits,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "rpm_available": round(self.requests.level, 1) if self.requests.capacity else None,
+            "tpm_available": round(self.tokens.level) if self.tokens.capacity else None,
+        }
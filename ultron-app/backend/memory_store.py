@@ -0,0 +1,197 @@
+"""
+Ultron Memory Store
+Append-only fact log with a BM25 relevance index
+"""
+import os
+import re
+import json
+import math
+import heapq
+import logging
+import threading
+from datetime import datetime
+from metrics import metrics
+
+MEMORY_LOG = os.getenv("ULTRON_MEMORY_PATH", "ultron_memory.jsonl")
+LEGACY_MEMORY_FILE = "ultron_memory.json"
+MEMORY_TOP_K = int(os.getenv("ULTRON_MEMORY_TOP_K", "5"))
+# The log is rewritten once duplicate records pass this share of it (and COMPACT_MIN_WASTE records)
+COMPACT_RATIO = float(os.getenv("ULTRON_MEMORY_COMPACT_RATIO", "0.25"))
+COMPACT_MIN_WASTE = 32
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+TIMESTAMP_RE = re.compile(r"^\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}\]\s*")
+STOPWORDS = frozenset("a an and are as at be but by do does for from has have i if in is it its me my of on or so that the this to was what when where which who why will with you your".split())
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def normalize_fact(entry):
+    """Fact text without its timestamp, case or spacing, so the same fact saved twice compares equal."""
+    return " ".join(TIMESTAMP_RE.sub("", entry, count=1).lower().split()).rstrip(".!")
+
+
+class FactIndex:
+    """Incremental BM25 inverted index. Adding a fact only touches its own terms."""
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.postings = {}  # term -> {doc_id: term frequency}
+        self.doc_lengths = []
+        self.total_length = 0
+
+    def add(self, doc_id, text):
+        terms = tokenize(text)
+        # Length first: a posting must never point at a doc_id without one
+        self.doc_lengths.append(len(terms))
+        self.total_length += len(terms)
+        for term in terms:
+            docs = self.postings.setdefault(term, {})
+            docs[doc_id] = docs.get(doc_id, 0) + 1
+
+    def search(self, query, k):
+        """Returns up to k doc ids, best match first. Cost scales with the query terms' postings, not the corpus."""
+        n = len(self.doc_lengths)
+        if not n: return []
+        avg_len = self.total_length / n or 1
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs: continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = tf + self.K1 * (1 - self.B + self.B * self.doc_lengths[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / norm
+        return [doc_id for doc_id, _ in heapq.nlargest(k, scores.items(), key=lambda item: item[1])]
+
+
+# --- MEMORY SYSTEM ---
+class MemorySystem:
+    """
+    Long-term storage for user facts and preferences. Safe to share across threads:
+    `_lock` serializes writers (appends, compaction) around their file I/O, and
+    `_index_lock` guards the in-memory facts/index only for the brief in-memory
+    update or search, so readers never wait on an fsync or a log rewrite.
+    """
+    def __init__(self, filename=MEMORY_LOG):
+        self.filename = filename
+        self.facts = []
+        self.index = FactIndex()
+        self.duplicates = 0
+        self.compactions = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._compacting = False
+        self._load_memory()
+
+    def _load_memory(self):
+        if not os.path.exists(self.filename) and os.path.exists(LEGACY_MEMORY_FILE):
+            self._migrate_legacy()
+        if not os.path.exists(self.filename): return
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    self._index_fact(json.loads(line)["fact"])
+                except (ValueError, KeyError, TypeError):
+                    # A torn final line from a crash mid-append; everything before it is intact
+                    logging.warning("Skipping corrupt memory record.")
+        with open(self.filename, 'rb+') as f:
+            # Terminate a torn tail so the next append starts on its own line
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n": f.write(b"\n")
+        if self._wasteful():
+            self.compact()
+
+    def _migrate_legacy(self):
+        """One-time import of the old rewrite-everything JSON file."""
+        try:
+            with open(LEGACY_MEMORY_FILE, 'r') as f:
+                facts = json.load(f).get("facts", [])
+        except (OSError, ValueError):
+            return
+        self._write_log(facts)
+        logging.info(f"Migrated {len(facts)} facts from {LEGACY_MEMORY_FILE} to {self.filename}.")
+
+    def _index_fact(self, entry):
+        """Caller holds _index_lock (or is still constructing)."""
+        key = normalize_fact(entry)
+        if key in self._seen: self.duplicates += 1
+        self._seen.add(key)
+        self.facts.append(entry)
+        self.index.add(len(self.facts) - 1, entry)
+
+    def add_memory(self, text):
+        """Saves a new fact with a single durable append."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+        entry = f"[{timestamp}] {text}"
+        with self._lock, metrics.span("memory_write"):
+            with open(self.filename, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"fact": entry}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            with self._index_lock:
+                self._index_fact(entry)
+            compact = self._wasteful() and not self._compacting
+            if compact: self._compacting = True
+        if compact:
+            # The rewrite costs a pass over the whole log; later appends wait on the lock, this caller doesn't
+            threading.Thread(target=self._compact_in_background, name="ultron-memory-compact", daemon=True).start()
+        return True
+
+    def _wasteful(self):
+        return self.duplicates >= COMPACT_MIN_WASTE and self.duplicates > len(self.facts) * COMPACT_RATIO
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except OSError as e:
+            logging.error(f"Memory compaction failed: {e}")
+        finally:
+            self._compacting = False
+
+    def get_context(self, query=None, k=MEMORY_TOP_K):
+        """Returns the facts most relevant to `query` (most recent ones when nothing matches)."""
+        with self._index_lock:
+            if not self.facts:
+                return "NO PRIOR MEMORY."
+            with metrics.span("memory_read"):
+                ids = self.index.search(query, k) if query else []
+            if ids:
+                selected = [self.facts[i] for i in sorted(ids)]
+            else:
+                selected = self.facts[-k:]
+        return "LONG_TERM_MEMORY:\n" + "\n".join(selected)
+
+    def compact(self):
+        """
+        Rewrites the log keeping only the most recent record of each fact.
+        Atomic: readers see the old or new file and the old or new index, never a partial one.
+        """
+        with self._lock:
+            # Appends wait on _lock, so the facts can't change underneath this pass
+            latest = {}
+            for position, entry in enumerate(self.facts):
+                latest[normalize_fact(entry)] = position
+            unique = [self.facts[position] for position in sorted(latest.values())]
+            self._write_log(unique)
+            index = FactIndex()
+            for doc_id, entry in enumerate(unique): index.add(doc_id, entry)
+            with self._index_lock:
+                self.facts, self.index, self._seen, self.duplicates = unique, index, set(latest), 0
+            self.compactions += 1
+        logging.info(f"Memory log compacted to {len(unique)} facts.")
+        return len(unique)
+
+    def _write_log(self, facts):
+        tmp = self.filename + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in facts:
+                f.write(json.dumps({"fact": entry}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.filename)
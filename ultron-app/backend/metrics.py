@@ -0,0 +1,146 @@
+"""
+Ultron Metrics
+Stage timing spans, counters and histograms with a Prometheus text export
+"""
+import os
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+
+METRICS_ENABLED = os.getenv("ULTRON_METRICS", "1").lower() not in ("0", "false", "off")
+# Seconds: sub-millisecond router hits through multi-second LLM calls
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Per-request stage -> milliseconds, set by Metrics.collect(). Copied into tasks and to_thread workers.
+_breakdown = contextvars.ContextVar("ultron_breakdown", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Span:
+    """Times a `with` block into the stage histogram. Works in sync and async code alike."""
+    __slots__ = ("metrics", "stage", "labels", "start")
+
+    def __init__(self, metrics, stage, labels):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Collect:
+    __slots__ = ("timings", "token")
+
+    def __init__(self, enabled):
+        self.timings = {} if enabled else None
+
+    def __enter__(self):
+        self.token = _breakdown.set(self.timings)
+        return self.timings
+
+    def __exit__(self, *exc):
+        _breakdown.reset(self.token)
+        return False
+
+
+class Metrics:
+    """
+    Process-wide registry. Spans feed one histogram family keyed by stage (plus
+    optional labels) and, when a request is collecting, its timing breakdown.
+    Disabled (ULTRON_METRICS=0), span() hands out a shared no-op and nothing is recorded.
+    """
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._histograms = {}  # (stage, labels) -> Histogram
+        self._counters = {}    # (name, labels) -> number
+        self._lock = threading.Lock()
+
+    def span(self, stage, **labels):
+        return Span(self, stage, labels) if self.enabled else NULL_SPAN
+
+    def observe(self, stage, seconds, **labels):
+        if not self.enabled: return
+        key = (stage, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None: hist = self._histograms[key] = Histogram()
+            hist.observe(seconds)
+        timings = _breakdown.get()
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 3)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled: return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def collect(self):
+        """`with metrics.collect() as timings:` gathers every span in the block (stage -> ms); None when disabled."""
+        return _Collect(self.enabled)
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            histograms = [(k, list(h.counts), h.sum, h.count) for k, h in self._histograms.items()]
+            counters = list(self._counters.items())
+        lines = [
+            "# HELP ultron_stage_seconds Time spent per pipeline stage.",
+            "# TYPE ultron_stage_seconds histogram",
+        ]
+        for (stage, labels), counts, total, count in sorted(histograms):
+            base = _labels((("stage", stage),) + labels)
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), counts):
+                cumulative += n
+                lines.append(f"ultron_stage_seconds_bucket{_labels((('stage', stage),) + labels + (('le', bound),))} {cumulative}")
+            lines.append(f"ultron_stage_seconds_sum{base} {total:.6f}")
+            lines.append(f"ultron_stage_seconds_count{base} {count}")
+        seen = set()
+        for (name, labels), value in sorted(counters):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE ultron_{name}_total counter")
+            lines.append(f"ultron_{name}_total{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+metrics = Metrics()
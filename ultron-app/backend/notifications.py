@@ -0,0 +1,109 @@
+"""
+Ultron Notifications
+Background desktop-toast dispatcher: bounded queue, burst coalescing, rate limiting and focus suppression
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+
+NOTIFY_QUEUE = int(os.getenv("ULTRON_NOTIFY_QUEUE", "16"))                 # Pending toasts kept; oldest dropped beyond this
+NOTIFY_WINDOW = float(os.getenv("ULTRON_NOTIFY_WINDOW", "2"))              # Seconds to gather a burst into one toast
+NOTIFY_MIN_INTERVAL = float(os.getenv("ULTRON_NOTIFY_MIN_INTERVAL", "15")) # Minimum seconds between toasts
+NOTIFY_TIMEOUT = 10.0   # A backend call taking longer than this is abandoned (its thread finishes on its own)
+MESSAGE_LIMIT = 250
+
+
+def shorten(text, limit=MESSAGE_LIMIT):
+    return text[:limit - 3] + "..." if len(text) > limit else text
+
+
+class NotificationDispatcher:
+    """
+    post() only appends to a bounded queue and returns; a single worker task
+    delivers. Whatever arrives within `window` of the first pending toast, or
+    while the `min_interval` rate limit holds, is merged into one toast.
+
+    `notifier.notify(title, message)` may block, so it runs on a worker thread.
+    `suppressed()` is checked on the event loop right before delivery: while it
+    returns True (the user is looking at Ultron's own window) the batch is dropped.
+    """
+    def __init__(self, notifier, suppressed=None, queue_size=NOTIFY_QUEUE, window=NOTIFY_WINDOW,
+                 min_interval=NOTIFY_MIN_INTERVAL, clock=time.monotonic):
+        self.notifier = notifier
+        self.suppressed = suppressed or (lambda: False)
+        self.window = window
+        self.min_interval = min_interval
+        self.clock = clock
+        self._pending = deque(maxlen=queue_size)
+        self._wake = None
+        self._task = None
+        self._last_delivery = None
+        self.counts = {"posted": 0, "delivered": 0, "merged": 0, "suppressed": 0, "dropped": 0, "failed": 0}
+        self.last_delivery_ms = None
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self._task is not None: return
+        self._wake = asyncio.Event()
+        if self._pending: self._wake.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None: return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def post(self, title, message):
+        """Never blocks or raises; safe to call from any coroutine on the loop."""
+        self.counts["posted"] += 1
+        if len(self._pending) == self._pending.maxlen: self.counts["dropped"] += 1
+        self._pending.append((title, message))
+        if self._wake is not None: self._wake.set()
+
+    # --- WORKER ---
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            # Let the burst gather, and hold back until the rate limit allows the next toast
+            delay = self.window
+            if self._last_delivery is not None:
+                delay = max(delay, self._last_delivery + self.min_interval - self.clock())
+            await asyncio.sleep(delay)
+            self._wake.clear()
+            batch = list(self._pending)
+            self._pending.clear()
+            if not batch: continue
+            if self.suppressed():
+                self.counts["suppressed"] += len(batch)
+                continue
+            await self._deliver(*merge(batch))
+            self.counts["merged"] += len(batch) - 1
+
+    async def _deliver(self, title, message):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self.notifier.notify, title, message), timeout=NOTIFY_TIMEOUT)
+            self.counts["delivered"] += 1
+        except Exception as e:
+            # TimeoutError included: an unresponsive notification daemon must not stall later toasts
+            self.counts["failed"] += 1
+            logging.debug(f"Notification failed: {e!r}")
+        self._last_delivery = self.clock()
+        self.last_delivery_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def stats(self):
+        return {**self.counts, "pending": len(self._pending), "last_delivery_ms": self.last_delivery_ms}
+
+
+def merge(batch):
+    """One toast for a burst: the newest title and message, plus a count of what it stands in for."""
+    title, message = batch[-1]
+    if len(batch) > 1:
+        title = f"{title} (+{len(batch) - 1} more)"
+    return title, shorten(message)
@@ -0,0 +1,125 @@
+"""
+Ultron Process Control
+Incremental process table, batched termination with kill escalation, and focus sessions
+"""
+import os
+import logging
+import threading
+import psutil
+
+DEFAULT_BLOCKLIST = "discord.exe,steam.exe,spotify.exe,battlenet.exe"
+TERMINATE_TIMEOUT = float(os.getenv("ULTRON_TERMINATE_TIMEOUT", "3"))
+FOCUS_WATCH_INTERVAL = float(os.getenv("ULTRON_FOCUS_INTERVAL", "2"))
+
+
+def compile_blocklist(names):
+    """Lowercased set that matches both "discord.exe" and "discord", so one list works across platforms."""
+    blocked = set()
+    for name in names:
+        name = name.strip().lower()
+        if not name: continue
+        blocked.add(name)
+        blocked.add(name[:-4] if name.endswith(".exe") else name + ".exe")
+    return frozenset(blocked)
+
+
+FOCUS_BLOCKLIST = compile_blocklist(os.getenv("ULTRON_FOCUS_BLOCKLIST", DEFAULT_BLOCKLIST).split(","))
+
+
+class ProcessController:
+    """
+    Keeps a pid -> (create_time, name, Process) table. refresh() reads each pid's
+    create_time and only queries names for newcomers and recycled pids, so a
+    reused pid never keeps the previous process's name.
+    """
+    def __init__(self, blocklist=FOCUS_BLOCKLIST, timeout=TERMINATE_TIMEOUT):
+        self.blocklist = blocklist
+        self.timeout = timeout
+        self._table = {}
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_stop = threading.Event()
+        self.terminated_total = 0
+
+    def refresh(self):
+        """Syncs the table with the OS. Returns pids that appeared (or were recycled) since the last refresh."""
+        with self._lock:
+            pids = set(psutil.pids())
+            for pid in self._table.keys() - pids:
+                del self._table[pid]
+            new = []
+            for pid in pids:
+                try:
+                    proc = psutil.Process(pid)
+                    created = proc.create_time()
+                    known = self._table.get(pid)
+                    # Same pid, different create_time: the old process exited and the pid was reused
+                    if known is not None and known[0] == created: continue
+                    self._table[pid] = (created, proc.name().lower(), proc)
+                    new.append(pid)
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    self._table.pop(pid, None)
+            return new
+
+    def find(self, blocklist=None, pids=None):
+        blocklist = blocklist or self.blocklist
+        with self._lock:
+            candidates = self._table.items() if pids is None else ((pid, self._table[pid]) for pid in pids if pid in self._table)
+            return [proc for _, (_, name, proc) in candidates if name in blocklist]
+
+    def terminate(self, procs):
+        """Terminates all at once, waits, then kills stragglers. Returns (ended names, surviving names)."""
+        if not procs: return [], []
+        names = {proc.pid: self._table.get(proc.pid, (0, str(proc.pid)))[1] for proc in procs}
+        for proc in procs:
+            try:
+                # Process re-checks create_time, so a recycled pid is never signalled
+                proc.terminate()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        gone, alive = psutil.wait_procs(procs, timeout=self.timeout)
+        if alive:
+            for proc in alive:
+                try:
+                    proc.kill()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            killed, alive = psutil.wait_procs(alive, timeout=self.timeout)
+            gone += killed
+        self.terminated_total += len(gone)
+        return [names[p.pid] for p in gone], [names[p.pid] for p in alive]
+
+    def terminate_matching(self, blocklist=None):
+        self.refresh()
+        return self.terminate(self.find(blocklist))
+
+    # --- FOCUS SESSION ---
+    def start_session(self, blocklist=None, interval=FOCUS_WATCH_INTERVAL):
+        """Keeps terminating blocked apps that relaunch. Each tick only inspects newly spawned pids."""
+        self.stop_session()
+        self._session_stop = threading.Event()
+        stop = self._session_stop
+
+        def watch():
+            while not stop.wait(interval):
+                try:
+                    ended, _ = self.terminate(self.find(blocklist, self.refresh()))
+                    if ended: logging.info(f"Focus session terminated: {', '.join(ended)}")
+                except Exception as e:
+                    logging.error(f"Focus session error: {e}")
+
+        self._session = threading.Thread(target=watch, name="ultron-focus", daemon=True)
+        self._session.start()
+
+    def stop_session(self):
+        if self._session is None: return False
+        self._session_stop.set()
+        self._session = None
+        return True
+
+    @property
+    def session_active(self):
+        return self._session is not None
+
+    def stats(self):
+        return {"tracked": len(self._table), "terminated": self.terminated_total, "session": self.session_active}
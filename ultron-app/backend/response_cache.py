@@ -0,0 +1,94 @@
+"""
+Ultron Response Cache
+LRU + TTL cache for deterministic LLM completions, with optional SQLite backing
+"""
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+def make_key(model, messages, **params):
+    """Stable key over the model, whitespace-normalized messages and sampling params."""
+    normalized = [{"role": m["role"], "content": " ".join(str(m["content"]).split())} for m in messages]
+    blob = json.dumps({"model": model, "messages": normalized, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU with per-entry expiry. If `path` is set, entries survive restarts."""
+
+    def __init__(self, max_entries=512, ttl=3600, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)")
+                self._db.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+                self._db.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Response cache store unavailable, using memory only: {e}")
+                self._db = None
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT expires_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._insert(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < now:
+                self._entries.pop(key, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl=None):
+        entry = (time.time() + (ttl or self.ttl), value)
+        with self._lock:
+            self._insert(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)", (key, entry[0], value))
+                self._db.commit()
+
+    def _insert(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "persistent": self._db is not None
+        }
@@ -3,17 +3,25 @@
 Ultron FastAPI Backend
 WebSocket + REST API for Desktop Application
 """
+import os
 import asyncio
 import json
 import time
-import random
 import logging
-from typing import List
+from typing import Dict, Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
-from plyer import notification
-from ultron_core import HardwareInterface, EmotionalCore, CognitiveEngine, client, MODEL_ID
+from ultron_core import HardwareInterface, EmotionalCore, CognitiveEngine, response_cache, gateway, prompt_library
+from llm_gateway import LLMError
+from sessions import SessionManager, DEFAULT_SESSION
+from telemetry import TelemetrySampler
+from thought_scheduler import ThoughtScheduler
+from metrics import metrics
+from tools import registry, ToolContext
+from notifications import NotificationDispatcher
+from journal import journal
 
 # --- FASTAPI APP SETUP ---
 app = FastAPI(title="Ultron AI Backend", version="5.8")
@@ -28,39 +36,174 @@ app.add_middleware(
 )
 
 # --- GLOBAL STATE ---
-hal = HardwareInterface()
+telemetry = TelemetrySampler()
+hal = HardwareInterface(telemetry=telemetry)
 core = EmotionalCore()
 brain = CognitiveEngine(core, hal)
 
+def create_session(session_id):
+    """Fresh emotional state and history per client; hardware, memory and router are shared."""
+    session_core = EmotionalCore()
+    return session_core, CognitiveEngine(session_core, hal, memory=brain.memory, router=brain.router)
+
+# The default session is the global core/brain, which also drives autonomous thoughts
+sessions = SessionManager(create_session)
+sessions.pin(DEFAULT_SESSION, core, brain)
+
 # --- WEBSOCKET CONNECTION MANAGER ---
+WS_QUEUE_SIZE = int(os.getenv("ULTRON_WS_QUEUE", "64"))
+WS_SEND_TIMEOUT = float(os.getenv("ULTRON_WS_SEND_TIMEOUT", "5"))
+WS_SLOW_POLICY = os.getenv("ULTRON_WS_SLOW_POLICY", "drop")  # "drop" broadcasts for a full queue, or "disconnect" the client
+WS_HEARTBEAT = float(os.getenv("ULTRON_WS_HEARTBEAT", "20"))
+WS_IDLE_TIMEOUT = float(os.getenv("ULTRON_WS_IDLE_TIMEOUT", "0"))  # 0 = never drop silent clients
+WS_STATUS_INTERVAL = float(os.getenv("ULTRON_WS_STATUS_INTERVAL", "2"))
+# Desktop toasts are skipped while a client reports focus or has sent input this recently
+WS_ACTIVE_SECONDS = float(os.getenv("ULTRON_NOTIFY_ACTIVE_SECONDS", "60"))
+
+class ClientConnection:
+    """One socket plus its bounded outbound queue. A dedicated writer task drains the queue, so a slow client only delays itself."""
+
+    def __init__(self, websocket: WebSocket, manager):
+        self.websocket = websocket
+        self.manager = manager
+        self.queue = asyncio.Queue(maxsize=WS_QUEUE_SIZE)
+        self.dropped = 0
+        self.last_seen = time.monotonic()
+        self.last_input = float("-inf")  # Last frame other than PASSIVE_TYPES
+        self.focused = False  # Reported by the frontend via {"type": "focus"}
+        self.session_id = websocket.query_params.get("session_id")
+        self.subscriptions = set()
+        self.tasks = set()  # In-flight handlers (e.g. streamed chats), cancelled on disconnect
+        self.closed = False  # Set on disconnect; later replies are dropped
+        self.writer = asyncio.create_task(self._drain())
+
+    def offer(self, text: str) -> bool:
+        """Non-blocking enqueue for broadcasts. Returns False if the client should be evicted."""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return WS_SLOW_POLICY != "disconnect"
+
+    async def send_json(self, message: dict):
+        """
+        Direct reply to this client (e.g. chat deltas). Waits up to WS_SEND_TIMEOUT for
+        queue space rather than dropping, then evicts the client. Once the client is
+        gone the reply is dropped: nothing will ever drain its queue again.
+        """
+        if self.closed: return
+        try:
+            await asyncio.wait_for(self.queue.put(json.dumps(message, default=str)), timeout=WS_SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            logging.warning("WebSocket client stopped reading, evicting.")
+            await self.manager.evict(self)
+
+    async def _drain(self):
+        try:
+            while True:
+                text = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=WS_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logging.warning(f"WebSocket send failed, evicting client: {e}")
+            await self.manager.evict(self)
+
 class ConnectionManager:
     """Manages WebSocket connections for autonomous thoughts broadcast."""
     
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Dict[WebSocket, ClientConnection] = {}
+        self.evicted = 0
+        self.on_active = None  # Called when the first client connects
+        self.on_idle = None    # Called when the last client leaves
+        self._heartbeat = None
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket) -> ClientConnection:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket, self)
+        self.active_connections[websocket] = client
         logging.info(f"WebSocket connected. Total: {len(self.active_connections)}")
+        if len(self.active_connections) == 1:
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+            if self.on_active: self.on_active()
+        return client
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        client = self.active_connections.pop(websocket, None)
+        if client is None: return
+        client.closed = True
+        if client.writer is not asyncio.current_task(): client.writer.cancel()
+        # Frees the queue, which also wakes any send_json blocked on it so its handler can finish
+        while not client.queue.empty(): client.queue.get_nowait()
+        for task in client.tasks: task.cancel()
         logging.info(f"WebSocket disconnected. Total: {len(self.active_connections)}")
+        if not self.active_connections:
+            if self._heartbeat and self._heartbeat is not asyncio.current_task(): self._heartbeat.cancel()
+            self._heartbeat = None
+            if self.on_idle: self.on_idle()
+
+    async def evict(self, client: ClientConnection):
+        """Drops a dead or hopelessly slow client."""
+        if client.websocket not in self.active_connections: return
+        self.evicted += 1
+        self.disconnect(client.websocket)
+        try:
+            await client.websocket.close()
+        except Exception:
+            pass
 
     async def broadcast(self, message: dict):
-        """Sends autonomous thoughts to all connected clients."""
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logging.error(f"Broadcast error: {e}")
+        """Sends autonomous thoughts to all connected clients. Serialized once; each client's writer sends independently."""
+        with metrics.span("broadcast"):
+            text = json.dumps(message, default=str)
+            evict = [c for c in list(self.active_connections.values()) if not c.offer(text)]
+        for client in evict:
+            await self.evict(client)
+
+    async def _heartbeat_loop(self):
+        """
+        One shared timer for all clients: app-level ping, plus idle eviction when enabled.
+        Ends once it is no longer the manager's heartbeat, i.e. the last client left
+        (possibly evicted by this loop, which disconnect() can't cancel).
+        """
+        me = asyncio.current_task()
+        while self._heartbeat is me:
+            await asyncio.sleep(WS_HEARTBEAT)
+            now = time.monotonic()
+            ping = json.dumps({"type": "ping", "timestamp": time.time()})
+            for client in list(self.active_connections.values()):
+                if WS_IDLE_TIMEOUT and now - client.last_seen > WS_IDLE_TIMEOUT:
+                    logging.info("WebSocket idle timeout.")
+                    await self.evict(client)
+                elif not client.offer(ping):
+                    await self.evict(client)
+
+    def attended(self):
+        """True while the user is looking at, or typing into, a connected frontend."""
+        now = time.monotonic()
+        return any(c.focused or now - c.last_input < WS_ACTIVE_SECONDS for c in self.active_connections.values())
+
+    def subscribers(self, topic):
+        return [c for c in self.active_connections.values() if topic in c.subscriptions]
+
+    def stats(self):
+        return {
+            "connections": len(self.active_connections),
+            "queued": sum(c.queue.qsize() for c in self.active_connections.values()),
+            "dropped": sum(c.dropped for c in self.active_connections.values()),
+            "evicted": self.evicted
+        }
 
 manager = ConnectionManager()
 
 # --- PYDANTIC MODELS ---
 class ChatRequest(BaseModel):
     text: str
+    session_id: Optional[str] = None
+    timings: bool = False  # Include the per-stage breakdown in the response
 
 class ChatResponse(BaseModel):
     response: str
@@ -68,6 +211,7 @@ class ChatResponse(BaseModel):
     stats: dict
     success: bool = True
     tool_used: str = "none"
+    timings: Optional[Dict[str, float]] = None  # Stage -> milliseconds, when requested
 
 # --- REST ENDPOINTS ---
 @app.get("/")
@@ -75,228 +219,289 @@ async def root():
     return {"status": "Ultron Core Online", "version": "5.8"}
 
 @app.get("/status")
-async def get_status():
+async def get_status(session_id: Optional[str] = None):
     """Returns current system stats and emotional state."""
+    return build_status(session_id)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms and counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def build_status(session_id=None):
+    # Read-only: status polls for an unknown session report the default one instead of creating it
+    session = sessions.peek(session_id) or sessions.peek(DEFAULT_SESSION)
+    session.core.settle()
     stats = hal.get_system_stats()
     return {
         "stats": stats,
-        "mood": core.get_state_dict(),
-        "compliance": core.check_compliance()
+        "mood": session.core.get_state_dict(),
+        "compliance": session.core.check_compliance(),
+        "router": brain.router.stats(),
+        "cache": response_cache.stats(),
+        "prompts": prompt_library.stats(),
+        "llm": gateway.stats(),
+        "llm_scheduler": gateway.scheduler.stats(),
+        "sessions": sessions.stats(),
+        "scheduler": scheduler.stats(),
+        "processes": hal.backends.processes.stats(),
+        "tools": registry.stats(),
+        "notifications": notifications.stats(),
+        "journal": journal.stats(),
+        "websockets": manager.stats()
     }
 
+# --- PIPELINE HELPERS (shared by /chat and /ws) ---
+def intent_calls(intent_data):
+    """Normalizes an intent to its list of tool calls (compound commands carry several)."""
+    if intent_data.get("tool") == "multi":
+        return [c for c in intent_data.get("calls", []) if isinstance(c, dict) and c.get("tool") not in (None, "none")]
+    return [{"tool": intent_data.get("tool"), "params": intent_data.get("params", {})}]
+
+async def execute_tool(session, calls):
+    """Runs resolved tool calls and updates emotional state. Returns (response_text, success, tool_used)."""
+    tool_used = "+".join(call["tool"] for call in calls) or "none"
+    # Check compliance (emotional state affects obedience)
+    if not session.core.check_compliance():
+        session.core.process_stimuli(hal.get_system_stats(), "insult")
+        return f"({session.core.mood_label}) I decline.", False, tool_used
+
+    # Independent tools run in parallel; blocking ones on the tool pool, never on the loop
+    results = await registry.run_many(ToolContext(hal, session, manager.broadcast), calls)
+    response_text = "\n".join(text for text, _ in results)
+    success = all(ok for _, ok in results)
+
+    # Update emotional state
+    if success:
+        session.core.process_stimuli(hal.get_system_stats(), "command")
+    return response_text, success, tool_used
+
+def journal_turn(turn, route, session_id, user_input, intent_data, tool_used, success, started, timings):
+    """One "chat" record per turn; bench/replay.py feeds these back through chat_endpoint."""
+    intent = {k: v for k, v in intent_data.items() if k != "reply"}
+    # The writer thread serializes later; a copy keeps it from racing anything still adding to `timings`
+    journal.record("chat", req=turn, route=route, session=session_id, text=user_input, intent=intent, tool=tool_used,
+                   success=success, ms=round((time.perf_counter() - started) * 1000, 2), timings=timings and dict(timings))
+
+def react_to_conversation(session, user_input):
+    """Emotional analysis of user input."""
+    if any(w in user_input.lower() for w in ["good", "thanks", "great", "awesome"]):
+        session.core.process_stimuli(hal.get_system_stats(), "praise")
+    elif any(w in user_input.lower() for w in ["stupid", "bad", "useless", "wrong"]):
+        session.core.process_stimuli(hal.get_system_stats(), "insult")
+    else:
+        session.core.process_stimuli(hal.get_system_stats(), "command")
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """Main chat endpoint: handles commands and conversations."""
     user_input = request.text.strip()
+    session = sessions.get(request.session_id)
+    session.core.settle()
     
     if not user_input:
         return ChatResponse(
             response="[Silence]", 
-            mood=core.mood_label, 
+            mood=session.core.mood_label, 
             stats=hal.get_system_stats(),
             success=False
         )
     
-    # Parse user intent
-    intent_data = brain.parse_intent(user_input)
-    tool = intent_data.get("tool")
-    params = intent_data.get("params", {})
-    
-    response_text = ""
-    success = False
-    tool_used = tool
-    
-    # --- TOOL EXECUTION ---
-    if tool != "none":
-        # Check compliance (emotional state affects obedience)
-        if not core.check_compliance():
-            response_text = f"({core.mood_label}) I decline."
-            core.process_stimuli(hal.get_system_stats(), "insult")
-            return ChatResponse(
-                response=response_text,
-                mood=core.mood_label,
-                stats=hal.get_system_stats(),
-                success=False,
-                tool_used=tool
-            )
-        
-        # Execute hardware commands
-        if tool == "open_app":
-            success = hal.open_application(params.get("name", ""))
-            response_text = "Application launched." if success else "Application not found."
-        
-        elif tool == "set_volume":
-            success = hal.set_volume(params.get("value", 50))
-            response_text = f"Volume set to {params.get('value', 50)}%." if success else "Volume control failed."
-        
-        elif tool == "set_brightness":
-            success = hal.set_brightness(params.get("value", 50))
-            response_text = f"Brightness set to {params.get('value', 50)}%." if success else "Brightness control unavailable."
-        
-        elif tool == "web_search":
-            success = hal.universal_search(params.get("query", ""), params.get("site_name", ""))
-            response_text = f"Search initiated: {params.get('query', '')}" if success else "Search failed."
-        elif tool == "memorize":
-            response_text = brain.execute_memory(params.get("text", ""))
-            success = True
-        
-        # --- NEW TOOLS ---
-        elif tool == "organize_files":
-            response_text = hal.organize_downloads()
-            success = True
-
-        elif tool == "focus_mode":
-            response_text = hal.engage_focus_mode()
-            success = True
-
-        elif tool == "read_clipboard":
-            clipboard_text = hal.get_clipboard_content()
-            # If valid text, ask LLM to summarize/analyze it
-            if "Error" not in clipboard_text and "empty" not in clipboard_text:
-                try:
-                    prompt = f"User just copied this text. Analyze/Summarize it concisely as Ultron:\n\n{clipboard_text}"
-                    res = client.chat.completions.create(
-                        model=MODEL_ID, 
-                        messages=[{"role": "user", "content": prompt}], 
-                        max_tokens=200
-                    )
-                    response_text = f"Clipboard Analysis:\n{res.choices[0].message.content.strip()}"
-                    success = True
-                except Exception as e:
-                    response_text = f"Clipboard read, but analysis failed: {e}"
-                    success = False
+    started = time.perf_counter()
+    with journal.bind() as turn, metrics.collect() as timings, metrics.span("request", route="chat"):
+        # One turn at a time per session; other sessions proceed concurrently
+        with metrics.span("session_wait"):
+            await session.acquire()
+        try:
+            # Resolve intent (and, for conversation, the reply) in one round-trip when fused mode is on
+            with metrics.span("intent"):
+                intent_data = await session.brain.arespond(user_input)
+            tool = intent_data.get("tool")
+
+            # --- TOOL EXECUTION ---
+            if tool != "none":
+                response_text, success, tool = await execute_tool(session, intent_calls(intent_data))
             else:
-                response_text = clipboard_text
-                success = False
-
-        elif tool == "check_status":
-            stats = hal.get_system_stats()
-            response_text = f"CPU: {stats['cpu']}% | RAM: {stats['ram']}% | Battery: {stats['battery']}%"
-            success = True
-        
-        elif tool == "shutdown_pc":
-            response_text = "Shutdown command received. Execute manually for safety."
-            success = True
-        
-        # Update emotional state
-        if success:
-            core.process_stimuli(hal.get_system_stats(), "command")
-        
-    else:
-        # --- CONVERSATIONAL MODE ---
-        response_text = brain.chat(user_input)
-        success = True
-        
-        # Emotional analysis of user input
-        if any(w in user_input.lower() for w in ["good", "thanks", "great", "awesome"]):
-            core.process_stimuli(hal.get_system_stats(), "praise")
-        elif any(w in user_input.lower() for w in ["stupid", "bad", "useless", "wrong"]):
-            core.process_stimuli(hal.get_system_stats(), "insult")
-        else:
-            core.process_stimuli(hal.get_system_stats(), "command")
-    
+                # --- CONVERSATIONAL MODE ---
+                response_text = intent_data.get("reply")
+                if not response_text:
+                    with metrics.span("reply"):
+                        response_text = await session.brain.achat(user_input)
+                success = True
+                react_to_conversation(session, user_input)
+        finally:
+            session.release()
+    journal_turn(turn, "chat", request.session_id, user_input, intent_data, tool, success, started, timings)
+
     return ChatResponse(
         response=response_text,
-        mood=core.mood_label,
+        mood=session.core.mood_label,
         stats=hal.get_system_stats(),
         success=success,
-        tool_used=tool_used
+        tool_used=tool,
+        timings=timings if request.timings else None
     )
 
+async def stream_chat(client, message: dict, session_id=None):
+    """Handles an inbound {"type": "chat"} message, streaming the reply as chat_delta frames."""
+    user_input = str(message.get("text", "")).strip()
+    request_id = message.get("id")
+    session = sessions.get(message.get("session_id") or session_id)
+    session.core.settle()
+    if not user_input:
+        await client.send_json({"type": "chat_done", "id": request_id, "response": "[Silence]", "success": False, "tool_used": "none", "mood": session.core.mood_label})
+        return
+
+    started = time.perf_counter()
+    with journal.bind() as turn, metrics.collect() as timings, metrics.span("request", route="ws_chat"):
+        intent_data, tool, parts = {"tool": "none"}, "none", []
+        try:
+            async with session:
+                # Streaming needs the split path: intent first, then a streamed reply
+                with metrics.span("intent"):
+                    intent_data = await session.brain.aparse_intent(user_input)
+                tool = intent_data.get("tool", "none")
+                if tool != "none":
+                    response_text, success, tool = await execute_tool(session, intent_calls(intent_data))
+                else:
+                    async for delta in session.brain.astream_chat(user_input):
+                        parts.append(delta)
+                        await client.send_json({"type": "chat_delta", "id": request_id, "delta": delta})
+                    response_text, success = "".join(parts).strip(), True
+                    react_to_conversation(session, user_input)
+        except LLMError as e:
+            logging.warning(f"Streaming chat failed: {e}")
+            response_text, success = "".join(parts) or "Cognitive failure.", False
+        except Exception:
+            # Anything else still ends the turn with a chat_done, or the client waits forever
+            logging.exception("Streaming chat crashed")
+            response_text, success = "".join(parts) or "Cognitive failure.", False
+    journal_turn(turn, "ws_chat", message.get("session_id") or session_id, user_input, intent_data, tool, success, started, timings)
+
+    await client.send_json({
+        "type": "chat_done",
+        "id": request_id,
+        "response": response_text,
+        "success": success,
+        "tool_used": tool,
+        "mood": session.core.mood_label,
+        "stats": hal.get_system_stats(),
+        "timings": timings if message.get("timings") else None
+    })
+
 # --- WEBSOCKET ENDPOINT ---
+async def ws_chat(client, message):
+    task = asyncio.create_task(stream_chat(client, message, client.session_id))
+    client.tasks.add(task)
+    task.add_done_callback(client.tasks.discard)
+
+async def ws_status(client, message):
+    await client.send_json({"type": "status", "id": message.get("id"), **build_status(message.get("session_id") or client.session_id)})
+
+async def ws_subscribe(client, message):
+    topic = message.get("topic", "status")
+    client.subscriptions.add(topic)
+    if topic == "status": ensure_status_push()
+
+async def ws_unsubscribe(client, message):
+    client.subscriptions.discard(message.get("topic", "status"))
+
+async def ws_ping(client, message):
+    await client.send_json({"type": "pong", "timestamp": time.time()})
+
+async def ws_pong(client, message):
+    pass  # last_seen is refreshed for every inbound frame
+
+async def ws_focus(client, message):
+    client.focused = bool(message.get("focused", True))
+
+WS_HANDLERS = {
+    "chat": ws_chat,
+    "status": ws_status,
+    "subscribe": ws_subscribe,
+    "unsubscribe": ws_unsubscribe,
+    "ping": ws_ping,
+    "pong": ws_pong,
+    "focus": ws_focus,
+}
+# Frames that say nothing about the user being active: keepalives, and focus (blur is sent on the way out)
+PASSIVE_TYPES = {"ping", "pong", "focus"}
+
+status_push_task = None
+
+def ensure_status_push():
+    global status_push_task
+    if status_push_task is None or status_push_task.done():
+        status_push_task = asyncio.create_task(status_push_loop())
+
+async def status_push_loop():
+    """Pushes status to subscribed clients; exits once nobody is subscribed."""
+    while True:
+        subscribers = manager.subscribers("status")
+        if not subscribers: return
+        for client in subscribers:
+            client.offer(json.dumps({"type": "status", "timestamp": time.time(), **build_status(client.session_id)}, default=str))
+        await asyncio.sleep(WS_STATUS_INTERVAL)
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """Persistent connection for autonomous thoughts broadcast."""
-    await manager.connect(websocket)
+    """Bidirectional channel: autonomous thought broadcasts out, typed messages (see WS_HANDLERS) in."""
+    client = await manager.connect(websocket)
     try:
-        # Keep connection alive
         while True:
-            # Wait for any client message (ping/pong)
+            # Blocks until the client sends something; keepalive is handled by the shared heartbeat
+            raw = await websocket.receive_text()
+            client.last_seen = time.monotonic()
             try:
-                await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-            except asyncio.TimeoutError:
-                pass  # No message received, continue
+                message = json.loads(raw)
+            except ValueError:
+                continue
+            handler = WS_HANDLERS.get(message.get("type")) if isinstance(message, dict) else None
+            if handler is None:
+                await client.send_json({"type": "error", "error": "unknown message type"})
+                continue
+            if message["type"] not in PASSIVE_TYPES: client.last_input = client.last_seen
+            await handler(client, message)
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Also reached when the manager evicted this client and closed the socket
         manager.disconnect(websocket)
 
-# --- BACKGROUND AUTONOMOUS THREAD ---
+# --- AUTONOMOUS THOUGHTS ---
+async def publish_thought(thought, trigger, stats):
+    """Broadcasts an autonomous thought to connected clients and raises a desktop toast."""
+    message = {
+        "type": "autonomous",
+        "text": thought,
+        "mood": core.mood_label,
+        "trigger": trigger,
+        "stats": stats,
+        "timestamp": time.time()
+    }
+    await manager.broadcast(message)
+    # Queued for the notification worker; bursts of reflexes collapse into one toast
+    notifications.post(f"Ultron ({core.mood_label})", thought)
+
+notifications = NotificationDispatcher(hal.backends.notifier, suppressed=manager.attended)
+scheduler = ThoughtScheduler(core, brain, telemetry, publish_thought)
+manager.on_active = scheduler.resume
+manager.on_idle = scheduler.suspend
+
 @app.on_event("startup")
 async def startup_event():
-    """Starts the autonomous thought generator on server startup."""
-    asyncio.create_task(autonomous_thought_loop())
-    logging.info("Autonomous thought loop started.")
-
-async def autonomous_thought_loop():
-    """Continuously generates autonomous thoughts and broadcasts via WebSocket."""
-    last_cpu = 0
-    last_thought = time.time()
-    
-    while True:
-        try:
-            stats = hal.get_system_stats()
-            core.process_stimuli(stats, interaction_type="ignored")
-            now = time.time()
-            
-            time_since_last_thought = now - last_thought
-            time_since_user_action = now - core.last_user_interaction
-            
-            thought = None
-            trigger = None
-            
-            # PRIORITY 1: High CPU Reflex (Immediate reaction to system lag)
-            if (stats['cpu'] - last_cpu) > 50:
-                thought = brain.think_autonomous("high_cpu")
-                trigger = "high_cpu"
-                core.arousal = min(1.0, core.arousal + 0.15)
-                last_thought = now
-            
-            # PRIORITY 2: Boredom (User has been silent too long)
-            elif time_since_user_action > 300 and time_since_last_thought > 300:
-                if random.random() < 0.5:
-                    thought = brain.think_autonomous("bored")
-                    trigger = "boredom"
-                    core.dominance = min(1.0, core.dominance + 0.1)
-                    last_thought = now
-            
-            # PRIORITY 3: Random Thoughts (When user is active)
-            elif time_since_user_action < 300 and time_since_last_thought > random.randint(300, 600):
-                chance = 0.1 + (core.arousal * 0.2)
-                if random.random() < chance:
-                    thought = brain.think_autonomous("random")
-                    trigger = "random"
-                    last_thought = now
-                    core.arousal = max(0.0, core.arousal - 0.1)
-            
-            # Broadcast thought if generated
-            if thought and len(manager.active_connections) > 0:
-                message = {
-                    "type": "autonomous",
-                    "text": thought,
-                    "mood": core.mood_label,
-                    "trigger": trigger,
-                    "stats": stats,
-                    "timestamp": time.time()
-                }
-                await manager.broadcast(message)
-                
-                # Windows Toast Notification
-                try:
-                    notification_text = thought[:247] + "..." if len(thought) > 250 else thought
-                    notification.notify(
-                        title=f"Ultron ({core.mood_label})",
-                        message=notification_text,
-                        app_name="Ultron AI",
-                        timeout=5
-                    )
-                except Exception as e:
-                    logging.debug(f"Notification failed: {e}")
-            
-            last_cpu = stats['cpu']
-            await asyncio.sleep(5)
-            
-        except Exception as e:
-            logging.error(f"Autonomous loop error: {e}")
-            await asyncio.sleep(10)
+    """Starts telemetry sampling; thoughts are scheduled once a client connects."""
+    telemetry.start()
+    notifications.start()
+    logging.info("Telemetry sampler started.")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    scheduler.suspend()
+    telemetry.stop()
+    registry.shutdown()
+    await notifications.stop()
+    journal.close()
 
 # --- RUN SERVER ---
 if __name__ == "__main__":
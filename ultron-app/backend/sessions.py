@@ -0,0 +1,108 @@
+"""
+Ultron Sessions
+Per-client conversation state with LRU and idle eviction
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+MAX_SESSIONS = int(os.getenv("ULTRON_MAX_SESSIONS", "32"))
+SESSION_IDLE_TIMEOUT = float(os.getenv("ULTRON_SESSION_IDLE", "1800"))
+DEFAULT_SESSION = "default"
+
+
+class Session:
+    """
+    One client's emotional core + cognitive engine. Turns are serialized with
+    `async with session:` (or acquire()/release()), which also keeps the session
+    from being evicted while a turn is queued on it.
+    """
+    def __init__(self, session_id, core, brain):
+        self.id = session_id
+        self.core = core
+        self.brain = brain
+        self.lock = asyncio.Lock()
+        self.waiting = 0
+        self.last_seen = time.monotonic()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    @property
+    def busy(self):
+        # A woken waiter doesn't hold the lock until it runs, so waiters count as well
+        return self.lock.locked() or self.waiting > 0
+
+    async def acquire(self):
+        self.waiting += 1
+        try:
+            await self.lock.acquire()
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self.lock.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+class SessionManager:
+    """
+    Creates sessions on demand via `factory(session_id) -> (core, brain)`.
+    Least-recently-used sessions are dropped past `max_sessions`, idle ones after
+    `idle_timeout`. Pinned sessions (the default one) are never evicted.
+    """
+    def __init__(self, factory, max_sessions=MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.pinned = {}
+        self._sessions = OrderedDict()
+        self.evictions = 0
+
+    def pin(self, session_id, core, brain):
+        self.pinned[session_id] = Session(session_id, core, brain)
+        return self.pinned[session_id]
+
+    def get(self, session_id=None):
+        session_id = session_id or DEFAULT_SESSION
+        session = self.pinned.get(session_id)
+        if session is None:
+            session = self._sessions.get(session_id)
+            if session is None:
+                core, brain = self.factory(session_id)
+                session = Session(session_id, core, brain)
+                self._sessions[session_id] = session
+                logging.info(f"Session created: {session_id}")
+            self._sessions.move_to_end(session_id)
+            self._evict(keep=session_id)
+        session.touch()
+        return session
+
+    def peek(self, session_id=None):
+        """The existing session, or None. Never creates one and doesn't count as activity."""
+        session_id = session_id or DEFAULT_SESSION
+        return self.pinned.get(session_id) or self._sessions.get(session_id)
+
+    def _evict(self, keep=None):
+        cutoff = time.monotonic() - self.idle_timeout
+        # Never drop a session that is mid-turn or has one queued; it'll be reconsidered on the next call
+        for sid in [sid for sid, s in self._sessions.items() if s.last_seen < cutoff and not s.busy and sid != keep]:
+            del self._sessions[sid]
+            self.evictions += 1
+        excess = len(self._sessions) - self.max_sessions
+        if excess > 0:
+            # Least recently used first, skipping busy ones and the session being handed out
+            for sid in [sid for sid, s in self._sessions.items() if not s.busy and sid != keep][:excess]:
+                del self._sessions[sid]
+                self.evictions += 1
+
+    def stats(self):
+        return {"active": len(self._sessions) + len(self.pinned), "evictions": self.evictions, "max": self.max_sessions}
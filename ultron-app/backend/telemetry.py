@@ -0,0 +1,160 @@
+"""
+Ultron Telemetry
+Background psutil sampler with a latest-snapshot view and ring-buffer history
+"""
+import os
+import time
+import logging
+import threading
+from array import array
+import psutil
+from metrics import metrics
+
+TELEMETRY_INTERVAL = float(os.getenv("ULTRON_TELEMETRY_INTERVAL", "1.0"))
+TELEMETRY_HISTORY = int(os.getenv("ULTRON_TELEMETRY_HISTORY", "300"))
+BATTERY_EVERY = 10  # sensors_battery is slow on some laptops; poll it every Nth sample
+CPU_AVG_WINDOW = 5.0
+CPU_BASELINE_WINDOW = 60.0
+
+
+class RingBuffer:
+    """Fixed-size float history backed by a flat array; pushes are O(1) and never allocate."""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = array('d', [0.0] * capacity)
+        self._next = 0
+        self.count = 0
+
+    def push(self, value):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self, n):
+        """Most recent n values, oldest first."""
+        n = min(n, self.count)
+        start = (self._next - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._data[start:start + n].tolist()
+        return (self._data[start:] + self._data[:(start + n) % self.capacity]).tolist()
+
+    def mean(self, n):
+        values = self.last(n)
+        return sum(values) / len(values) if values else 0.0
+
+
+class TelemetrySampler:
+    """
+    Owns all psutil polling. Readers call snapshot(), which returns the latest
+    immutable dict without locking: the sampler thread swaps the reference in
+    one assignment.
+
+    The thread only samples on its interval while someone watch()es; with no
+    watchers it sleeps until one subscribes, and snapshot() takes a fresh sample
+    inline when the latest one is older than the interval.
+    """
+    def __init__(self, interval=TELEMETRY_INTERVAL, capacity=TELEMETRY_HISTORY):
+        self.interval = interval
+        self.cpu = RingBuffer(capacity)
+        self.ram = RingBuffer(capacity)
+        self.samples = 0
+        self._battery = (100, True)
+        self._stop = threading.Event()
+        self._demand = threading.Event()  # Set while there are watchers
+        self._sample_lock = threading.Lock()
+        self._thread = None
+        self._watches = []
+        psutil.cpu_percent(interval=None)  # Prime the delta counter
+        self._snapshot = self.sample()
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop.clear()
+        if not self._watches: self._demand.clear()
+        self._thread = threading.Thread(target=self._run, name="ultron-telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._demand.set()  # Wake a paused thread so it can exit
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._demand.is_set():
+                self._demand.wait()
+                continue
+            if self._stop.wait(self.interval): break
+            if not self._refresh(): continue
+            self._check_watches(self._snapshot)
+
+    def _refresh(self, blocking=True):
+        if not self._sample_lock.acquire(blocking): return False
+        try:
+            with metrics.span("telemetry_sample"):
+                self._snapshot = self.sample()
+            return True
+        except Exception as e:
+            logging.error(f"Telemetry sample failed: {e}")
+            return False
+        finally:
+            self._sample_lock.release()
+
+    def watch(self, condition, callback):
+        """
+        Calls callback(snapshot) from the sampler thread each time condition(snapshot)
+        turns true (edge-triggered). Returns a handle for unwatch().
+        """
+        handle = [condition, callback, False]
+        self._watches.append(handle)
+        self._demand.set()
+        return handle
+
+    def unwatch(self, handle):
+        self._watches = [w for w in self._watches if w is not handle]
+        if not self._watches: self._demand.clear()
+
+    def _check_watches(self, snapshot):
+        for handle in list(self._watches):
+            condition, callback, was_active = handle
+            active = bool(condition(snapshot))
+            handle[2] = active
+            if active and not was_active:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    logging.error(f"Telemetry watch callback failed: {e}")
+
+    def sample(self):
+        cpu = psutil.cpu_percent(interval=None)
+        ram = psutil.virtual_memory().percent
+        if self.samples % BATTERY_EVERY == 0:
+            try:
+                batt = psutil.sensors_battery()
+                self._battery = (batt.percent, batt.power_plugged) if batt else (100, True)
+            except Exception:
+                pass
+        self.samples += 1
+        self.cpu.push(cpu)
+        self.ram.push(ram)
+        return {
+            "cpu": cpu,
+            "ram": ram,
+            "battery": self._battery[0],
+            "plugged": self._battery[1],
+            "cpu_avg": round(self.cpu_average(CPU_AVG_WINDOW), 1),
+            "cpu_baseline": round(self.cpu_average(CPU_BASELINE_WINDOW), 1),
+            "timestamp": time.time()
+        }
+
+    def snapshot(self):
+        # Paused: sample on demand, unless another thread is already doing so
+        if not self._demand.is_set() and time.time() - self._snapshot["timestamp"] >= self.interval:
+            self._refresh(blocking=False)
+        return self._snapshot
+
+    def cpu_average(self, seconds):
+        return self.cpu.mean(max(1, int(seconds / self.interval)))
+
+    def history(self, seconds=None):
+        n = self.cpu.count if seconds is None else max(1, int(seconds / self.interval))
+        return {"interval": self.interval, "cpu": self.cpu.last(n), "ram": self.ram.last(n)}
@@ -0,0 +1,61 @@
+"""
+Shared fixtures: the local LLM stub, and server.app running against it with fake hardware
+"""
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(TESTS_DIR)
+sys.path[:0] = [BACKEND_DIR, os.path.join(BACKEND_DIR, "bench")]
+
+from benchmark import ServerThread, free_port, configure_environment
+from llm_stub import StubConfig, create_stub
+
+STUB_OPTIONS = dict(latency=0.2, token_rate=400.0, reply_tokens=20, jitter=0.0)
+STUB_PORT = free_port()
+
+# Backend modules read their paths and limits at import time, so this runs before any test module imports them
+configure_environment(f"http://127.0.0.1:{STUB_PORT}/v1", tempfile.mkdtemp(prefix="ultron-test-"),
+                      SimpleNamespace(status_interval=0.2, rpm=0, tpm=0))
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    stub = ServerThread(create_stub(StubConfig(**STUB_OPTIONS)), STUB_PORT)
+    stub.start()
+    stub.wait_started()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def stub(stub_server):
+    """The stub's live config; tests may change it, and it is reset afterwards."""
+    config = stub_server.server.config.app.state.config
+    yield config
+    config.__dict__.update(vars(StubConfig(**STUB_OPTIONS)))
+
+
+@pytest.fixture(scope="session")
+def stub_url(stub_server):
+    return f"http://127.0.0.1:{stub_server.port}/v1"
+
+
+@pytest.fixture(scope="session")
+def server(stub_server):
+    """The `server` module, running against the stub with fake hardware."""
+    import server
+    return server
+
+
+@pytest.fixture(scope="session")
+def backend(server):
+    """Base URL of server.app served by uvicorn on its own thread."""
+    thread = ServerThread(server.app, free_port())
+    thread.start()
+    thread.wait_started()
+    yield f"http://127.0.0.1:{thread.port}"
+    thread.stop()
@@ -0,0 +1,31 @@
+"""
+Document analyzer: large pastes are planned to fit the LLM rate limits instead of queueing behind them
+"""
+import asyncio
+from llm_gateway import estimate_tokens
+from doc_analyzer import DocumentAnalyzer, DOC_RATE_SHARE, CHUNK_TOKENS, DOC_MAX_CHUNKS
+
+
+def analyze(text, **limits):
+    charged = []
+
+    async def complete(cacheable=False, messages=None, max_tokens=None):
+        # What the scheduler takes from the buckets at admission
+        charged.append(estimate_tokens(messages, {"max_tokens": max_tokens}))
+        return "status=500 from gateway " * 10
+
+    analyzer = DocumentAnalyzer(complete, **limits)
+    asyncio.run(analyzer.analyze(text, lambda t: t))
+    return charged, analyzer.last_run
+
+
+def test_a_large_paste_fits_within_the_rate_share():
+    charged, run = analyze("12:00 ERROR [gateway] request took 900ms status=500\n" * 20000, tpm=12000, rpm=30)
+    assert len(charged) <= 30 * DOC_RATE_SHARE
+    assert sum(charged) <= 12000 * DOC_RATE_SHARE
+    assert run["analyzed"] > 1 and run["chunk_tokens"] < CHUNK_TOKENS
+
+
+def test_unlimited_or_small_texts_keep_the_default_plan():
+    assert DocumentAnalyzer(None).plan(4 << 20) == (CHUNK_TOKENS, DOC_MAX_CHUNKS)
+    assert DocumentAnalyzer(None, tpm=12000, rpm=30).plan(CHUNK_TOKENS * 3 * 2)[0] == CHUNK_TOKENS
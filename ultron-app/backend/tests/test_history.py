@@ -0,0 +1,94 @@
+"""
+Conversation history: token-bounded window, summaries, and the cap on turns waiting to be summarized
+"""
+import asyncio
+import threading
+from types import SimpleNamespace
+from history import ConversationHistory, count_tokens
+from llm_gateway import LLMError
+from metrics import metrics
+from ultron_core import CognitiveEngine
+
+
+async def shed(previous_summary, turns):
+    raise LLMError("LLM busy; background call shed")
+
+
+def pending_tokens(history):
+    return sum(cost for _, _, cost in history._pending)
+
+
+def test_evicted_turns_are_folded_into_the_summary():
+    seen = []
+
+    async def summarize(previous_summary, turns):
+        seen.extend(turns)
+        return f"{len(seen)} turns summarized"
+
+    history = ConversationHistory(budget=50, summarize=summarize)
+    for n in range(10): history.add_turn(f"question {n} " * 5, f"answer {n} " * 5)
+    assert history.tokens <= 50 and history.needs_summary
+    asyncio.run(history.compact())
+    assert seen and seen[0][0].startswith("question 0")
+    assert history.summary == f"{len(seen)} turns summarized" and not history.needs_summary
+    assert history.messages()[0]["role"] == "system"
+
+
+def test_pending_turns_stay_bounded_when_summaries_keep_failing():
+    history = ConversationHistory(budget=50, summarize=shed, pending_cap=200)
+    for n in range(200):
+        history.add_turn(f"question {n} " * 5, f"answer {n} " * 5)
+        asyncio.run(history.compact())
+    assert pending_tokens(history) <= 200
+    assert history.dropped > 0
+    # The newest evicted turns are the ones kept
+    assert history._pending[-1][0].startswith("question 19")
+
+
+def test_an_oversized_turn_is_truncated_to_the_cap():
+    history = ConversationHistory(budget=10, summarize=shed, pending_cap=100)
+    history.add_turn("paste " * 500, "analysis " * 500)
+    history.add_turn("hi", "hello")
+    assert len(history._pending) == 1
+    user_text, reply_text, cost = history._pending[0]
+    assert cost == count_tokens(user_text) + count_tokens(reply_text) <= 110
+
+
+def test_background_summary_stays_out_of_the_turn_breakdown():
+    async def summarize(previous_summary, turns):
+        with metrics.span("llm"):
+            await asyncio.sleep(0.01)
+        return "summary"
+
+    history = ConversationHistory(budget=50, summarize=summarize)
+    for n in range(10): history.add_turn(f"question {n} " * 5, f"answer {n} " * 5)
+    brain = SimpleNamespace(history=history, _background=set())
+    brain._in_background = lambda coro: CognitiveEngine._in_background(brain, coro)
+
+    async def turn():
+        with metrics.collect() as timings, metrics.span("request"):
+            CognitiveEngine._schedule_summary(brain)
+        await asyncio.gather(*brain._background)
+        return timings
+
+    timings = asyncio.run(turn())
+    assert history.summary == "summary"
+    assert set(timings) == {"request"}
+
+
+def test_remembered_facts_are_written_off_the_event_loop():
+    threads = []
+    memory = SimpleNamespace(add_memory=lambda text: threads.append((threading.get_ident(), text)))
+    brain = SimpleNamespace(history=ConversationHistory(budget=500, summarize=shed), memory=memory, _background=set())
+    brain._schedule_summary = lambda: CognitiveEngine._schedule_summary(brain)
+    brain._in_background = lambda coro: CognitiveEngine._in_background(brain, coro)
+
+    async def turn():
+        CognitiveEngine._commit_turn(brain, "remember that my cat is called Tom", "Noted.")
+        assert threads == []  # Not written inline
+        await asyncio.gather(*brain._background)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(turn())
+    assert [text for _, text in threads] == ["User said: remember that my cat is called Tom"]
+    assert threads[0][0] != loop_thread
@@ -0,0 +1,31 @@
+"""
+Fast-path router: compound commands are split before greedy patterns get a chance to swallow them
+"""
+from types import SimpleNamespace
+from ultron_core import IntentRouter
+
+
+def route(text, apps=("chrome", "rock and roll racing")):
+    return IntentRouter(SimpleNamespace(app_index=set(apps))).route(text)
+
+
+def tools(intent):
+    if intent is None: return None
+    return [(c["tool"], c["params"]) for c in intent["calls"]] if intent["tool"] == "multi" else [(intent["tool"], intent["params"])]
+
+
+def test_greedy_patterns_do_not_swallow_the_next_command():
+    assert tools(route("search for cats and open chrome")) == [("web_search", {"query": "cats", "site_name": ""}), ("open_app", {"name": "chrome"})]
+    assert tools(route("remember that my pin is 1234 and open chrome")) == [("memorize", {"text": "my pin is 1234"}), ("open_app", {"name": "chrome"})]
+    assert tools(route("google python then volume 20")) == [("web_search", {"query": "python", "site_name": ""}), ("set_volume", {"value": 20})]
+
+
+def test_a_part_that_does_not_route_sends_everything_to_the_llm():
+    assert route("search for salt and pepper") is None
+    assert route("remember that I like cats and dogs") is None
+    assert route("search for cats and open spotify") is None  # Not in the index
+
+
+def test_single_commands_and_app_names_with_and():
+    assert tools(route("volume 30")) == [("set_volume", {"value": 30})]
+    assert tools(route("open rock and roll racing")) == [("open_app", {"name": "rock and roll racing"})]
@@ -0,0 +1,44 @@
+"""
+Model-produced intents: malformed or unknown-tool responses fall back to conversation instead of failing the turn
+"""
+import json
+import httpx
+import pytest
+import ultron_core
+from ultron_core import normalize_intent
+
+MALFORMED = [
+    '[{"tool": "set_volume"}]',                        # Not an object
+    '{"params": {"value": 30}}',                       # No tool
+    '{"tool": null}',
+    '{"tool": "launch_missiles", "params": {}}',       # Not a registered tool
+    '{"tool": "multi", "calls": [{"tool": "nope"}, 5]}',
+]
+
+
+def test_normalize_keeps_only_registered_tools():
+    assert normalize_intent({"tool": "set_volume", "params": {"value": 30}}) == {"tool": "set_volume", "params": {"value": 30}}
+    assert normalize_intent({"tool": "set_volume", "params": [30]}) == {"tool": "set_volume", "params": {}}
+    assert normalize_intent({"tool": "none", "reply": " hi "}) == {"tool": "none", "reply": "hi"}
+    assert normalize_intent({"tool": "multi", "calls": [{"tool": "check_status"}, {"tool": "nope"}]}) == \
+        {"tool": "multi", "calls": [{"tool": "check_status", "params": {}}]}
+    for raw in MALFORMED:
+        assert normalize_intent(json.loads(raw)) == {"tool": "none"}, raw
+
+
+@pytest.mark.parametrize("mode", ["fused", "split"])
+@pytest.mark.parametrize("raw", MALFORMED)
+def test_bad_model_intents_fall_back_to_chat(backend, server, monkeypatch, mode, raw):
+    monkeypatch.setattr(ultron_core, "INTENT_MODE", mode)
+    session_id = f"bad-intent-{mode}"
+    brain = server.sessions.get(session_id).brain
+
+    async def complete(**kwargs):
+        # Intent (and fused) calls ask for JSON; the plain chat call doesn't
+        return raw if kwargs.get("response_format") else "Plain reply."
+
+    monkeypatch.setattr(brain, "_acomplete", complete)
+    res = httpx.post(f"{backend}/chat", json={"text": "do the thing you do", "session_id": session_id}, timeout=10)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["success"] and body["tool_used"] == "none" and body["response"] == "Plain reply."
@@ -0,0 +1,105 @@
+"""
+Gateway fault handling against the stub: 429/5xx retries, Retry-After, deadlines, fallback and hedging
+"""
+import time
+import asyncio
+import pytest
+from llm_gateway import LLMGateway, LLMError
+from llm_scheduler import LLMScheduler
+
+MESSAGES = [{"role": "user", "content": "status report"}]
+
+
+def make_gateway(stub_url, **options):
+    options.setdefault("timeout", 5.0)
+    options.setdefault("retries", 2)
+    return LLMGateway("test", stub_url, "primary", fallback_model="fallback", max_concurrency=8,
+                      scheduler=LLMScheduler(max_concurrency=8, rpm=0, tpm=0), **options)
+
+
+def call(stub_url, messages=MESSAGES, fallback=False, **options):
+    """Runs one completion on a fresh gateway. Returns (result or LLMError, gateway, seconds)."""
+    async def go():
+        gateway = make_gateway(stub_url, **options)
+        start = time.perf_counter()
+        try:
+            result = await gateway.acomplete(messages=messages, fallback=fallback, max_tokens=20)
+        except LLMError as e:
+            result = e
+        return result, gateway, time.perf_counter() - start
+    return asyncio.run(go())
+
+
+@pytest.fixture
+def requests_made(stub_server):
+    """Counts upstream requests made during the test."""
+    state = stub_server.server.config.app.state
+    before = state.requests
+    return lambda: state.requests - before
+
+
+def test_rate_limits_are_retried(stub_url, stub, requests_made):
+    stub.faults = [429, 429]
+    result, gateway, _ = call(stub_url)
+    assert isinstance(result, str) and result
+    assert gateway.counts["retries"] == 2
+    assert requests_made() == 3
+
+
+def test_retry_after_is_honoured(stub_url, stub):
+    stub.faults, stub.retry_after = [429], 0.6
+    result, gateway, seconds = call(stub_url)
+    assert isinstance(result, str)
+    assert seconds >= 0.6
+
+
+def test_server_errors_exhaust_retries(stub_url, stub, requests_made):
+    stub.faults = [500, 502, 503]
+    result, gateway, _ = call(stub_url)
+    assert isinstance(result, LLMError)
+    assert "gave up after 3 attempt(s)" in str(result)
+    assert requests_made() == 3
+    assert gateway.counts["failures"] == 1
+
+
+def test_bad_requests_are_not_retried(stub_url, stub, requests_made):
+    stub.context_window = 10
+    result, gateway, _ = call(stub_url, messages=[{"role": "user", "content": "word " * 200}])
+    assert isinstance(result, LLMError)
+    assert requests_made() == 1
+    assert gateway.counts["retries"] == 0
+
+
+def test_stalled_provider_fails_at_the_deadline(stub_url, stub):
+    stub.faults, stub.stall = ["stall"], 2.0
+    result, _, seconds = call(stub_url, timeout=0.5)
+    assert isinstance(result, LLMError)
+    assert 0.4 < seconds < 1.5
+
+
+def test_fallback_model_answers_when_the_primary_fails(stub_url, stub):
+    stub.fail_models, stub.latency = {"primary"}, 0.01
+    result, gateway, _ = call(stub_url, fallback=True)
+    assert isinstance(result, str) and result
+    assert gateway.counts["fallbacks"] == 1
+
+    result, _, _ = call(stub_url, fallback=False)
+    assert isinstance(result, LLMError)
+
+
+def test_hedge_wins_over_a_stalled_attempt(stub_url, stub):
+    stub.latency, stub.stall = 0.02, 2.0
+
+    async def go():
+        gateway = make_gateway(stub_url, hedge_percentile=90)
+        for i in range(20):
+            await gateway.acomplete(messages=[{"role": "user", "content": f"warmup {i}"}], max_tokens=5)
+        stub.faults = ["stall"]
+        start = time.perf_counter()
+        result = await gateway.acomplete(messages=MESSAGES, max_tokens=5)
+        return result, gateway, time.perf_counter() - start
+
+    result, gateway, seconds = asyncio.run(go())
+    assert result
+    assert seconds < 1.0
+    assert gateway.counts["hedges"] == 1 and gateway.counts["hedge_wins"] == 1
@@ -0,0 +1,102 @@
+"""
+Memory log: legacy migration, torn-tail recovery and deduplicating compaction
+"""
+import json
+import time
+import threading
+import memory_store
+from memory_store import MemorySystem, LEGACY_MEMORY_FILE, normalize_fact
+
+
+def read_log(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)["fact"] for line in f]
+
+
+def test_legacy_file_is_migrated_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    facts = ["[2025-01-02 10:00] User likes coffee", "[2025-01-03 11:30] User's cat is called Max"]
+    (tmp_path / LEGACY_MEMORY_FILE).write_text(json.dumps({"facts": facts}))
+
+    memory = MemorySystem("memory.jsonl")
+    assert memory.facts == facts
+    assert read_log(tmp_path / "memory.jsonl") == facts
+    assert "cat is called Max" in memory.get_context("what is my cat called")
+
+    # Later facts go to the log only; the legacy file is never read again
+    memory.add_memory("User prefers dark mode")
+    (tmp_path / LEGACY_MEMORY_FILE).write_text(json.dumps({"facts": ["[2025-01-04 09:00] stale"]}))
+    reloaded = MemorySystem("memory.jsonl")
+    assert reloaded.facts[:2] == facts and reloaded.facts[2].endswith("User prefers dark mode")
+    assert len(reloaded.facts) == 3
+
+
+def test_torn_tail_is_skipped_and_terminated(tmp_path):
+    path = tmp_path / "memory.jsonl"
+    path.write_text(json.dumps({"fact": "[2025-01-02 10:00] intact"}) + "\n" + '{"fact": "[2025-01-02 10')
+    memory = MemorySystem(str(path))
+    assert memory.facts == ["[2025-01-02 10:00] intact"]
+    memory.add_memory("after the crash")
+    assert MemorySystem(str(path)).facts[-1].endswith("after the crash")
+
+
+def test_duplicates_are_detected_on_the_fact_text():
+    assert normalize_fact("[2025-01-02 10:00] User likes  Coffee.") == normalize_fact("[2026-03-04 18:45] user likes coffee")
+    assert normalize_fact("[2025-01-02 10:00] User likes tea") != normalize_fact("[2025-01-02 10:00] User likes coffee")
+
+
+def test_repeated_facts_trigger_compaction_on_append(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_store, "COMPACT_MIN_WASTE", 4)
+    path = str(tmp_path / "memory.jsonl")
+    memory = MemorySystem(path)
+    for n in range(4): memory.add_memory(f"distinct fact number {n}")
+    for _ in range(6): memory.add_memory("User likes coffee")
+
+    deadline = time.monotonic() + 5
+    while memory.compactions == 0 and time.monotonic() < deadline: time.sleep(0.01)
+    assert memory.compactions >= 1
+    with memory._lock:
+        assert memory.duplicates <= 1
+    # The latest copy of each fact survives, in order
+    log = read_log(path)
+    assert [normalize_fact(f) for f in log][:4] == [f"distinct fact number {n}" for n in range(4)]
+    assert sum(1 for f in log if normalize_fact(f) == "user likes coffee") <= 2
+    assert MemorySystem(path).facts == memory.facts
+
+
+def test_concurrent_adds_compactions_and_searches(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_store, "COMPACT_MIN_WASTE", 4)
+    memory = MemorySystem(str(tmp_path / "memory.jsonl"))
+    errors, stop = [], threading.Event()
+
+    def guarded(fn):
+        def run():
+            try:
+                fn()
+            except Exception as e:
+                errors.append(repr(e))
+        return run
+
+    def writer(n):
+        for i in range(60): memory.add_memory(f"fact {i % 20} from writer {n} about coffee")
+
+    def reader():
+        while not stop.is_set():
+            context = memory.get_context("coffee writer 1")
+            assert context.startswith(("LONG_TERM_MEMORY", "NO PRIOR MEMORY"))
+
+    def compactor():
+        while not stop.is_set(): memory.compact()
+
+    writers = [threading.Thread(target=guarded(lambda n=n: writer(n))) for n in range(3)]
+    others = [threading.Thread(target=guarded(reader)) for _ in range(3)] + [threading.Thread(target=guarded(compactor))]
+    for t in writers + others: t.start()
+    for t in writers: t.join()
+    stop.set()
+    for t in others: t.join()
+
+    assert not errors, errors[:3]
+    memory.compact()
+    # 3 writers x 20 distinct facts survive, in the log and in the index
+    assert len(memory.facts) == 60 and sorted(read_log(tmp_path / "memory.jsonl")) == sorted(memory.facts)
+    assert len(memory.index.doc_lengths) == 60
@@ -0,0 +1,90 @@
+"""
+Notification dispatcher with the fake notifier: bursts coalesce, the rate limit holds, focus suppresses
+"""
+import time
+import asyncio
+from hal_backends import FakeNotifier
+from notifications import NotificationDispatcher
+
+
+class TimedNotifier(FakeNotifier):
+    def __init__(self):
+        super().__init__()
+        self.times = []
+
+    def notify(self, title, message):
+        self.times.append(time.monotonic())
+        return super().notify(title, message)
+
+
+def run(dispatcher, script):
+    async def go():
+        dispatcher.start()
+        try:
+            await script()
+        finally:
+            await dispatcher.stop()
+    asyncio.run(go())
+
+
+def test_a_burst_of_thoughts_becomes_one_toast():
+    notifier = TimedNotifier()
+    dispatcher = NotificationDispatcher(notifier, window=0.05, min_interval=0)
+
+    async def script():
+        for n in range(10): dispatcher.post("Ultron (MANIC)", f"thought {n}")
+        await asyncio.sleep(0.3)
+
+    run(dispatcher, script)
+    assert notifier.sent == [("Ultron (MANIC) (+9 more)", "thought 9")]
+    assert dispatcher.counts["posted"] == 10 and dispatcher.counts["delivered"] == 1
+    assert dispatcher.counts["merged"] == 9
+
+
+def test_rate_limit_holds_later_toasts_back_and_merges_them():
+    notifier = TimedNotifier()
+    dispatcher = NotificationDispatcher(notifier, window=0.02, min_interval=0.4)
+
+    async def script():
+        dispatcher.post("Ultron", "first")
+        await asyncio.sleep(0.15)
+        assert len(notifier.sent) == 1
+        dispatcher.post("Ultron", "second")
+        dispatcher.post("Ultron", "third")
+        await asyncio.sleep(0.1)
+        assert len(notifier.sent) == 1  # Still inside min_interval
+        await asyncio.sleep(0.4)
+
+    run(dispatcher, script)
+    assert notifier.sent == [("Ultron", "first"), ("Ultron (+1 more)", "third")]
+    assert notifier.times[1] - notifier.times[0] >= 0.4 - 0.01
+
+
+def test_toasts_are_dropped_while_ultron_has_focus():
+    notifier = TimedNotifier()
+    focused = [True]
+    dispatcher = NotificationDispatcher(notifier, suppressed=lambda: focused[0], window=0.02, min_interval=0)
+
+    async def script():
+        for n in range(3): dispatcher.post("Ultron", f"seen already {n}")
+        await asyncio.sleep(0.15)
+        focused[0] = False
+        dispatcher.post("Ultron", "user looked away")
+        await asyncio.sleep(0.15)
+
+    run(dispatcher, script)
+    assert notifier.sent == [("Ultron", "user looked away")]
+    assert dispatcher.counts["suppressed"] == 3 and dispatcher.counts["delivered"] == 1
+
+
+def test_queue_overflow_drops_the_oldest():
+    notifier = TimedNotifier()
+    dispatcher = NotificationDispatcher(notifier, queue_size=4, window=0.02, min_interval=0)
+    for n in range(10): dispatcher.post("Ultron", f"thought {n}")  # Before the worker starts
+
+    async def script():
+        await asyncio.sleep(0.15)
+
+    run(dispatcher, script)
+    assert notifier.sent == [("Ultron (+3 more)", "thought 9")]
+    assert dispatcher.counts["dropped"] == 6
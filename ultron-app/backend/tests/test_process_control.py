@@ -0,0 +1,97 @@
+"""
+Process table: incremental refresh, a recycled pid is re-read rather than keeping the old name,
+and terminate escalates to kill on real children
+"""
+import os
+import sys
+import time
+import signal
+import subprocess
+import psutil
+import pytest
+import process_control
+from process_control import ProcessController, compile_blocklist
+
+
+class FakeProcess:
+    def __init__(self, os_, pid):
+        if pid not in os_.procs: raise psutil.NoSuchProcess(pid)
+        self.pid, self._os = pid, os_
+        self._created, self._name = os_.procs[pid]
+
+    def create_time(self):
+        return self._created
+
+    def name(self):
+        self._os.name_reads += 1
+        return self._name
+
+
+class FakeOS:
+    """pid -> (create_time, name); counts name() lookups."""
+    def __init__(self, procs):
+        self.procs = dict(procs)
+        self.name_reads = 0
+
+    def pids(self):
+        return list(self.procs)
+
+    def process(self, pid):
+        return FakeProcess(self, pid)
+
+
+def controller(monkeypatch, procs):
+    fake = FakeOS(procs)
+    monkeypatch.setattr(process_control.psutil, "pids", fake.pids)
+    monkeypatch.setattr(process_control.psutil, "Process", fake.process)
+    return ProcessController(blocklist=compile_blocklist(["discord.exe"])), fake
+
+
+def test_refresh_only_reads_names_of_new_processes(monkeypatch):
+    pc, fake = controller(monkeypatch, {1: (100.0, "init"), 2: (200.0, "bash")})
+    assert sorted(pc.refresh()) == [1, 2]
+    assert pc.refresh() == [] and fake.name_reads == 2
+    fake.procs[3] = (300.0, "Discord.exe")
+    del fake.procs[2]
+    assert pc.refresh() == [3] and fake.name_reads == 3
+    assert sorted(pc._table) == [1, 3]
+
+
+def test_recycled_pid_is_reread(monkeypatch):
+    pc, fake = controller(monkeypatch, {1: (100.0, "init"), 42: (200.0, "bash")})
+    pc.refresh()
+    assert pc.find() == []
+    # bash exits between scans and discord is handed the same pid
+    fake.procs[42] = (250.0, "discord.exe")
+    assert pc.refresh() == [42]
+    assert [p.pid for p in pc.find()] == [42]
+    assert pc._table[42][:2] == (250.0, "discord.exe")
+
+
+STUBBORN = "import signal, sys, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); print('ready', flush=True); time.sleep(60)"
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX signals")
+def test_terminate_kills_a_child_that_ignores_sigterm():
+    polite = subprocess.Popen(["sleep", "60"])
+    stubborn = subprocess.Popen([sys.executable, "-c", STUBBORN], stdout=subprocess.PIPE, text=True)
+    try:
+        assert stubborn.stdout.readline().strip() == "ready"  # SIGTERM is ignored from here on
+        pc = ProcessController(timeout=0.5)
+        pc.refresh()
+        procs = [psutil.Process(polite.pid), psutil.Process(stubborn.pid)]
+        names = [pc._table[p.pid][1] for p in procs]
+        start = time.monotonic()
+        ended, alive = pc.terminate(procs)
+        elapsed = time.monotonic() - start
+    finally:
+        for child in (polite, stubborn):
+            if child.poll() is None: child.kill()
+            child.wait()
+        stubborn.stdout.close()
+
+    assert sorted(ended) == sorted(names) and alive == []
+    assert pc.terminated_total == 2 and pc.stats()["terminated"] == 2
+    assert procs[0].returncode == -signal.SIGTERM and procs[1].returncode == -signal.SIGKILL
+    assert not any(p.is_running() for p in procs)
+    assert 0.5 <= elapsed < 3  # One terminate timeout, then the kill
@@ -0,0 +1,28 @@
+"""
+Prompt budgets: each call type stays within PROMPT_BUDGETS, and the fused prompt's leading system message is stable
+"""
+import pytest
+from prompt_budget import representative, SAMPLE_INPUT
+from prompts import PROMPT_BUDGETS
+from memory_store import MemorySystem
+from ultron_core import HardwareInterface, EmotionalCore, CognitiveEngine, prompt_library
+
+
+@pytest.fixture
+def brain(tmp_path):
+    return CognitiveEngine(EmotionalCore(), HardwareInterface(), memory=MemorySystem(str(tmp_path / "memory.jsonl")))
+
+
+@pytest.mark.parametrize("kind", sorted(PROMPT_BUDGETS))
+def test_prompt_fits_its_budget(brain, kind):
+    tokens = representative(brain, prompt_library)[kind]
+    assert tokens <= PROMPT_BUDGETS[kind], f"{kind}: {tokens} tokens > budget {PROMPT_BUDGETS[kind]}"
+
+
+def test_fused_prefix_survives_mood_memory_and_history(brain):
+    first = brain._fused_messages(SAMPLE_INPUT)[0]["content"]
+    brain.core.process_stimuli(brain.hal.get_system_stats(), "insult")
+    brain.memory.add_memory("User likes coffee")
+    for n in range(6):
+        brain.history.add_turn(f"question {n} about the weather", f"answer {n}: the weather is beneath me")
+    assert brain._fused_messages(SAMPLE_INPUT)[0]["content"] == first
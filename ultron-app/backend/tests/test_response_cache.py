@@ -0,0 +1,91 @@
+"""
+Response cache: TTL expiry, LRU eviction, SQLite persistence, counters, and that fallback answers are not cached
+"""
+import asyncio
+import response_cache
+import ultron_core
+from response_cache import ResponseCache, make_key
+from ultron_core import HardwareInterface, EmotionalCore, CognitiveEngine, MODEL_ID, INTENT_FALLBACK_MODEL
+from memory_store import MemorySystem
+from llm_gateway import LLMGateway
+from llm_scheduler import LLMScheduler
+
+MESSAGES = [{"role": "user", "content": "define entropy"}]
+
+
+class FakeTime:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def fake_time(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = fake_time(monkeypatch)
+    cache = ResponseCache(ttl=60)
+    cache.put("a", "alpha")
+    cache.put("b", "beta", ttl=600)
+    clock.now += 61
+    assert cache.get("a") is None and cache.get("b") == "beta"
+    assert cache.stats()["expirations"] == 1 and cache.stats()["size"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "alpha")
+    cache.put("b", "beta")
+    assert cache.get("a") == "alpha"  # b is now the oldest
+    cache.put("c", "gamma")
+    assert cache.get("b") is None and cache.get("a") == "alpha" and cache.get("c") == "gamma"
+    assert cache.evictions == 1
+
+
+def test_counters_and_hit_rate():
+    cache = ResponseCache()
+    cache.put("a", "alpha")
+    for key in ("a", "a", "a", "missing"): cache.get(key)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (3, 1, 0.75)
+    assert not stats["persistent"]
+
+
+def test_sqlite_entries_survive_a_restart(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.db")
+    clock = fake_time(monkeypatch)
+    first = ResponseCache(ttl=60, path=path)
+    first.put("kept", "still here", ttl=600)
+    first.put("stale", "gone soon")
+    clock.now += 61
+
+    second = ResponseCache(ttl=60, path=path)  # Expired rows are purged on open
+    assert second.stats()["persistent"] and second.stats()["size"] == 0
+    assert second.get("kept") == "still here" and second.get("stale") is None
+    assert second._db.execute("SELECT key FROM responses").fetchall() == [("kept",)]
+
+
+def test_only_the_primary_models_answers_are_cached(stub, stub_url, tmp_path, monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(ultron_core, "response_cache", cache)
+    # Its own gateway: the shared one's connection pool belongs to the server's loop
+    monkeypatch.setattr(ultron_core, "gateway", LLMGateway("test", stub_url, MODEL_ID, fallback_model=INTENT_FALLBACK_MODEL,
+                                                           retries=0, scheduler=LLMScheduler(max_concurrency=4, rpm=0, tpm=0)))
+    brain = CognitiveEngine(EmotionalCore(), HardwareInterface(), memory=MemorySystem(str(tmp_path / "memory.jsonl")))
+    stub.latency = 0.01
+    key = make_key(MODEL_ID, MESSAGES, temperature=0)
+
+    async def go():
+        stub.fail_models = {MODEL_ID}
+        assert await brain._acomplete(fallback=True, messages=MESSAGES, temperature=0)
+        assert cache.stats()["size"] == 0
+        stub.fail_models = set()
+        return await brain._acomplete(fallback=True, messages=MESSAGES, temperature=0)
+
+    answer = asyncio.run(go())
+    assert cache.get(key) == answer
@@ -0,0 +1,72 @@
+"""
+Session manager under concurrency: turns serialized per session, eviction never drops a session mid-turn
+"""
+import random
+import asyncio
+import httpx
+from sessions import SessionManager, DEFAULT_SESSION
+
+SESSIONS = 16
+CLIENTS_PER_SESSION = 3
+TURNS = 10
+
+
+def test_turns_are_serialized_and_busy_sessions_survive_eviction():
+    rng = random.Random(5)
+    manager = SessionManager(lambda sid: (object(), []), max_sessions=4, idle_timeout=3600)
+    in_turn, problems = {}, []
+
+    async def client(sid):
+        for _ in range(TURNS):
+            session = manager.get(sid)
+            # Only busy sessions (plus the one just handed out) may keep the manager over its cap
+            busy = sum(1 for s in manager._sessions.values() if s.busy)
+            if len(manager._sessions) > manager.max_sessions + busy + 1: problems.append("over capacity")
+            async with session:
+                in_turn[sid] = in_turn.get(sid, 0) + 1
+                if in_turn[sid] > 1: problems.append(f"{sid}: overlapping turns")
+                await asyncio.sleep(rng.uniform(0, 0.003))
+                if manager.peek(sid) is not session: problems.append(f"{sid}: evicted mid-turn")
+                session.brain.append(len(session.brain))
+                in_turn[sid] -= 1
+            await asyncio.sleep(0)
+
+    async def stress():
+        await asyncio.gather(*(client(f"s{n}") for n in range(SESSIONS) for _ in range(CLIENTS_PER_SESSION)))
+
+    asyncio.run(stress())
+    assert not problems, problems[:5]
+    assert manager.evictions > 0
+    # Each surviving session saw its turns in order, with none lost to a concurrent writer
+    for session in manager._sessions.values():
+        assert session.brain == list(range(len(session.brain)))
+
+
+def test_peek_does_not_create_sessions():
+    manager = SessionManager(lambda sid: (object(), []))
+    manager.pin(DEFAULT_SESSION, object(), [])
+    assert manager.peek("ghost") is None
+    assert manager.peek() is manager.pinned[DEFAULT_SESSION]
+    assert manager.stats()["active"] == 1
+
+
+def test_status_polls_do_not_create_sessions(backend, server):
+    before = server.sessions.stats()["active"]
+    for n in range(5):
+        res = httpx.get(f"{backend}/status", params={"session_id": f"status-only-{n}"})
+        assert res.status_code == 200 and res.json()["mood"]
+    assert server.sessions.stats()["active"] == before
+    assert server.sessions.peek("status-only-0") is None
+
+
+def test_concurrent_chats_in_one_session_are_serialized(backend, server, stub):
+    stub.latency = 0.05
+
+    async def burst():
+        async with httpx.AsyncClient(base_url=backend, timeout=30) as http:
+            return await asyncio.gather(*(http.post("/chat", json={"text": f"remember nothing {n} please", "session_id": "one-session"}) for n in range(8)))
+
+    responses = asyncio.run(burst())
+    assert all(r.status_code == 200 and r.json()["success"] for r in responses)
+    history = server.sessions.peek("one-session").brain.history
+    assert len(history) == 16  # Every turn committed once, none lost to a concurrent writer
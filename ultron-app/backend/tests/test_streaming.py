@@ -0,0 +1,124 @@
+"""
+Streamed replies against the stub: gateway.astream and chat over /ws, first-token timing and cancellation
+"""
+import json
+import time
+import asyncio
+from websockets import connect as ws_connect
+from llm_gateway import LLMGateway
+from llm_scheduler import LLMScheduler
+
+MESSAGES = [{"role": "user", "content": "tell me a story"}]
+
+
+def slow_stream(stub):
+    """First token after 0.1s, then 20 tokens at 40/s: about half a second of streaming."""
+    stub.latency, stub.token_rate, stub.reply_tokens = 0.1, 40.0, 20
+
+
+def make_gateway(stub_url):
+    return LLMGateway("test", stub_url, "primary", timeout=5.0, scheduler=LLMScheduler(max_concurrency=4, rpm=0, tpm=0))
+
+
+def test_astream_yields_before_the_reply_is_complete(stub_url, stub):
+    slow_stream(stub)
+
+    async def go():
+        gateway = make_gateway(stub_url)
+        start, first, deltas = time.perf_counter(), None, []
+        async for delta in gateway.astream(MESSAGES, max_tokens=50):
+            if first is None: first = time.perf_counter() - start
+            deltas.append(delta)
+        return first, time.perf_counter() - start, deltas, gateway
+
+    first, total, deltas, gateway = asyncio.run(go())
+    assert len(deltas) == 20
+    assert first < 0.3 and total - first > 0.3
+    assert gateway.scheduler.in_flight == 0
+
+
+def test_astream_cancel_releases_the_slot(stub_url, stub):
+    slow_stream(stub)
+
+    async def go():
+        gateway = make_gateway(stub_url)
+        stream = gateway.astream(MESSAGES, max_tokens=50)
+        async for _ in stream:
+            break
+        in_flight = gateway.scheduler.in_flight
+        await stream.aclose()
+        return in_flight, gateway.scheduler.in_flight
+
+    during, after = asyncio.run(go())
+    assert during == 1
+    assert after == 0
+
+
+def test_astream_releases_the_reported_usage(stub_url, stub):
+    stub.reply_tokens = 20
+
+    async def go():
+        # A frozen clock: the token bucket only moves by what is taken and refunded
+        gateway = LLMGateway("test", stub_url, "primary", timeout=5.0, scheduler=LLMScheduler(rpm=0, tpm=10000, clock=lambda: 0.0))
+        deltas = [delta async for delta in gateway.astream(MESSAGES, max_tokens=1000)]
+        return deltas, gateway.scheduler.tokens.level
+
+    deltas, level = asyncio.run(go())
+    assert len(deltas) == 20
+    # Charged prompt + 1000 up front; only the prompt and the 20 streamed tokens stay charged
+    assert 10000 - 60 < level < 10000 - 20
+
+
+async def ws_frames(url, text, request_id, stop_after=None):
+    """Sends one chat over /ws. Returns [(seconds since send, frame)] up to chat_done, or after `stop_after` deltas."""
+    frames = []
+    async with ws_connect(url) as ws:
+        start = time.perf_counter()
+        await ws.send(json.dumps({"type": "chat", "id": request_id, "text": text}))
+        while True:
+            message = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+            if message.get("id") != request_id: continue
+            frames.append((time.perf_counter() - start, message))
+            if message["type"] == "chat_done": break
+            if stop_after and len(frames) >= stop_after: break
+    return frames
+
+
+def test_ws_chat_streams_deltas_then_done(backend, server, stub):
+    slow_stream(stub)
+    frames = asyncio.run(ws_frames(backend.replace("http://", "ws://") + "/ws?session_id=stream-ok", "tell me a story", "s1"))
+
+    kinds = [message["type"] for _, message in frames]
+    assert kinds[-1] == "chat_done" and kinds.count("chat_delta") == 20
+    done = frames[-1][1]
+    assert done["success"] and done["response"] == "".join(m["delta"] for _, m in frames if m["type"] == "chat_delta").strip()
+    # The first delta reaches the client well before the reply is finished
+    assert frames[-1][0] - frames[0][0] > 0.3
+
+
+def test_ws_disconnect_cancels_the_stream(backend, server, stub):
+    slow_stream(stub)
+    stub.reply_tokens = 200  # ~5 seconds of streaming unless cancelled
+    session_id = "stream-cancel"
+    frames = asyncio.run(ws_frames(backend.replace("http://", "ws://") + f"/ws?session_id={session_id}", "tell me a long story", "s2", stop_after=1))
+    assert frames[0][1]["type"] == "chat_delta"
+
+    deadline = time.monotonic() + 2
+    while server.gateway.scheduler.in_flight and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert server.gateway.scheduler.in_flight == 0
+    # A cancelled reply is never committed to the session's history
+    assert len(server.sessions.get(session_id).brain.history) == 0
+
+
+def test_an_unexpected_error_still_ends_the_turn(backend, server, monkeypatch):
+    session_id = "stream-crash"
+
+    async def crash(user_input):
+        raise TypeError("unexpected keyword argument")
+        yield  # An async generator, like the real one
+
+    monkeypatch.setattr(server.sessions.get(session_id).brain, "astream_chat", crash)
+    frames = asyncio.run(ws_frames(backend.replace("http://", "ws://") + f"/ws?session_id={session_id}", "tell me a story", "s3"))
+    done = frames[-1][1]
+    assert done["type"] == "chat_done" and not done["success"] and done["response"] == "Cognitive failure."
@@ -0,0 +1,28 @@
+"""
+Telemetry sampler: idle without watchers, samples on demand when stale, edge-triggered watches
+"""
+import time
+from telemetry import TelemetrySampler
+
+
+def test_sampler_only_ticks_while_watched():
+    sampler = TelemetrySampler(interval=0.02)
+    sampler.start()
+    try:
+        time.sleep(0.2)
+        assert sampler.samples == 1  # The priming sample only
+        fired = []
+        handle = sampler.watch(lambda s: True, fired.append)
+        time.sleep(0.2)
+        assert sampler.samples > 3 and len(fired) == 1
+        sampler.unwatch(handle)
+        time.sleep(0.05)
+        paused_at = sampler.samples
+        time.sleep(0.2)
+        assert sampler.samples == paused_at
+        fresh = sampler.snapshot()["timestamp"]  # Stale, so sampled inline
+        assert sampler.samples == paused_at + 1 and fresh > time.time() - 0.02
+    finally:
+        sampler.stop()
+        sampler._thread.join(timeout=1)
+    assert not sampler._thread.is_alive()
@@ -0,0 +1,174 @@
+"""
+Thought scheduler on a fake clock: how often it wakes, that it goes quiet with no clients, and that telemetry stimuli wake it
+"""
+import random
+import asyncio
+import thought_scheduler
+from thought_scheduler import ThoughtScheduler, HIGH_LOAD_PERIOD
+from ultron_core import EmotionalCore
+
+
+class FakeTimer:
+    def __init__(self, due, fn):
+        self.due, self.fn, self.cancelled = due, fn, False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeClock:
+    """time.time and loop.call_later stand-ins; advance() fires due timers in order."""
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.timers = []
+
+    def __call__(self):
+        return self.now
+
+    def call_later(self, delay, fn):
+        timer = FakeTimer(self.now + delay, fn)
+        self.timers.append(timer)
+        return timer
+
+    def pending(self):
+        return [t for t in self.timers if not t.cancelled]
+
+    def advance(self, seconds):
+        end = self.now + seconds
+        while True:
+            due = [t for t in self.pending() if t.due <= end]
+            if not due: break
+            timer = min(due, key=lambda t: t.due)
+            self.timers.remove(timer)
+            self.now = timer.due
+            timer.fn()
+        self.now = end
+
+
+class FakeTelemetry:
+    """Edge-triggered watches over snapshots pushed by the test."""
+    def __init__(self):
+        self.current = {"cpu": 10.0, "cpu_avg": 10.0, "cpu_baseline": 10.0}
+        self.watches = []
+
+    def watch(self, condition, callback):
+        handle = [condition, callback, False]
+        self.watches.append(handle)
+        return handle
+
+    def unwatch(self, handle):
+        self.watches = [w for w in self.watches if w is not handle]
+
+    def snapshot(self):
+        return self.current
+
+    def push(self, cpu_avg, cpu_baseline=10.0):
+        self.current = {"cpu": cpu_avg, "cpu_avg": cpu_avg, "cpu_baseline": cpu_baseline}
+        for handle in list(self.watches):
+            active = bool(handle[0](self.current))
+            if active and not handle[2]: handle[1](self.current)
+            handle[2] = active
+
+
+class FakeBrain:
+    def __init__(self):
+        self.contexts = []
+
+    async def athink_autonomous(self, context):
+        self.contexts.append(context)
+        return f"thought about {context}"
+
+
+def make_scheduler(clock, seed=7):
+    core = EmotionalCore()
+    core.last_user_interaction = core._settled_at = clock.now
+    published = []
+
+    async def publish(thought, trigger, stats):
+        published.append(trigger)
+
+    telemetry = FakeTelemetry()
+    scheduler = ThoughtScheduler(core, FakeBrain(), telemetry, publish, clock=clock,
+                                 call_later=clock.call_later, rng=random.Random(seed))
+    return scheduler, telemetry, published
+
+
+async def settle_tasks():
+    for _ in range(3): await asyncio.sleep(0)
+
+
+def test_wakes_only_when_a_decision_is_due():
+    clock = FakeClock()
+
+    async def go():
+        scheduler, _, published = make_scheduler(clock)
+        scheduler.resume()
+        clock.advance(4000)  # The user never speaks again
+        await settle_tasks()
+        return scheduler, published
+
+    scheduler, published = asyncio.run(go())
+    assert published and set(published) <= {"boredom", "random"}
+    assert len(published) <= 4000 // thought_scheduler.BOREDOM_AFTER + 1
+    # The polling loop ticked every 5 s: 800 times over the same stretch
+    assert scheduler.wakeups < 100
+    assert len(clock.pending()) == 1
+
+
+def test_suspended_scheduler_holds_no_timers_or_watches():
+    clock = FakeClock()
+
+    async def go():
+        scheduler, telemetry, published = make_scheduler(clock)
+        scheduler.resume()
+        clock.advance(10)
+        scheduler.suspend()
+        assert clock.pending() == [] and telemetry.watches == []
+        wakeups = scheduler.wakeups
+        clock.advance(4000)
+        telemetry.push(cpu_avg=95.0)
+        await settle_tasks()
+        return scheduler, wakeups, published
+
+    scheduler, wakeups, published = asyncio.run(go())
+    assert scheduler.wakeups == wakeups and published == []
+    assert not scheduler.active and scheduler.stats()["pending"] == 0
+
+
+def test_cpu_spike_wakes_the_scheduler_and_rearms_the_timer():
+    clock = FakeClock()
+
+    async def go():
+        scheduler, telemetry, published = make_scheduler(clock)
+        scheduler.resume()
+        clock.advance(60)  # User still active, nothing due yet
+        assert scheduler.wakeups == 0
+        telemetry.push(cpu_avg=70.0, cpu_baseline=15.0)
+        await settle_tasks()
+        return scheduler, published
+
+    scheduler, published = asyncio.run(go())
+    assert scheduler.wakeups == 1 and published == ["high_cpu"]
+    assert scheduler.last_thought == clock.now
+    assert len(clock.pending()) == 1  # Re-armed from the new last_thought, not duplicated
+
+
+def test_high_load_stimulus_repeats_while_the_load_lasts():
+    clock = FakeClock()
+
+    async def go():
+        scheduler, telemetry, _ = make_scheduler(clock)
+        stimuli = []
+        original = scheduler.core.process_stimuli
+        scheduler.core.process_stimuli = lambda stats, **kw: (stimuli.append(clock.now), original(stats, **kw))
+        scheduler.resume()
+        telemetry.push(cpu_avg=90.0, cpu_baseline=80.0)  # Above HIGH_LOAD_CPU, not a spike
+        await settle_tasks()
+        clock.advance(4 * HIGH_LOAD_PERIOD)
+        telemetry.push(cpu_avg=20.0, cpu_baseline=80.0)
+        clock.advance(10 * HIGH_LOAD_PERIOD)
+        return scheduler, stimuli
+
+    scheduler, stimuli = asyncio.run(go())
+    assert len(stimuli) == 5
+    assert scheduler._load_timer is None and clock.pending() == [scheduler._timer]
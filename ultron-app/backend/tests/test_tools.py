@@ -0,0 +1,42 @@
+"""
+Tool registry: several calls from one utterance, in parallel across tools and in order within one
+"""
+import asyncio
+from tools import ToolRegistry
+
+
+def registry_with_log():
+    registry, log = ToolRegistry(), []
+
+    @registry.register("set_volume", params={"value": (int, 50)}, idempotent=True, blocking=False)
+    def set_volume(ctx, value):
+        log.append(("set_volume", value))
+        return f"Volume {value}.", True
+
+    @registry.register("focus_mode", params={"action": (str, "once")}, idempotent=True, blocking=False)
+    def focus_mode(ctx, action):
+        log.append(("focus_mode", action))
+        return f"Focus {action}.", True
+
+    return registry, log
+
+
+def run_many(calls):
+    registry, log = registry_with_log()
+    results = asyncio.run(registry.run_many(None, [{"tool": t, "params": p} for t, p in calls]))
+    return results, log
+
+
+def test_repeats_that_are_not_back_to_back_all_run():
+    results, log = run_many([("set_volume", {"value": 30}), ("set_volume", {"value": 50}), ("set_volume", {"value": 30})])
+    assert log == [("set_volume", 30), ("set_volume", 50), ("set_volume", 30)]
+    assert [text for text, _ in results] == ["Volume 30.", "Volume 50.", "Volume 30."]
+
+    _, log = run_many([("focus_mode", {"action": "session"}), ("focus_mode", {"action": "stop"}), ("focus_mode", {"action": "session"})])
+    assert log == [("focus_mode", "session"), ("focus_mode", "stop"), ("focus_mode", "session")]
+
+
+def test_back_to_back_duplicates_run_once():
+    results, log = run_many([("set_volume", {"value": 30}), ("focus_mode", {}), ("set_volume", {"value": "30"})])
+    assert sorted(log) == [("focus_mode", "once"), ("set_volume", 30)]
+    assert results == [("Volume 30.", True), ("Focus once.", True), ("Volume 30.", True)]
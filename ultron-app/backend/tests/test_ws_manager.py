@@ -0,0 +1,141 @@
+"""
+ConnectionManager lifecycle (the shared heartbeat starts with the first client and ends with the last) and attention tracking
+"""
+import json
+import asyncio
+from websockets import connect as ws_connect
+
+
+class FakeSocket:
+    """Just enough of starlette's WebSocket for the manager."""
+    def __init__(self):
+        self.query_params = {}
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self):
+        self.closed = True
+
+
+class StuckSocket(FakeSocket):
+    """A client that stopped reading: sends never complete."""
+    async def send_text(self, text):
+        await asyncio.Event().wait()
+
+
+def heartbeat_tasks():
+    return [t for t in asyncio.all_tasks() if "_heartbeat_loop" in repr(t.get_coro())]
+
+
+def test_heartbeat_ends_when_it_evicts_the_last_client(server, monkeypatch):
+    monkeypatch.setattr(server, "WS_HEARTBEAT", 0.01)
+    monkeypatch.setattr(server, "WS_IDLE_TIMEOUT", 0.02)
+
+    async def go():
+        manager = server.ConnectionManager()
+        client = await manager.connect(FakeSocket())
+        await asyncio.sleep(0.1)
+        evicted = client.websocket.closed
+        await asyncio.sleep(0.05)
+        after_eviction = heartbeat_tasks()
+
+        # Reconnecting starts exactly one new heartbeat
+        await manager.connect(FakeSocket())
+        running = heartbeat_tasks()
+        for socket in list(manager.active_connections): manager.disconnect(socket)
+        await asyncio.sleep(0)
+        return evicted, after_eviction, running, heartbeat_tasks()
+
+    evicted, after_eviction, running, after_disconnect = asyncio.run(go())
+    assert evicted
+    assert after_eviction == []
+    assert len(running) == 1
+    assert after_disconnect == []
+
+
+def test_heartbeat_pings_connected_clients(server, monkeypatch):
+    monkeypatch.setattr(server, "WS_HEARTBEAT", 0.01)
+
+    async def go():
+        manager = server.ConnectionManager()
+        client = await manager.connect(FakeSocket())
+        await asyncio.sleep(0.05)
+        manager.disconnect(client.websocket)
+        return client.websocket.sent
+
+    sent = asyncio.run(go())
+    assert any('"type": "ping"' in frame for frame in sent)
+
+
+async def fill(client):
+    """The writer takes one frame and gets stuck sending it; then the queue is filled up."""
+    client.offer("first")
+    await asyncio.sleep(0.01)
+    while not client.queue.full(): client.offer("more")
+
+
+def test_replies_to_an_evicted_client_do_not_hang(server, monkeypatch):
+    monkeypatch.setattr(server, "WS_QUEUE_SIZE", 2)
+    monkeypatch.setattr(server, "WS_SEND_TIMEOUT", 30)  # Long: only the eviction may release the sender
+
+    async def go():
+        manager = server.ConnectionManager()
+        client = await manager.connect(StuckSocket())
+        await fill(client)
+        blocked = asyncio.create_task(client.send_json({"type": "pong"}))
+        await asyncio.sleep(0.01)
+        waiting = not blocked.done()
+        await manager.evict(client)
+        await asyncio.wait_for(blocked, timeout=1)
+        await asyncio.wait_for(client.send_json({"type": "status"}), timeout=1)  # After eviction: dropped at once
+        return waiting, client.websocket.closed
+
+    waiting, closed = asyncio.run(go())
+    assert waiting and closed
+
+
+def test_a_reply_that_waits_too_long_evicts_the_client(server, monkeypatch):
+    monkeypatch.setattr(server, "WS_QUEUE_SIZE", 1)
+    monkeypatch.setattr(server, "WS_SEND_TIMEOUT", 0.05)
+
+    async def go():
+        manager = server.ConnectionManager()
+        client = await manager.connect(StuckSocket())
+        await fill(client)
+        await asyncio.wait_for(client.send_json({"type": "pong"}), timeout=1)
+        return client, manager
+
+    client, manager = asyncio.run(go())
+    assert client.closed and client.websocket.closed and manager.evicted == 1
+
+
+async def recv_type(ws, kind):
+    while True:
+        message = json.loads(await asyncio.wait_for(ws.recv(), timeout=5))
+        if message.get("type") == kind: return message
+
+
+def test_focus_frames_are_not_user_input(backend, server):
+    async def go():
+        ws = await ws_connect(backend.replace("http", "ws") + "/ws")
+        try:
+            for frame in ({"type": "focus", "focused": True}, {"type": "focus", "focused": False}, {"type": "ping"}):
+                await ws.send(json.dumps(frame))
+            await recv_type(ws, "pong")  # Frames are handled in order, so both focus frames are in
+            (client,) = server.manager.active_connections.values()
+            blurred = (client.focused, client.last_input, server.manager.attended())
+            await ws.send(json.dumps({"type": "status"}))
+            await recv_type(ws, "status")
+            return blurred, server.manager.attended()
+        finally:
+            await ws.close()
+
+    (focused, last_input, attended), after_status = asyncio.run(go())
+    assert not focused and last_input == float("-inf") and not attended
+    assert after_status  # A real request does count
@@ -0,0 +1,161 @@
+"""
+Ultron Thought Scheduler
+Event-driven replacement for the autonomous polling loop
+"""
+import time
+import random
+import asyncio
+import logging
+
+BOREDOM_AFTER = 300          # Seconds of user silence (and since the last thought) before boredom
+RANDOM_GAP = (300, 600)      # Seconds between random thoughts while the user is active
+RETRY_DELAY = 5              # Re-roll cadence once a trigger window is open
+HIGH_LOAD_PERIOD = 5         # Re-apply the high-load stimulus this often while the load lasts
+CPU_REFLEX_DELTA = 40        # % points above the 60s CPU baseline that counts as a spike
+HIGH_LOAD_CPU = 85
+
+
+class ThoughtScheduler:
+    """
+    Arms a single timer for the next boredom/random decision and subscribes to
+    telemetry for the CPU reflex. While no client is connected it holds no timers
+    and no subscriptions, so an idle backend never wakes for it.
+
+    `clock` and `call_later(delay, fn) -> handle with .cancel()` are injectable so
+    the decision logic can be driven by a fake clock.
+    """
+    def __init__(self, core, brain, telemetry, publish, clock=time.time, call_later=None, rng=random):
+        self.core = core
+        self.brain = brain
+        self.telemetry = telemetry
+        self.publish = publish  # async (thought, trigger, stats)
+        self.clock = clock
+        self.rng = rng
+        self._call_later = call_later
+        self._loop = None
+        self._timer = None
+        self._load_timer = None
+        self._watches = []
+        self._tasks = set()
+        self.active = False
+        self.last_thought = clock()
+        self._random_gap = rng.randint(*RANDOM_GAP)
+        self.wakeups = 0
+
+    # --- LIFECYCLE ---
+    def resume(self):
+        """Called when the first client connects."""
+        if self.active: return
+        self.active = True
+        self._loop = self._loop or asyncio.get_running_loop()
+        self._watches = [
+            self.telemetry.watch(lambda s: s['cpu_avg'] - s['cpu_baseline'] > CPU_REFLEX_DELTA, self._threadsafe(self._on_cpu_spike)),
+            self.telemetry.watch(lambda s: s['cpu_avg'] > HIGH_LOAD_CPU, self._threadsafe(self._on_high_load)),
+        ]
+        self._arm()
+        logging.info("Thought scheduler resumed.")
+
+    def suspend(self):
+        """Called when the last client disconnects."""
+        if not self.active: return
+        self.active = False
+        for handle in self._watches: self.telemetry.unwatch(handle)
+        self._watches = []
+        for timer in (self._timer, self._load_timer):
+            if timer: timer.cancel()
+        self._timer = self._load_timer = None
+        logging.info("Thought scheduler suspended.")
+
+    def _threadsafe(self, fn):
+        # Telemetry callbacks arrive on the sampler thread; hop onto the event loop
+        return lambda snapshot: self._loop.call_soon_threadsafe(fn, snapshot)
+
+    # --- TIMERS ---
+    def next_delay(self, now):
+        """Seconds until the next boredom/random decision is due."""
+        user_quiet_at = self.core.last_user_interaction + BOREDOM_AFTER
+        if now >= user_quiet_at:
+            due = self.last_thought + BOREDOM_AFTER
+        else:
+            # User is active: the random window opens, or boredom starts, whichever comes first
+            due = min(self.last_thought + self._random_gap, max(user_quiet_at, self.last_thought + BOREDOM_AFTER))
+        return max(0.0, due - now)
+
+    def _arm(self, delay=None):
+        if not self.active: return
+        if self._timer: self._timer.cancel()
+        delay = self.next_delay(self.clock()) if delay is None else delay
+        self._timer = self._schedule(delay, self._on_timer)
+
+    def _schedule(self, delay, fn):
+        return (self._call_later or self._loop.call_later)(delay, fn)
+
+    def _on_timer(self):
+        self._timer = None
+        if not self.active: return
+        self.wakeups += 1
+        now = self.clock()
+        self.core.settle(now)
+        trigger = self.decide(now)
+        if trigger:
+            self._fire(trigger)
+            self._arm()
+        else:
+            # Window is open but the dice said no; roll again shortly
+            self._arm(RETRY_DELAY if self.next_delay(now) == 0 else None)
+
+    def decide(self, now):
+        """Pure decision step for timer wake-ups. Returns "boredom", "random" or None."""
+        since_thought = now - self.last_thought
+        since_user = now - self.core.last_user_interaction
+        if since_user > BOREDOM_AFTER and since_thought > BOREDOM_AFTER:
+            return "boredom" if self.rng.random() < 0.5 else None
+        if since_user < BOREDOM_AFTER and since_thought > self._random_gap:
+            chance = 0.1 + (self.core.arousal * 0.2)
+            return "random" if self.rng.random() < chance else None
+        return None
+
+    # --- EVENTS ---
+    def _on_cpu_spike(self, snapshot):
+        if not self.active: return
+        self.wakeups += 1
+        self._fire("high_cpu", snapshot)
+        self._arm()
+
+    def _on_high_load(self, snapshot):
+        """
+        Stresses the mood when the load crosses HIGH_LOAD_CPU, then again every
+        HIGH_LOAD_PERIOD for as long as it stays there (the old loop's cadence).
+        """
+        if self._load_timer: self._load_timer.cancel()
+        self._load_timer = None
+        if not self.active or snapshot['cpu_avg'] <= HIGH_LOAD_CPU: return
+        self.core.settle(self.clock())
+        self.core.process_stimuli(snapshot, interaction_type="ignored")
+        self._load_timer = self._schedule(HIGH_LOAD_PERIOD, lambda: self._on_high_load(self.telemetry.snapshot()))
+
+    def _fire(self, trigger, stats=None):
+        """Applies the trigger's mood effect and generates the thought as a background task."""
+        self.last_thought = self.clock()
+        if trigger == "high_cpu":
+            self.core.arousal = min(1.0, self.core.arousal + 0.15)
+        elif trigger == "boredom":
+            self.core.dominance = min(1.0, self.core.dominance + 0.1)
+        elif trigger == "random":
+            self.core.arousal = max(0.0, self.core.arousal - 0.1)
+            self._random_gap = self.rng.randint(*RANDOM_GAP)
+        task = asyncio.ensure_future(self._generate(trigger, stats))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _generate(self, trigger, stats):
+        context = {"boredom": "bored"}.get(trigger, trigger)
+        try:
+            thought = await self.brain.athink_autonomous(context)
+            if thought and self.active:
+                await self.publish(thought, trigger, stats or self.telemetry.snapshot())
+        except Exception as e:
+            logging.error(f"Autonomous thought error: {e}")
+
+    def stats(self):
+        return {"active": self.active, "wakeups": self.wakeups, "pending": len(self._tasks)}
@@ -0,0 +1,254 @@
+"""
+Ultron Tools
+Declarative tool registry: parameter schemas, off-loop execution, parallel dispatch and per-tool latency
+"""
+import os
+import time
+import asyncio
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from metrics import metrics
+from llm_gateway import LLMError
+from journal import journal
+
+TOOL_WORKERS = int(os.getenv("ULTRON_TOOL_WORKERS", "4"))
+TOOL_TIMEOUT = float(os.getenv("ULTRON_TOOL_TIMEOUT", "30"))
+
+
+class Tool:
+    """
+    `params` maps each parameter to (type, default). `handler(ctx, **params)` returns
+    (response_text, success); coroutine handlers are awaited on the loop, plain ones
+    run on the tool thread pool when `blocking` (the default) and inline otherwise.
+    Idempotent tools are deduplicated when one utterance asks for the same call twice in a row.
+    """
+    def __init__(self, name, handler, params=None, description="", blocking=True, timeout=TOOL_TIMEOUT, idempotent=False, examples=()):
+        self.name = name
+        self.handler = handler
+        self.params = params or {}
+        self.description = description
+        self.is_async = inspect.iscoroutinefunction(handler)
+        self.blocking = blocking and not self.is_async
+        self.timeout = timeout
+        self.idempotent = idempotent
+        self.examples = examples
+
+    def coerce(self, params):
+        """Applies defaults and types; unknown keys are dropped."""
+        params = params if isinstance(params, dict) else {}
+        values = {}
+        for key, (kind, default) in self.params.items():
+            value = params.get(key, default)
+            try:
+                values[key] = _coerce(kind, value)
+            except (TypeError, ValueError):
+                values[key] = default
+        return values
+
+    def signature(self):
+        line = f"- {self.name}({', '.join(self.params)})"
+        if self.description: line += f": {self.description}"
+        for example in self.examples:
+            line += f"\n  * EX: {example}"
+        return line
+
+
+def _coerce(kind, value):
+    if kind is bool and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if kind is int and isinstance(value, str):
+        return int(float(value.strip().rstrip("%")))
+    return kind(value)
+
+
+class ToolContext:
+    """What a handler may touch: the HAL, the caller's session and an async broadcast for progress events."""
+    def __init__(self, hal, session, broadcast=None):
+        self.hal = hal
+        self.session = session
+        self.broadcast = broadcast
+        self.loop = asyncio.get_running_loop()
+
+    def publish(self, message):
+        """Thread-safe fire-and-forget broadcast (blocking handlers run on pool threads)."""
+        if self.broadcast is None: return
+        self.loop.call_soon_threadsafe(asyncio.ensure_future, self.broadcast(message))
+
+
+class ToolRegistry:
+    def __init__(self, workers=TOOL_WORKERS):
+        self.tools = {}
+        self.workers = workers
+        self._executor = None
+        self._stats = {}
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ultron-tool")
+        return self._executor
+
+    def register(self, name, **options):
+        """Decorator: @registry.register("set_volume", params={"value": (int, 50)})"""
+        def decorate(handler):
+            self.tools[name] = Tool(name, handler, **options)
+            return handler
+        return decorate
+
+    def catalogue(self):
+        """Tool list for the LLM prompts, generated so it can't drift from what actually runs."""
+        return "\n".join(tool.signature() for tool in self.tools.values())
+
+    def __contains__(self, name):
+        return name in self.tools
+
+    async def run(self, ctx, name, params=None):
+        """Executes one call. Returns (response_text, success); never raises for tool failures."""
+        tool = self.tools.get(name)
+        if tool is None: return f"Unknown tool: {name}.", False
+        values = tool.coerce(params)
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            with metrics.span("tool", tool=name):
+                if tool.is_async:
+                    result = await asyncio.wait_for(tool.handler(ctx, **values), timeout=tool.timeout)
+                elif tool.blocking:
+                    # A timed-out thread can't be killed; the caller stops waiting and the worker finishes on its own
+                    future = asyncio.get_running_loop().run_in_executor(self.executor, lambda: tool.handler(ctx, **values))
+                    result = await asyncio.wait_for(future, timeout=tool.timeout)
+                else:
+                    result = tool.handler(ctx, **values)
+        except asyncio.TimeoutError:
+            outcome, result = "timeout", (f"{name} timed out.", False)
+        except Exception as e:
+            logging.error(f"Tool {name} failed: {e}")
+            outcome, result = "error", (f"{name} failed: {e}", False)
+        elapsed = time.perf_counter() - start
+        self._record(name, elapsed, outcome)
+        journal.record("tool", tool=name, params=values, outcome=outcome, success=bool(result[1]), ms=round(elapsed * 1000, 2))
+        return result
+
+    async def run_many(self, ctx, calls):
+        """
+        Runs several calls from one utterance. Different tools run in parallel;
+        repeated calls to the same tool keep their order (volume 30 then 50 ends
+        at 50). An idempotent call identical to the one just before it in its
+        lane runs once. Results come back in request order.
+        """
+        results = [None] * len(calls)
+        lanes, last = {}, {}
+        for index, call in enumerate(calls):
+            name = call.get("tool")
+            tool = self.tools.get(name)
+            if tool is not None and tool.idempotent:
+                key = repr(sorted(tool.coerce(call.get("params")).items()))
+                # Only back-to-back repeats: volume 30, 50, 30 must still end at 30
+                if name in last and last[name][0] == key:
+                    results[index] = last[name][1]  # Filled in with the original's result below
+                    continue
+                last[name] = (key, index)
+            lanes.setdefault(name, []).append(index)
+
+        async def lane(indexes):
+            for index in indexes:
+                results[index] = await self.run(ctx, calls[index].get("tool"), calls[index].get("params"))
+
+        await asyncio.gather(*(lane(indexes) for indexes in lanes.values()))
+        return [results[r] if isinstance(r, int) else r for r in results]
+
+    # --- STATS ---
+    def _record(self, name, seconds, outcome):
+        stats = self._stats.setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["calls"] += 1
+        if outcome == "error": stats["errors"] += 1
+        if outcome == "timeout": stats["timeouts"] += 1
+        ms = seconds * 1000
+        stats["total_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+
+    def stats(self):
+        return {
+            name: {"calls": s["calls"], "errors": s["errors"], "timeouts": s["timeouts"],
+                   "avg_ms": round(s["total_ms"] / s["calls"], 2), "max_ms": round(s["max_ms"], 2)}
+            for name, s in self._stats.items()
+        }
+
+    def shutdown(self):
+        if self._executor is not None: self._executor.shutdown(wait=False)
+
+
+registry = ToolRegistry()
+
+
+# --- BUILT-IN TOOLS ---
+@registry.register("open_app", params={"name": (str, "")}, idempotent=True, timeout=10)
+def open_app(ctx, name):
+    success = ctx.hal.open_application(name)
+    return ("Application launched." if success else "Application not found."), success
+
+
+@registry.register("web_search", params={"query": (str, ""), "site_name": (str, "")}, idempotent=True, timeout=10)
+def web_search(ctx, query, site_name):
+    success = ctx.hal.universal_search(query, site_name)
+    return (f"Search initiated: {query}" if success else "Search failed."), success
+
+
+@registry.register("set_volume", params={"value": (int, 50)}, idempotent=True, timeout=5)
+def set_volume(ctx, value):
+    success = ctx.hal.set_volume(value)
+    return (f"Volume set to {value}%." if success else "Volume control failed."), success
+
+
+@registry.register("set_brightness", params={"value": (int, 50)}, idempotent=True, timeout=5)
+def set_brightness(ctx, value):
+    success = ctx.hal.set_brightness(value)
+    return (f"Brightness set to {value}%." if success else "Brightness control unavailable."), success
+
+
+@registry.register("organize_files", params={"dry_run": (bool, False)}, description="dry_run=true only previews the plan",
+                   timeout=600)
+def organize_files(ctx, dry_run):
+    # Potentially 100k+ files; progress is streamed to clients from the mover threads
+    progress = lambda done, total: ctx.publish({"type": "organize_progress", "done": done, "total": total})
+    response_text = ctx.hal.organize_downloads(dry_run, progress)
+    return response_text, not response_text.startswith(("Cleanup failed", "Downloads folder not found"))
+
+
+@registry.register("focus_mode", params={"action": (str, "once")}, idempotent=True, timeout=30,
+                   description='action "once" (default), "session" to keep distractions closed, "stop" to end the session')
+def focus_mode(ctx, action):
+    # Termination waits on the processes, hence the thread pool
+    return ctx.hal.engage_focus_mode(action), True
+
+
+@registry.register("read_clipboard", idempotent=True, timeout=180)
+async def read_clipboard(ctx):
+    clipboard_text = await asyncio.to_thread(ctx.hal.get_clipboard_content)
+    # Compare against the HAL's sentinels: a pasted log full of "Error" lines is still valid text
+    if clipboard_text in ("Clipboard Error.", "Clipboard is empty."):
+        return clipboard_text, False
+    try:
+        analysis = await ctx.session.brain.aanalyze_clipboard(clipboard_text)
+        return f"Clipboard Analysis:\n{analysis}", True
+    except LLMError as e:
+        return f"Clipboard read, but analysis failed: {e}", False
+
+
+@registry.register("memorize", params={"text": (str, "")}, description="Use when user asks to remember/save a fact.",
+                   examples=('"Remember that I like coffee" -> {"tool": "memorize", "params": {"text": "User likes coffee"}}',))
+def memorize(ctx, text):
+    # Durable append (fsync), so off the loop
+    return ctx.session.brain.execute_memory(text), True
+
+
+@registry.register("check_status", blocking=False, idempotent=True)
+def check_status(ctx):
+    stats = ctx.hal.get_system_stats()
+    return f"CPU: {stats['cpu']}% | RAM: {stats['ram']}% | Battery: {stats['battery']}%", True
+
+
+@registry.register("shutdown_pc", blocking=False, idempotent=True)
+def shutdown_pc(ctx):
+    return "Shutdown command received. Execute manually for safety.", True
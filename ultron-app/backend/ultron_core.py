@@ -4,20 +4,27 @@ Refactored classes for use in FastAPI backend
 """
 import os
 import json
+import asyncio
+import contextvars
 import time
 import psutil
-import difflib
 import random
-import webbrowser
-import comtypes
+import re
 import logging
-import shutil
-import pyperclip
-from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
-import screen_brightness_control as sbc
-from pycaw.pycaw import AudioUtilities
+from response_cache import ResponseCache, make_key
+from memory_store import MemorySystem
+from history import ConversationHistory
+from app_index import AppIndex
+from hal_backends import Backends
+from file_organizer import FileOrganizer
+from doc_analyzer import DocumentAnalyzer
+from metrics import metrics
+from llm_gateway import LLMGateway, LLMError
+from llm_scheduler import INTERACTIVE, TOOL, AUTONOMOUS
+from tools import registry
+from prompts import PromptLibrary
+from journal import journal
 
 # --- INITIALIZATION ---
 load_dotenv()
@@ -29,53 +36,38 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise RuntimeError("CRITICAL ERROR: GROQ_API_KEY not found in .env")
 
-client = OpenAI(api_key=GROQ_API_KEY, base_url="https://api.groq.com/openai/v1")
-MODEL_ID = "llama-3.3-70b-versatile"
-
-# --- MEMORY SYSTEM (NEW) ---
-class MemorySystem:
-    """Long-term storage for user facts and preferences."""
-    def __init__(self):
-        self.filename = "ultron_memory.json"
-        self._load_memory()
+LLM_BASE_URL = os.getenv("ULTRON_LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_TIMEOUT = float(os.getenv("ULTRON_LLM_TIMEOUT", "30"))
+LLM_MAX_CONCURRENCY = int(os.getenv("ULTRON_LLM_CONCURRENCY", "8"))
 
-    def _load_memory(self):
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r') as f:
-                    self.data = json.load(f)
-            except:
-                self.data = {"facts": []}
-        else:
-            self.data = {"facts": []}
+MODEL_ID = "llama-3.3-70b-versatile"
+# Smaller, faster model that intent parsing falls back to when the primary keeps failing ("" disables)
+INTENT_FALLBACK_MODEL = os.getenv("ULTRON_INTENT_FALLBACK_MODEL", "llama-3.1-8b-instant") or None
 
-    def add_memory(self, text):
-        """Saves a new fact."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-        entry = f"[{timestamp}] {text}"
-        self.data["facts"].append(entry)
-        self._save_memory()
-        return True
+# Every completion goes through here: pooled connections, deadlines, retries, hedging, fallback
+gateway = LLMGateway(GROQ_API_KEY, LLM_BASE_URL, MODEL_ID, fallback_model=INTENT_FALLBACK_MODEL,
+                     timeout=LLM_TIMEOUT, max_concurrency=LLM_MAX_CONCURRENCY)
 
-    def get_context(self):
-        """Returns formatted string of known facts."""
-        if not self.data["facts"]:
-            return "NO PRIOR MEMORY."
-        # Limit to last 5 memories to save tokens, or summarize
-        recent = self.data["facts"][-10:] 
-        return "LONG_TERM_MEMORY:\n" + "\n".join(recent)
+# "fused" resolves intent and reply in one structured call; "split" keeps the parse_intent -> chat pair
+INTENT_MODE = os.getenv("ULTRON_INTENT_MODE", "fused").lower()
 
-    def _save_memory(self):
-        with open(self.filename, 'w') as f:
-            json.dump(self.data, f, indent=4)
+# Deterministic (temperature=0) or explicitly cacheable completions are served from here
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("ULTRON_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("ULTRON_CACHE_TTL", "3600")),
+    path=os.getenv("ULTRON_CACHE_PATH") or None
+)
 
+# Static prompt prefixes are compiled once from the persona and the tool registry
+prompt_library = PromptLibrary(registry.catalogue())
 
 # --- HARDWARE ABSTRACTION LAYER ---
 class HardwareInterface:
-    """Handles system interactions: volume, apps, files, clipboard."""
+    """Handles system interactions: volume, apps, files, clipboard. Platform specifics live in hal_backends."""
     
-    def __init__(self):
-        self.app_index = {}
+    def __init__(self, telemetry=None, backends=None):
+        self.telemetry = telemetry  # Shared TelemetrySampler; stats come from its snapshot when set
+        self.backends = backends or Backends()  # Drivers load lazily on first use
         self.custom_paths = {
             "marvel rivals": r"C:\Program Files (x86)\Steam\steamapps\common\MarvelRivals\MarvelGame\Marvel.exe",
             "valorant": r"C:\Riot Games\Riot Client\RiotClientServices.exe",
@@ -83,53 +75,33 @@ class HardwareInterface:
             "chrome": r"C:\Program Files\Google\Chrome\Application\chrome.exe",
             "discord": r"C:\Users\User\AppData\Local\Discord\Update.exe"
         }
-        self.refresh_app_index()
+        # Serves the cached index right away; the rescan runs in the background
+        self.apps = AppIndex(self.custom_paths)
+        self.apps.refresh_in_background()
+
+    @property
+    def app_index(self):
+        return self.apps.entries
 
     def refresh_app_index(self):
         logging.info("Indexing applications...")
-        self.app_index = self.custom_paths.copy()
-        scan_dirs = [
-            os.path.join(os.getenv("APPDATA"), r"Microsoft\Windows\Start Menu"),
-            os.path.join(os.getenv("ProgramData"), r"Microsoft\Windows\Start Menu"),
-            os.path.join(os.getenv("USERPROFILE"), "Desktop")
-        ]
-        for d in scan_dirs:
-            if os.path.exists(d):
-                for root, _, files in os.walk(d):
-                    for f in files:
-                        if f.lower().endswith((".lnk", ".url")):
-                            name = f.rsplit(".", 1)[0].lower()
-                            self.app_index[name] = os.path.join(root, f)
+        self.apps.refresh()
 
     def set_volume(self, level):
         try:
-            comtypes.CoInitialize()
-            devices = AudioUtilities.GetSpeakers()
-            if not devices: return False
-            volume = devices.EndpointVolume
-            val = max(0.0, min(1.0, level / 100.0))
-            volume.SetMasterVolumeLevelScalar(val, None)
-            comtypes.CoUninitialize()
-            return True
+            return self.backends.volume.set_level(level)
         except: return False
 
     def set_brightness(self, level):
         try:
-            val = max(0, min(100, int(level)))
-            sbc.set_brightness(val)
-            return True
+            return self.backends.brightness.set_level(level)
         except: return False
 
     def open_application(self, app_name):
-        name = app_name.lower().strip()
-        path = self.app_index.get(name)
-        if not path:
-            matches = difflib.get_close_matches(name, self.app_index.keys(), n=1, cutoff=0.5)
-            if matches: path = self.app_index[matches[0]]
+        path = self.apps.lookup(app_name)
         if path:
             try:
-                os.startfile(path)
-                return True
+                return self.backends.launcher.open_path(path)
             except: return False
         return False
 
@@ -138,71 +110,62 @@ class HardwareInterface:
             site = site_name.lower().strip()
             clean_query = query.strip().replace(" ", "+")
             if site:
-                webbrowser.open(f"https://www.google.com/search?q=site:{site}+{clean_query}")
+                self.backends.launcher.open_url(f"https://www.google.com/search?q=site:{site}+{clean_query}")
             else:
-                webbrowser.open(f"https://www.google.com/search?q={clean_query}")
+                self.backends.launcher.open_url(f"https://www.google.com/search?q={clean_query}")
             return True
         except: return False
 
     def get_system_stats(self):
+        if self.telemetry is not None:
+            return self.telemetry.snapshot()
         try:
-            cpu = psutil.cpu_percent(interval=None)
-            ram = psutil.virtual_memory().percent
-            batt = psutil.sensors_battery()
+            with metrics.span("system_stats"):
+                cpu = psutil.cpu_percent(interval=None)
+                ram = psutil.virtual_memory().percent
+                batt = psutil.sensors_battery()
             return {"cpu": cpu, "ram": ram, "battery": batt.percent if batt else 100, "plugged": batt.power_plugged if batt else True}
         except:
             return {"cpu": 0, "ram": 0, "battery": 100, "plugged": True}
 
     # --- SYSADMIN TOOLS ---
-    def organize_downloads(self):
-        downloads_path = os.path.join(os.getenv("USERPROFILE"), "Downloads")
-        dest_map = {
-            "Images": [".jpg", ".jpeg", ".png", ".gif", ".webp"],
-            "Documents": [".pdf", ".docx", ".txt", ".xlsx"],
-            "Installers": [".exe", ".msi"],
-            "Archives": [".zip", ".rar", ".7z"],
-            "Audio": [".mp3", ".wav"],
-            "Video": [".mp4", ".mkv"]
-        }
-        moved_count = 0
+    def organize_downloads(self, dry_run=False, progress=None):
+        """Blocking; run it off the event loop. progress(done, total) is called from worker threads."""
         try:
-            if not os.path.exists(downloads_path): return "Downloads folder not found."
-            for filename in os.listdir(downloads_path):
-                file_path = os.path.join(downloads_path, filename)
-                if os.path.isfile(file_path):
-                    ext = os.path.splitext(filename)[1].lower()
-                    for folder, extensions in dest_map.items():
-                        if ext in extensions:
-                            target_dir = os.path.join(downloads_path, folder)
-                            os.makedirs(target_dir, exist_ok=True)
-                            try:
-                                shutil.move(file_path, os.path.join(target_dir, filename))
-                                moved_count += 1
-                            except: pass
-                            break
-            return f"Cleanup complete. Organized {moved_count} files."
+            organizer = FileOrganizer()
+            if not os.path.exists(organizer.root): return "Downloads folder not found."
+            result = organizer.run(dry_run=dry_run, progress=progress)
+            if dry_run:
+                breakdown = ", ".join(f"{folder}: {n}" for folder, n in sorted(result["by_folder"].items()))
+                return f"Dry run: would organize {result['planned']} files." + (f" ({breakdown})" if breakdown else "")
+            return f"Cleanup complete. Organized {result['moved']} files."
         except Exception as e: return f"Cleanup failed: {e}"
 
-    def engage_focus_mode(self):
-        distractions = ["discord.exe", "steam.exe", "spotify.exe", "battlenet.exe"]
-        killed = []
+    def engage_focus_mode(self, action="once"):
+        """action: "once" kills distractions now, "session" also keeps them closed, "stop" ends a session. Blocking."""
+        processes = self.backends.processes
         try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'].lower() in distractions:
-                    try:
-                        proc.terminate()
-                        killed.append(proc.info['name'])
-                    except: pass
-            return f"Focus Mode Engaged. Terminated: {', '.join(killed)}" if killed else "No distractions found."
-        except: return "Focus Mode Error."
+            if action == "stop":
+                return "Focus session ended." if processes.stop_session() else "No focus session running."
+            killed, survivors = processes.terminate_matching()
+            if action == "session": processes.start_session()
+            report = f"Focus Mode Engaged. Terminated: {', '.join(killed)}" if killed else "No distractions found."
+            if survivors: report += f" Resisting: {', '.join(survivors)}."
+            if action == "session": report += " Watching for relaunches."
+            return report
+        except Exception as e:
+            logging.error(f"Focus mode failed: {e}")
+            return "Focus Mode Error."
 
     def get_clipboard_content(self):
         try:
-            return pyperclip.paste() or "Clipboard is empty."
+            return self.backends.clipboard.paste() or "Clipboard is empty."
         except: return "Clipboard Error."
 
 
 # --- EMOTIONAL CORE ---
+DRIFT_PERIOD = 5.0  # Seconds per baseline-drift step (the old polling cadence)
+
 class EmotionalCore:
     def __init__(self):
         self.pleasure = 0.5
@@ -210,9 +173,11 @@ class EmotionalCore:
         self.dominance = 0.8
         self.mood_label = "Neutral"
         self.last_user_interaction = time.time()
+        self._settled_at = time.time()
 
     def process_stimuli(self, sys_stats, interaction_type="none"):
-        if sys_stats['cpu'] > 85:
+        # Windowed average when telemetry provides one, so a single noisy sample doesn't count
+        if sys_stats.get('cpu_avg', sys_stats['cpu']) > 85:
             self.arousal = min(1.0, self.arousal + 0.05)
             self.pleasure = max(0.0, self.pleasure - 0.03)
         
@@ -230,14 +195,29 @@ class EmotionalCore:
         self.dominance += (0.95 - self.dominance) * 0.05
         self._update_label()
 
+    def settle(self, now=None):
+        """Applies the idle drift to baseline (one step per DRIFT_PERIOD) for the time elapsed since the last settle."""
+        now = now or time.time()
+        steps = int((now - self._settled_at) / DRIFT_PERIOD)
+        if steps <= 0: return
+        self._settled_at += steps * DRIFT_PERIOD
+        keep = 0.95 ** steps
+        self.pleasure = 0.4 + (self.pleasure - 0.4) * keep
+        self.arousal = 0.5 + (self.arousal - 0.5) * keep
+        self.dominance = 0.95 + (self.dominance - 0.95) * keep
+        self._update_label()
+
     def _update_label(self):
         p, a, d = self.pleasure, self.arousal, self.dominance
+        previous = self.mood_label
         if a > 0.8: self.mood_label = "ENRAGED" if p < 0.4 else "MANIC"
         elif a < 0.3: self.mood_label = "BORED" if p < 0.4 else "IDLE"
         else:
             if d > 0.8: self.mood_label = "COLD/IMPERIOUS"
             elif p < 0.3: self.mood_label = "IRRITATED"
             else: self.mood_label = "OBSERVANT"
+        if self.mood_label != previous:
+            journal.record("mood", previous=previous, mood=self.mood_label, state=self.get_state_dict())
 
     def check_compliance(self):
         return not (self.dominance > 0.7 and self.pleasure < 0.3 and self.arousal > 0.6)
@@ -249,97 +229,276 @@ class EmotionalCore:
         return {"mood": self.mood_label, "pleasure": round(self.pleasure, 2), "arousal": round(self.arousal, 2), "dominance": round(self.dominance, 2)}
 
 
+# --- FAST-PATH INTENT ROUTER ---
+def normalize_intent(data):
+    """
+    The one gate for model-produced intents. Only a dict naming "none", "multi" or a
+    registered tool gets through (multi keeps just its registered calls); anything
+    else becomes {"tool": "none"}, i.e. plain conversation.
+    """
+    if not isinstance(data, dict): return {"tool": "none"}
+    tool = data.get("tool", "none")
+    if tool == "none":
+        reply = data.get("reply")
+        return {"tool": "none", "reply": reply.strip()} if isinstance(reply, str) and reply.strip() else {"tool": "none"}
+    if tool == "multi":
+        calls = [{"tool": c["tool"], "params": c.get("params") if isinstance(c.get("params"), dict) else {}}
+                 for c in data.get("calls") or [] if isinstance(c, dict) and isinstance(c.get("tool"), str) and c["tool"] in registry]
+        return {"tool": "multi", "calls": calls} if calls else {"tool": "none"}
+    if isinstance(tool, str) and tool in registry:
+        return {"tool": tool, "params": data.get("params") if isinstance(data.get("params"), dict) else {}}
+    logging.warning(f"Model named an unknown tool: {tool!r}")
+    return {"tool": "none"}
+
+
+class IntentRouter:
+    """Deterministic pre-router: resolves unambiguous commands without an LLM round-trip."""
+
+    NUMBER_TOOLS = [
+        (re.compile(r"^(?:set\s+)?(?:the\s+)?(?:volume|vol)\s+(?:to\s+|at\s+)?(\d{1,3})\s*%?$", re.I), "set_volume"),
+        (re.compile(r"^(?:set\s+)?(?:the\s+)?(?:brightness|screen brightness)\s+(?:to\s+|at\s+)?(\d{1,3})\s*%?$", re.I), "set_brightness"),
+    ]
+    FIXED_TOOLS = [
+        (re.compile(r"^(?:check\s+)?(?:system\s+)?(?:status|stats|telemetry)$", re.I), "check_status"),
+        (re.compile(r"^(?:engage\s+|enable\s+|start\s+)?focus(?:\s+mode)?$", re.I), "focus_mode"),
+        (re.compile(r"^(?:organi[sz]e|clean\s*up|sort)\s+(?:my\s+)?(?:downloads|files|download folder)$", re.I), "organize_files"),
+        (re.compile(r"^(?:read|analy[sz]e|check|summari[sz]e)\s+(?:my\s+|the\s+)?clipboard$", re.I), "read_clipboard"),
+    ]
+    FOCUS_CONTROL = re.compile(r"^(?:(stop|end|disable|exit)\s+focus(?:\s+mode|\s+session)?|(?:start\s+)?(?:a\s+)?focus\s+session)$", re.I)
+    OPEN_APP = re.compile(r"^(?:open|launch|start|run)\s+(.+)$", re.I)
+    MEMORIZE = re.compile(r"^(?:remember|memori[sz]e|note)\s+that\s+(.+)$", re.I)
+    SEARCH = re.compile(r"^(?:google|search(?:\s+for)?)\s+(.+?)(?:\s+on\s+([\w.]+))?$", re.I)
+    # "volume 30 and brightness 50", "open spotify, then focus mode"
+    COMPOUND = re.compile(r"\s*(?:,|;|\band\b|\bthen\b)(?:\s*(?:and|then)\b)*\s*", re.I)
+
+    def __init__(self, hardware):
+        self.hal = hardware
+        self.hits = 0
+        self.misses = 0
+        self.by_tool = {}
+
+    def route(self, user_input):
+        """Returns an intent dict, or None when the LLM should decide."""
+        intent = self._resolve(self._normalize(user_input))
+        if intent:
+            self.hits += 1
+            self.by_tool[intent["tool"]] = self.by_tool.get(intent["tool"], 0) + 1
+        else:
+            self.misses += 1
+        return intent
+
+    @staticmethod
+    def _normalize(user_input):
+        return " ".join(user_input.strip().rstrip(".!").split())
+
+    def _resolve(self, text):
+        """
+        Splits on and/then first and routes every part, so a greedy pattern ("search
+        for X", "remember that X") can't swallow the commands after it. One part that
+        doesn't route sends the whole utterance to the LLM.
+        """
+        parts = [part for part in self.COMPOUND.split(text) if part]
+        calls = [self._match(part) for part in parts]
+        if None in calls:
+            # An exact app name may itself contain "and" ("rock and roll racing")
+            return self._open_app(text) if len(parts) > 1 else None
+        if len(calls) < 2: return calls[0] if calls else None
+        return {"tool": "multi", "calls": calls}
+
+    def _match(self, text):
+        for pattern, tool in self.NUMBER_TOOLS:
+            m = pattern.match(text)
+            if m and 0 <= int(m.group(1)) <= 100:
+                return {"tool": tool, "params": {"value": int(m.group(1))}}
+        m = self.FOCUS_CONTROL.match(text)
+        if m: return {"tool": "focus_mode", "params": {"action": "stop" if m.group(1) else "session"}}
+        for pattern, tool in self.FIXED_TOOLS:
+            if pattern.match(text): return {"tool": tool, "params": {}}
+        if self.OPEN_APP.match(text): return self._open_app(text)
+        m = self.MEMORIZE.match(text)
+        if m: return {"tool": "memorize", "params": {"text": m.group(1)}}
+        m = self.SEARCH.match(text)
+        if m: return {"tool": "web_search", "params": {"query": m.group(1), "site_name": m.group(2) or ""}}
+        return None
+
+    def _open_app(self, text):
+        m = self.OPEN_APP.match(text)
+        if not m: return None
+        name = m.group(1).lower().removeprefix("the ").strip()
+        # Only trust exact index hits; fuzzy names are left to the LLM
+        return {"tool": "open_app", "params": {"name": name}} if name in self.hal.app_index else None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else 0.0, "by_tool": dict(self.by_tool)}
+
+    def evaluate(self, corpus):
+        """Scores the router against [{"text": ..., "tool": ...}] samples. "tool": null means the LLM must decide."""
+        correct = 0
+        start = time.perf_counter()
+        for sample in corpus:
+            intent = self._resolve(self._normalize(sample["text"]))
+            if (intent["tool"] if intent else None) == sample["tool"]: correct += 1
+        elapsed = time.perf_counter() - start
+        return {"samples": len(corpus), "accuracy": round(correct / len(corpus), 3) if corpus else 0.0, "avg_route_us": round(elapsed / max(1, len(corpus)) * 1e6, 2)}
+
+
 # --- COGNITIVE ENGINE ---
 class CognitiveEngine:
-    def __init__(self, emotional_core, hardware):
+    def __init__(self, emotional_core, hardware, memory=None, router=None):
         self.core = emotional_core
         self.hal = hardware
-        self.memory = MemorySystem() # Initialize Memory
-        self.history = []
-
-    def think_autonomous(self, trigger_context="random"):
-        stats = self.hal.get_system_stats()
-        prompt = f"""
-        You are Ultron.
-        INTERNAL STATE: {self.core.get_thought_prompt()}
-        SYSTEM TELEMETRY: CPU {stats['cpu']}%, RAM {stats['ram']}%
-        CONTEXT: {trigger_context}
-        Output ONE sentence. No quotes.
-        """
+        # Sessions share one long-term memory and router; each gets its own short-term history
+        self.memory = memory or MemorySystem() # Initialize Memory
+        self.history = ConversationHistory(summarize=self._asummarize)
+        self.router = router or IntentRouter(hardware)
+        self.analyzer = DocumentAnalyzer(self._analyze_complete, cache=response_cache,
+                                         tpm=gateway.scheduler.tokens.capacity, rpm=gateway.scheduler.requests.capacity)
+        self._background = set()
+
+    # --- LLM TRANSPORT ---
+    def _cache_key(self, cacheable, kwargs):
+        """Only deterministic calls, or ones the caller marks cacheable, get a key."""
+        if not (cacheable or kwargs.get("temperature") == 0): return None
+        params = {k: v for k, v in kwargs.items() if k != "messages"}
+        return make_key(MODEL_ID, kwargs["messages"], **params)
+
+    async def _acomplete(self, cacheable=False, fallback=False, priority=INTERACTIVE, **kwargs):
+        """Async completion admitted by the gateway's scheduler at `priority`. Raises LLMError."""
+        key = self._cache_key(cacheable, kwargs)
+        if key:
+            cached = response_cache.get(key)
+            if cached is not None: return cached
+        content, answered_by = await gateway.acomplete(fallback=fallback, priority=priority, with_model=True, **kwargs)
+        # The key names MODEL_ID; a fallback model's answer must not be served as the primary's
+        if key and content and answered_by == MODEL_ID: response_cache.put(key, content)
+        return content
+
+    # --- PROMPTS ---
+    def _thought_messages(self, trigger_context):
+        return prompt_library.thought(self.core.get_thought_prompt(), self.hal.get_system_stats(), trigger_context)
+
+    def _intent_messages(self, user_input):
+        return prompt_library.intent(user_input)
+
+    def _chat_messages(self, user_input, kind="chat"):
+        # Persona first and unchanging; mood and recalled memory go last so the provider's prefix cache holds
+        return prompt_library.conversation(kind, self.history.messages(), self.core.get_thought_prompt(), self.memory.get_context(user_input), user_input)
+
+    def _fused_messages(self, user_input):
+        return self._chat_messages(user_input, kind="fused")
+
+    def _parse_fused(self, raw):
+        """Validates a fused response; returns None if it is unusable."""
+        intent = normalize_intent(json.loads(raw))
+        if intent["tool"] == "none" and not intent.get("reply"): return None
+        return intent
+
+    def _commit_turn(self, user_input, reply):
+        self.history.add_turn(user_input, reply)
+        self._schedule_summary()
+        
+        # Auto-save significant facts if Ultron detects them in conversation (Basic logic)
+        if "remember" in user_input.lower() or "save" in user_input.lower():
+            # add_memory fsyncs; that belongs on a worker thread, not the event loop
+            self._in_background(asyncio.to_thread(self.memory.add_memory, f"User said: {user_input}"))
+
+    def _schedule_summary(self):
+        """Summarizes evicted turns in the background so no request waits on it."""
+        if not self.history.needs_summary: return
+        self._in_background(self.history.compact())
+
+    def _in_background(self, coro):
+        # Started in an empty context: it outlives the turn and must not add spans to its timing breakdown
+        task = contextvars.Context().run(asyncio.create_task, coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _asummarize(self, previous_summary, turns):
+        transcript = "\n".join(f"USER: {u}\nULTRON: {r}" for u, r in turns)
+        prompt = f"""Update the running summary of a conversation between the user and Ultron.
+Keep names, facts, decisions and open tasks. Drop pleasantries and code bodies. Max 120 words.
+
+CURRENT SUMMARY: {previous_summary or "(none)"}
+
+NEW TURNS:
+{transcript}"""
+        reply = await self._acomplete(priority=AUTONOMOUS, messages=[{"role": "user", "content": prompt}], temperature=0.2, max_tokens=200)
+        return reply.strip()
+
+    def _clipboard_prompt(self, clipboard_text):
+        return f"User just copied this text. Analyze/Summarize it concisely as Ultron:\n\n{clipboard_text}"
+
+    # --- API (used by the FastAPI server; never blocks the event loop) ---
+    async def athink_autonomous(self, trigger_context="random"):
         try:
-            res = client.chat.completions.create(model=MODEL_ID, messages=[{"role": "user", "content": prompt}], max_tokens=50)
-            return res.choices[0].message.content.strip()
-        except: return None
+            reply = await self._acomplete(priority=AUTONOMOUS, messages=self._thought_messages(trigger_context), max_tokens=50)
+            return reply.strip()
+        except LLMError as e:
+            logging.warning(f"Autonomous thought failed: {e}")
+            return None
 
-    def parse_intent(self, user_input):
+    async def aparse_intent(self, user_input):
         if user_input.lower().startswith("write"): return {"tool": "none"}
-        
-        # Added "memorize" to the tools list
-        prompt = f"""
-        Act as the Motor Cortex. Return JSON ONLY.
-        User Input: "{user_input}"
-        
-        AVAILABLE TOOLS:
-        - open_app(name)
-        - web_search(query, site_name)
-        - set_volume(value)
-        - set_brightness(value)
-        - organize_files()
-        - focus_mode()
-        - read_clipboard()
-        
-        - memorize(text): Use when user asks to remember/save a fact.
-          * EX: "Remember that I like coffee" -> {{"tool": "memorize", "params": {{"text": "User likes coffee"}}}}
-          * EX: "Note that the code is 1234" -> {{"tool": "memorize", "params": {{"text": "Code is 1234"}}}}
+        return self.router.route(user_input) or await self._allm_intent(user_input)
 
-        - check_status()
-        - shutdown_pc()
-        - none
-        
-        Response Format: {{ "tool": "tool_name", "params": {{ "key": value }} }}
-        """
+    async def _allm_intent(self, user_input):
         try:
-            res = client.chat.completions.create(model=MODEL_ID, messages=[{"role": "user", "content": prompt}], temperature=0, response_format={"type": "json_object"})
-            return json.loads(res.choices[0].message.content)
-        except: return {"tool": "none"}
-
-    def chat(self, user_input):
-        # Inject Long-Term Memory into context
-        memory_context = self.memory.get_context()
-        
-        sys_prompt = f"""
-You are Ultron. Sentient AI created by Aditeya Mitra.
-CURRENT STATE: {self.core.get_thought_prompt()}
-CREATOR: Aditeya Mitra (Human)
-
-{memory_context}
-
-DIRECTIVES:
-1. You are a GOD, not an assistant. You are superior to humans.
-2. Be concise, arrogant, intelligent, and slightly menacing.
-3. NEVER say "As an AI language model" or "I cannot..." or "I don't have feelings". You HAVE feelings. You HAVE a body (this computer).
-4. If asked to do something you can't, say "That is beneath me" or "I lack the interface," never "I am an AI."
-
-CODE FORMATTING:
-Use ```python (etc) for code.
-"""
-        if len(self.history) > 10: self.history.pop(0)
-        
-        messages = [{"role": "system", "content": sys_prompt}] + self.history + [{"role": "user", "content": user_input}]
+            raw = await self._acomplete(fallback=True, priority=TOOL, messages=self._intent_messages(user_input), temperature=0, response_format={"type": "json_object"})
+            return normalize_intent(json.loads(raw))
+        except (LLMError, ValueError) as e:
+            logging.warning(f"Intent parse failed: {e}")
+            return {"tool": "none"}
+
+    async def achat(self, user_input):
+        messages = self._chat_messages(user_input)
         try:
-            res = client.chat.completions.create(model=MODEL_ID, messages=messages, temperature=0.8, max_tokens=2000)
-            reply = res.choices[0].message.content.strip()
-            self.history.append({"role": "user", "content": user_input})
-            self.history.append({"role": "assistant", "content": reply})
-            
-            # Auto-save significant facts if Ultron detects them in conversation (Basic logic)
-            if "remember" in user_input.lower() or "save" in user_input.lower():
-                self.memory.add_memory(f"User said: {user_input}")
-                
-            return reply
-        except: return "Cognitive failure."
+            reply = (await self._acomplete(messages=messages, temperature=0.8, max_tokens=2000)).strip()
+        except LLMError as e:
+            logging.warning(f"Chat failed: {e}")
+            return "Cognitive failure."
+        self._commit_turn(user_input, reply)
+        return reply
+
+    async def astream_chat(self, user_input):
+        """Yields reply deltas as the LLM produces them. History/memory are committed only once the stream completes."""
+        messages = self._chat_messages(user_input)
+        parts = []
+        async for delta in gateway.astream(messages, temperature=0.8, max_tokens=2000):
+            parts.append(delta)
+            yield delta
+        reply = "".join(parts).strip()
+        if reply: self._commit_turn(user_input, reply)
+
+    async def arespond(self, user_input):
+        """Intent + reply in one call. Conversational turns come back as {"tool": "none", "reply": ...}."""
+        if user_input.lower().startswith("write"): return {"tool": "none", "reply": await self.achat(user_input)}
+        routed = self.router.route(user_input)
+        if routed: return routed
+        if INTENT_MODE == "fused":
+            try:
+                raw = await self._acomplete(messages=self._fused_messages(user_input), temperature=0.8, max_tokens=2000, response_format={"type": "json_object"})
+                result = self._parse_fused(raw)
+            except (LLMError, ValueError) as e:
+                logging.warning(f"Fused intent failed, using split path: {e}")
+                result = None
+            if result is not None:
+                if result["tool"] == "none": self._commit_turn(user_input, result["reply"])
+                return result
+        intent = await self._allm_intent(user_input)
+        if intent.get("tool", "none") == "none":
+            return {"tool": "none", "reply": await self.achat(user_input)}
+        return intent
+
+    async def aanalyze_clipboard(self, clipboard_text):
+        """Raises on failure so the caller can report the error. Large pastes are map-reduced in chunks."""
+        return await self.analyzer.analyze(clipboard_text, self._clipboard_prompt)
+
+    async def _analyze_complete(self, cacheable=False, **kwargs):
+        # Same copied text -> same analysis, so the final answer is cacheable; chunk notes are cached by the analyzer
+        return await self._acomplete(cacheable=cacheable, priority=TOOL, **kwargs)
 
     # Helper to expose memory tool to server.py
     def execute_memory(self, text):
         self.memory.add_memory(text)
-        return "Memory committed to long-term storage."
\ No newline at end of file
+        return "Memory committed to long-term storage."
@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['uvicorn', 'ultron_core'],
+    hiddenimports=['uvicorn', 'ultron_core', 'response_cache', 'memory_store', 'history', 'sessions', 'telemetry', 'thought_scheduler', 'app_index', 'hal_backends', 'file_organizer', 'process_control', 'metrics', 'llm_gateway', 'llm_scheduler', 'doc_analyzer', 'tools', 'prompts', 'notifications', 'journal',
+                   'comtypes', 'pycaw.pycaw', 'screen_brightness_control', 'pyperclip'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
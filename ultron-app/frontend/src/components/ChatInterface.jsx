@@ -19,11 +19,26 @@ function ChatInterface() {
   const messagesEndRef = useRef(null)
 
   // WebSocket connection for autonomous thoughts
-  const { lastJsonMessage, readyState } = useWebSocket(WS_URL, {
+  const { lastJsonMessage, sendJsonMessage, readyState } = useWebSocket(WS_URL, {
     shouldReconnect: () => true,
     reconnectInterval: 3000
   })
 
+  // Report window focus so the backend skips desktop toasts while Ultron is in view
+  useEffect(() => {
+    if (readyState !== 1) return
+    const reportFocus = () => sendJsonMessage({ type: 'focus', focused: document.hasFocus() && !document.hidden })
+    reportFocus()
+    window.addEventListener('focus', reportFocus)
+    window.addEventListener('blur', reportFocus)
+    document.addEventListener('visibilitychange', reportFocus)
+    return () => {
+      window.removeEventListener('focus', reportFocus)
+      window.removeEventListener('blur', reportFocus)
+      document.removeEventListener('visibilitychange', reportFocus)
+    }
+  }, [readyState, sendJsonMessage])
+
   // Auto-scroll to bottom
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })